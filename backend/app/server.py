@@ -1,157 +1,1025 @@
 import asyncio
+import importlib
 import json
 import logging
 import os
-from logging.handlers import TimedRotatingFileHandler
+import time
 from typing import List
 
 import numpy as np
 import sherpa_onnx
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 import uvicorn
-import wave
 
 # Updated Imports
 try:
-    from backend.core.config import LOG_DIR, LOG_FILE, RECORDINGS_DIR
-    from backend.services.transcription.hybrid_service import HybridService
+    from backend.core.config import LOG_FILE, RECORDINGS_DIR
+    from backend.core.runtime_config import get_runtime_config
+    from backend.services.admission import AdmissionController, AdmissionRejected
+    from backend.services.broadcast import BroadcastHub
+    from backend.services.audio.tap import AudioTapRegistry, TAP_POINTS
+    from backend.services.audio.pcm import float_to_pcm16
+    from backend.services.audio.resample import StreamingResampler
+    from backend.services.audio.gate import SilenceGate
+    from backend.services.audio.rechunk import Rechunker
+    from backend.services.hibernation import HibernationManager, SessionSnapshot, recording_part_path, spill_recording
+    from backend.services.language_id import LanguageDetector, SpokenLanguageIdentifier
+    from backend.services.memory import MemoryAccountant, physical_memory_bytes
+    from backend.services.recordings.enrichment import RecordingEnricher
+    from backend.services.resume import ParkedSession, ReplayLog, SessionParking, new_resume_token
+    from backend.services.recordings.transcoder import RecordingTranscoder
+    from backend.services.recordings.transcript_store import Segment, TranscriptStore
+    from backend.services.translation.batcher import TranslationBatcher
+    from backend.services.translation.session import SessionTranslator
+    from backend.services.translation.translator import CTranslate2Translator
+    from backend.core.logging_setup import session_id_var, setup_logging
+    from backend.core.tracing import Tracer, current_trace, span, traced_call
+    from backend.core.profiler import ProfilerBusy, SamplingProfiler
+    from backend.core.protocol import PROTOCOL_VERSIONS, PartialEncoder, parse_control
 except ImportError:
     # Allow running server.py directly if PYTHONPATH is set or from root
     import sys
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
-    from backend.core.config import LOG_DIR, LOG_FILE, RECORDINGS_DIR
-    from backend.services.transcription.hybrid_service import HybridService
+    from backend.core.config import LOG_FILE, RECORDINGS_DIR
+    from backend.core.runtime_config import get_runtime_config
+    from backend.services.admission import AdmissionController, AdmissionRejected
+    from backend.services.broadcast import BroadcastHub
+    from backend.services.audio.tap import AudioTapRegistry, TAP_POINTS
+    from backend.services.audio.pcm import float_to_pcm16
+    from backend.services.audio.resample import StreamingResampler
+    from backend.services.audio.gate import SilenceGate
+    from backend.services.audio.rechunk import Rechunker
+    from backend.services.hibernation import HibernationManager, SessionSnapshot, recording_part_path, spill_recording
+    from backend.services.language_id import LanguageDetector, SpokenLanguageIdentifier
+    from backend.services.memory import MemoryAccountant, physical_memory_bytes
+    from backend.services.recordings.enrichment import RecordingEnricher
+    from backend.services.resume import ParkedSession, ReplayLog, SessionParking, new_resume_token
+    from backend.services.recordings.transcoder import RecordingTranscoder
+    from backend.services.recordings.transcript_store import Segment, TranscriptStore
+    from backend.services.translation.batcher import TranslationBatcher
+    from backend.services.translation.session import SessionTranslator
+    from backend.services.translation.translator import CTranslate2Translator
+    from backend.core.logging_setup import session_id_var, setup_logging
+    from backend.core.tracing import Tracer, current_trace, span, traced_call
+    from backend.core.profiler import ProfilerBusy, SamplingProfiler
+    from backend.core.protocol import PROTOCOL_VERSIONS, PartialEncoder, parse_control
 
 
 logger = logging.getLogger("server")
-logger.setLevel(logging.INFO)
-
-# File handler with rotation (1 week retention)
-file_handler = TimedRotatingFileHandler(
-    filename=LOG_FILE,
-    when="midnight",
-    interval=1,
-    backupCount=7,
-    encoding="utf-8"
-)
-file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-
-# Console handler
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
 
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+# Records go through a queue to a background writer (JSON file + console);
+# partials are rate-limited per session, errors and finals always kept
+_logging_config = get_runtime_config().logging
+log_listener, log_rate_limiter = setup_logging(
+    logger,
+    LOG_FILE,
+    level=_logging_config.level,
+    json_file=_logging_config.json_file,
+    partial_rate=_logging_config.partial_rate,
+    partial_burst=_logging_config.partial_burst,
+    queue_size=_logging_config.queue_size,
+)
 
 app = FastAPI()
 
 # Buffer to store audio data for each session: {session_id: bytearray}
 session_buffers = {}
+# Recordings being spilled to their .part file under memory pressure: {session_id: task}
+recording_spills = {}
+
+# Diagnostic audio taps, enabled per session via /api/taps
+tap_registry = AudioTapRegistry()
+
+# Saved recordings are written and compressed off the request path
+_recordings_config = get_runtime_config().recordings
+transcoder = RecordingTranscoder(
+    RECORDINGS_DIR,
+    fmt=_recordings_config.format,
+    workers=_recordings_config.workers,
+    max_archive_bytes=None if _recordings_config.max_archive_mb is None else int(_recordings_config.max_archive_mb * 1024 * 1024),
+)
+
+# Every final segment, indexed for search; written by a background thread
+transcripts = TranscriptStore()
+
+# Listeners of a session (/ws/subscribe) receive its results without sending audio
+_broadcast_config = get_runtime_config().broadcast
+broadcast = BroadcastHub(max_queue=_broadcast_config.max_queue, max_subscribers=_broadcast_config.max_subscribers)
+
+# Machine translation of results, batched across sessions; None when not installed
+_translation_config = get_runtime_config().translation
+translation = None
+if _translation_config.enabled:
+    try:
+        translation = TranslationBatcher(
+            CTranslate2Translator(compute_type=_translation_config.compute_type, intra_threads=_translation_config.num_threads),
+            max_batch_size=_translation_config.max_batch_size,
+            max_wait=_translation_config.max_wait,
+            cache_size=_translation_config.cache_size,
+        )
+    except ImportError as e:
+        logger.warning(f"Translation unavailable on this host: {e}")
+
+# Per-utterance spans; sampled (and slow) utterances are kept for /api/traces
+_tracing_config = get_runtime_config().tracing
+tracer = Tracer(
+    enabled=_tracing_config.enabled,
+    sample_rate=_tracing_config.sample_rate,
+    slow_final_ms=_tracing_config.slow_final_ms,
+    capacity=_tracing_config.capacity,
+    max_spans=_tracing_config.max_spans,
+)
 
 class SaveRequest(BaseModel):
     session_id: str
 
+class TapRequest(BaseModel):
+    session_id: str
+    points: List[str] = ["ingest"]
+    enabled: bool = True
+
 @app.post("/api/save_recording")
 async def save_recording(request: SaveRequest):
     session_id = request.session_id
-    if session_id not in session_buffers or len(session_buffers[session_id]) == 0:
+    part_path = recording_part_path(RECORDINGS_DIR, session_id)
+    if len(session_buffers.get(session_id, b"")) == 0 and not os.path.exists(part_path) and session_id not in recording_spills:
         return {"message": "No audio to save", "filename": None}
 
-    audio_data = session_buffers.pop(session_id)
-    filename = f"{session_id}.wav"
-    filepath = os.path.join(RECORDINGS_DIR, filename)
+    # A spill in progress finishes first, so the .part file is complete
+    await wait_for_spill(session_id)
+    memory.unregister(("recording", session_id))
 
+    # WAV writing and compression happen in the background; poll /api/recordings/{session_id}
+    audio_data = session_buffers.pop(session_id, bytearray())
+    job = transcoder.submit(session_id, audio_data, prefix_path=part_path)
+    return {"message": "Queued", "job": job.to_dict()}
+
+@app.get("/api/transcripts/search")
+async def search_transcripts(q: str, session_id: str = None, limit: int = 50):
+    """Full-text search over final segments; offsets are milliseconds into each session's recording."""
     try:
-        with wave.open(filepath, "wb") as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)  # 16-bit PCM (2 bytes)
-            wf.setframerate(SAMPLE_RATE)
-            wf.writeframes(audio_data)
-        
-        logger.info(f"Saved recording: {filepath}")
-        return {"message": "Saved successfully", "filename": filename, "path": filepath}
-    except Exception as e:
-        logger.error(f"Failed to save WAV: {e}")
-        # Put data back in case of error? Or just raise? 
-        # For now, simplistic error handling.
-        raise HTTPException(status_code=500, detail=str(e))
+        results = await asyncio.to_thread(transcripts.search, q, session_id, min(limit, 500))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"query": q, "results": results}
+
+@app.get("/api/transcripts/{session_id}")
+async def session_transcript(session_id: str):
+    return {"session_id": session_id, "segments": await asyncio.to_thread(transcripts.session_segments, session_id)}
+
+@app.get("/api/transcripts/{session_id}/enriched")
+async def enriched_transcript(session_id: str):
+    """Post-session transcript (re-transcribed, with speakers) once enrichment has run; `job` tracks progress."""
+    job = enricher.status(session_id) if enricher is not None else None
+    segments = await asyncio.to_thread(transcripts.enriched_segments, session_id)
+    if job is None and not segments:
+        raise HTTPException(status_code=404, detail="No enriched transcript for this session")
+    return {"session_id": session_id, "job": job, "segments": segments}
+
+@app.get("/api/enrichment")
+async def enrichment_stats():
+    if enricher is None:
+        return {"enabled": False}
+    return {"enabled": True, **enricher.stats()}
+
+@app.get("/api/traces")
+async def trace_stats():
+    """Tracing counters and the most recently retained utterances."""
+    return tracer.stats()
+
+@app.get("/api/traces/{session_id}")
+async def download_trace(session_id: str):
+    """Retained utterance traces of a session as Chrome trace-event JSON (open in ui.perfetto.dev)."""
+    trace = tracer.export(session_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="No retained traces for this session")
+    return JSONResponse(trace, headers={"Content-Disposition": f'attachment; filename="{session_id}.trace.json"'})
+
+# Idle until /api/admin/profile asks for a profile
+_profiler_config = get_runtime_config().profiler
+profiler = SamplingProfiler(interval=_profiler_config.interval_ms / 1000, max_seconds=_profiler_config.max_seconds)
+
+@app.post("/api/admin/profile")
+async def run_profile(seconds: float = 10.0, interval_ms: float = None, format: str = "collapsed"):
+    """
+    Sample every thread for `seconds` and return collapsed stacks tagged by
+    pipeline stage (feed to flamegraph.pl or speedscope); format=json adds stage totals.
+    """
+    if not _profiler_config.enabled:
+        raise HTTPException(status_code=403, detail="Profiler is disabled")
+    if seconds <= 0 or (interval_ms is not None and interval_ms <= 0):
+        raise HTTPException(status_code=400, detail="seconds and interval_ms must be positive")
+    if format not in ("collapsed", "json"):
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'json'")
+    try:
+        result = await asyncio.to_thread(profiler.profile, seconds, interval_ms and interval_ms / 1000)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logger.info(f"Profile taken: {result['samples']} samples over {result['seconds']}s, stages {result['stages']}")
+    if format == "json":
+        return result
+    return PlainTextResponse(result["collapsed"])
+
+@app.get("/api/broadcast")
+async def broadcast_stats():
+    return broadcast.stats()
+
+@app.get("/api/translation")
+async def translation_stats():
+    """Installed language pairs, batching, cache hit rate and translation latency."""
+    if translation is None:
+        return {"available": False}
+    return {
+        "available": True,
+        "translate_partials": _translation_config.translate_partials,
+        "pairs": [f"{source}-{target}" for source, target in translation.translator.pairs()],
+        **translation.stats(),
+    }
+
+@app.get("/api/recordings/{session_id}")
+async def recording_status(session_id: str):
+    status = transcoder.status(session_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="No recording job for this session")
+    return status
+
+
+@app.post("/api/taps")
+async def configure_taps(request: TapRequest):
+    """Enable or disable audio capture at the given pipeline points for a session."""
+    try:
+        if request.enabled:
+            stats = tap_registry.enable(request.session_id, request.points)
+        else:
+            stats = tap_registry.disable(request.session_id, request.points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"session_id": request.session_id, "available_points": list(TAP_POINTS), "taps": stats}
+
+
+@app.get("/api/taps/{session_id}")
+async def get_taps(session_id: str):
+    return {"session_id": session_id, "taps": tap_registry.stats(session_id)}
 
 
 SAMPLE_RATE = 16000
 
-# Service Manager to cache models by language
+# Model name -> (module, class). Imported lazily because the MLX-based services
+# only import on Apple Silicon; models that fail to import are simply unavailable.
+MODEL_SERVICES = {
+    "hybrid": ("backend.services.transcription.hybrid_service", "HybridService"),
+    "moonshine": ("backend.services.transcription.moonshine_service", "MoonshineService"),
+    "parakeet": ("backend.services.transcription.parakeet_service", "ParakeetService"),
+}
+
+# Order tried for model=auto (and the default when the client doesn't ask)
+AUTO_MODEL_PREFERENCE = ["hybrid", "moonshine", "parakeet"]
+
+# Service Manager to cache model services and route sessions to them
 class ServiceManager:
-    def __init__(self):
-        self.services = {}
+    def __init__(self, config=None):
+        self.config = config or get_runtime_config()
+        self.services = {} # (model, language) -> service
+        self.service_classes = {}
+        self.unavailable = set()
+        self.failed = set() # (model, language) pairs whose models failed to load
+        self.admission = AdmissionController(
+            capacity=self.config.admission.capacity,
+            max_rtf=self.config.admission.max_rtf,
+            rtf_window=self.config.admission.rtf_window,
+            rtf_min_audio=self.config.admission.rtf_min_audio,
+            preference=AUTO_MODEL_PREFERENCE,
+        )
 
-    def get_service(self, language: str):
-        # We only support hybrid mode basically. logic simplified.
-        key = "hybrid_en_streaming" # Single instance for now for simplicity
-        
+        for name in MODEL_SERVICES:
+            service_class = self._service_class(name)
+            if service_class is not None:
+                self.admission.register(name, service_class.SESSION_COST, service_class.MAX_SESSIONS)
+
+    def _service_class(self, name: str):
+        if name in self.unavailable:
+            return None
+        if name not in self.service_classes:
+            module_name, class_name = MODEL_SERVICES[name]
+            try:
+                self.service_classes[name] = getattr(importlib.import_module(module_name), class_name)
+            except ImportError as e:
+                logger.warning(f"Model '{name}' unavailable on this host: {e}")
+                self.unavailable.add(name)
+                return None
+        return self.service_classes[name]
+
+    def is_available(self, name: str) -> bool:
+        return name in MODEL_SERVICES and self._service_class(name) is not None
+
+    def available_models(self) -> list:
+        return [name for name in MODEL_SERVICES if self.is_available(name)]
+
+    def serves(self, name: str, language: str) -> bool:
+        """Whether model `name` can transcribe `language` on this host."""
+        return self.is_available(name) and (name, language) not in self.failed and \
+            language in self._service_class(name).LANGUAGES
+
+    def supports_language(self, language: str) -> bool:
+        return any(self.serves(name, language) for name in MODEL_SERVICES)
+
+    def get_service(self, model: str, language: str = "en"):
+        cls = self._service_class(model)
+        # Models that detect the language themselves share one instance across languages
+        key = (model, None if getattr(cls, "AUTO_LANGUAGE", False) else language)
         if key not in self.services:
-            logger.info(f"Creating new service for key: {key}")
-            self.services[key] = HybridService() # Language hardcoded to EN in HybridService currently
+            logger.info(f"Creating new service for model: {model} ({language})")
+            self.services[key] = cls(config=self.config, language=language)
         return self.services[key]
 
+    def acquire(self, requested: str, language: str = "en"):
+        """
+        Admit a new session and return (model_name, service) for the spoken language.
+        Raises AdmissionRejected when the host has no capacity left.
+        """
+        while True:
+            model = self.admission.admit(requested, available=lambda name: self.serves(name, language))
+            try:
+                return model, self.get_service(model, language)
+            except Exception as e:
+                # Model files missing etc.: give the slot back and try the next candidate
+                logger.error(f"Failed to load model '{model}' ({language}): {e}", exc_info=True)
+                self.admission.release(model)
+                self.failed.add((model, language))
+
+    def release(self, model: str):
+        self.admission.release(model)
+
 manager = ServiceManager()
 
+# Idle sessions release their streams and wake from a pool of warm ones
+hibernation = HibernationManager(pool_size=manager.config.hibernation.pool_size)
+
+# Per-session memory accounting; above the watermark new sessions are refused and the largest buffers shed
+_memory_config = get_runtime_config().memory
+_watermark_bytes = None
+if _memory_config.watermark_mb is not None:
+    _watermark_bytes = int(_memory_config.watermark_mb * 1024 * 1024)
+elif physical_memory_bytes() is not None:
+    _watermark_bytes = int(physical_memory_bytes() * _memory_config.watermark_fraction)
+memory = MemoryAccountant(_watermark_bytes, resume_fraction=_memory_config.resume_fraction)
+manager.admission.memory_pressure = memory.over_watermark
+memory_monitor = None
+
+# Sessions whose socket dropped keep their streams for a while; a reconnect with the resume token continues them
+_resume_config = get_runtime_config().resume
+parking = SessionParking(ttl=_resume_config.ttl)
+parking_sweeper = None
+
+async def monitor_memory():
+    while True:
+        await asyncio.sleep(_memory_config.check_interval)
+        try:
+            memory.check()
+        except Exception as e:
+            logger.error(f"Memory check failed: {e}", exc_info=True)
+
+def spill_session_recording(session_id: str):
+    """Move a session's in-memory recording to its .part file in the background (memory pressure)."""
+    buffer = session_buffers.get(session_id)
+    if buffer and session_id not in recording_spills:
+        task = asyncio.create_task(asyncio.to_thread(spill_recording, buffer, recording_part_path(RECORDINGS_DIR, session_id)))
+        recording_spills[session_id] = task
+        task.add_done_callback(lambda _: recording_spills.pop(session_id, None))
+
+async def wait_for_spill(session_id: str):
+    spill = recording_spills.get(session_id)
+    if spill is not None:
+        await asyncio.shield(spill)
+
+def track_detached_recording(session_id: str):
+    """A disconnected session's recording stays in memory until it is saved; keep it accounted and sheddable."""
+    memory.register(("recording", session_id), session_id,
+                    lambda: {"recording": len(session_buffers.get(session_id, b""))},
+                    lambda: spill_session_recording(session_id))
+
+def session_memory(session_id: str, service, stream, rechunker, detector) -> dict:
+    """Memory probe of a live or parked session, by component."""
+    usage = {
+        "recording": len(session_buffers.get(session_id, b"")) if session_id else 0,
+        "rechunker": rechunker.pending * 4 if rechunker is not None else 0,
+        "language_id": detector.memory_bytes() if detector is not None else 0,
+        "send_queue": broadcast.queued_bytes(session_id),
+    }
+    if service is not None and stream is not None and hasattr(service, "memory_usage"):
+        usage.update(service.memory_usage(stream))
+    return usage
+
+# Saved recordings get a full-quality, speaker-attributed transcript in the background
+_enrichment_config = get_runtime_config().enrichment
+
+def live_sessions_busy() -> bool:
+    """Live sessions need the CPU: chunks are queueing for worker threads, or processing is near real time."""
+    admission = manager.admission
+    return admission.in_flight > _enrichment_config.max_live_queue or admission.host_rtf() > _enrichment_config.max_live_rtf
+
+enricher = None
+if _enrichment_config.enabled:
+    enricher = RecordingEnricher(
+        transcripts,
+        busy=live_sessions_busy,
+        engine=_enrichment_config.engine,
+        diarization=_enrichment_config.diarization,
+        num_speakers=_enrichment_config.num_speakers,
+        cluster_threshold=_enrichment_config.cluster_threshold,
+        num_threads=_enrichment_config.num_threads,
+        resume_after=_enrichment_config.resume_after,
+    )
+
+    def enrich_saved_recording(job):
+        # Called by the transcoder's coordinator thread once the recording is on disk
+        path = job.output_path or job.wav_path
+        if path and os.path.exists(path):
+            enricher.submit(job.session_id, path, transcripts.session_language(job.session_id))
+
+    transcoder.on_done = enrich_saved_recording
+
+# Wire protocol 2 (delta-encoded partials) snapshot cadence
+_protocol_config = get_runtime_config().protocol
+
+# Spoken language identification for language=auto; None when the model isn't installed
+_language_id_config = manager.config.language_id
+language_identifier = None
+if _language_id_config.enabled:
+    try:
+        language_identifier = SpokenLanguageIdentifier(num_threads=_language_id_config.num_threads)
+    except Exception as e:
+        logger.warning(f"Spoken language identification unavailable: {e}")
+
+
+@app.get("/api/models")
+async def list_models():
+    """Models this host can serve, plus current admission load."""
+    return {"models": manager.available_models(), "admission": manager.admission.stats()}
+
+@app.get("/api/memory")
+async def memory_stats(limit: int = 10):
+    """Process RSS against the watermark, and the sessions holding the most memory, by component."""
+    return memory.stats(limit)
+
+@app.get("/api/resume")
+async def resume_stats():
+    """Sessions parked after their socket dropped, waiting to be resumed."""
+    return {"enabled": _resume_config.enabled, **parking.stats()}
+
+@app.get("/api/hibernation")
+async def hibernation_stats():
+    """Hibernated sessions, warm stream pools and rehydration latency."""
+    return hibernation.stats()
+
+async def send_translation(websocket: WebSocket, translator, text: str, is_final: bool, segment: int,
+                           session_id: str = None, replay: ReplayLog = None):
+    """Translate one result and send it as its own message; transcripts are never held back for it."""
+    try:
+        translated = await translator.translate(text, is_final)
+        if translated is None:
+            return # Partial superseded by a final
+        message = {"translation": translated, "is_final": is_final, "segment": segment, "target_language": translator.target}
+        # Kept for a resumed client even if the socket is already gone
+        if is_final and replay is not None:
+            replay.record(message)
+        broadcast.publish(session_id, message, is_partial=not is_final)
+        await websocket.send_json(message)
+    except Exception as e:
+        logger.warning(f"Translation of segment {segment} failed: {e}")
+
+def session_hello(model_name: str, requested_model: str, language: str, target_language: str, protocol: int = 1):
+    """
+    First message of a session (and of a language switch): the model actually serving it
+    (may be a downgrade), its language and translation. Returns (message, SessionTranslator or None).
+    """
+    hello = {"model": model_name, "requested_model": requested_model, "language": language, "target_language": None,
+             "protocol": protocol}
+    translator = None
+    # Results are also translated when the client asked for another language and a model for the pair exists
+    if target_language and target_language != language:
+        if translation is None:
+            hello["translation_error"] = "Translation is not available on this host"
+        elif not translation.supports(language, target_language):
+            hello["translation_error"] = f"No {language}->{target_language} translation model installed"
+        else:
+            translator = SessionTranslator(translation, language, target_language)
+            hello["target_language"] = target_language
+    return hello, translator
+
+def open_stream(model_name: str, language: str, service, taps, gate):
+    """(pool, stream) for a session bound to this model; with hibernation the stream comes from the warm pool."""
+    pool = None
+    # Hibernation relies on the gate to know the session is idle
+    if gate is not None and manager.config.hibernation.enabled:
+        pool = hibernation.pool(f"{model_name}/{language}", service)
+    if pool is not None:
+        stream = pool.acquire(taps)
+        asyncio.create_task(refill_pool(pool))
+    else:
+        stream = service.create_stream(taps=taps)
+    return pool, stream
+
+def session_rechunker(service, rechunker=None):
+    """
+    Regroups the session's ingest into the service's native frames; None if disabled or the
+    service declares none. An existing rechunker is retargeted, keeping the audio it holds.
+    """
+    frame_samples = getattr(service, "FRAME_SAMPLES", None)
+    rechunk_config = manager.config.rechunk
+    if not rechunk_config.enabled or not frame_samples:
+        return rechunker
+    if rechunker is not None:
+        rechunker.set_frame(frame_samples)
+        return rechunker
+    return Rechunker(frame_samples, rechunk_config.chunk_seconds, rechunk_config.max_latency)
+
+def process_chunks(service, chunks: list, stream, flush: bool = False) -> list:
+    # Chunks are fed one call each: the models' silence triggers count whole chunks
+    results = []
+    for chunk in chunks:
+        results.extend(service.process_audio(chunk, stream=stream))
+    if flush:
+        results.extend(service.finalize(stream))
+    return results
+
+async def refill_pool(pool):
+    try:
+        await asyncio.to_thread(pool.refill)
+    except Exception as e:
+        logger.error(f"Stream pool refill failed: {e}", exc_info=True)
+
+async def finalize_detached(session_id: str, service, stream, rechunker, model_name: str, language: str,
+                            segment_start, recorded_samples: int, segment_index: int) -> int:
+    """
+    The socket is gone, but what was said last still reaches the transcript and listeners.
+    Returns the next segment index.
+    """
+    if service is None or stream is None:
+        return segment_index
+    try:
+        # Including audio the rechunker was still holding
+        leftover = rechunker.take(flush=True) if rechunker is not None else []
+        for res in await asyncio.to_thread(process_chunks, service, leftover, stream, True):
+            if res["is_final"] and res["text"].strip():
+                if session_id:
+                    transcripts.append(Segment(session_id, segment_start or 0, recorded_samples, res["text"], model_name, language))
+                broadcast.publish(session_id, {"text": res["text"], "is_final": True, "segment": segment_index})
+                segment_index += 1
+                logger.info(f"Finalized on disconnect: {res['text']}", extra={"event": "final"})
+    except Exception as e:
+        logger.error(f"Finalizing on disconnect failed: {e}", exc_info=True)
+    return segment_index
+
+def end_session(session_id: str, model_name: str, announce: bool = True):
+    """Give back what a finished session held: its admission slot, taps and listener metadata."""
+    if model_name is not None:
+        manager.release(model_name)
+    if session_id and session_buffers.get(session_id):
+        track_detached_recording(session_id)
+    if announce:
+        broadcast.end(session_id)
+    log_rate_limiter.forget(session_id)
+    if session_id:
+        tap_registry.release(session_id)
+
+def park_session(parked: ParkedSession):
+    """Keep a dropped session resumable; it stays accounted, and under memory pressure it is closed first."""
+    session_id = parked.session_id
+    parking.park(parked)
+    memory.register(("parked", session_id), session_id,
+                    lambda: session_memory(session_id, parked.service, parked.stream, parked.rechunker, parked.detector),
+                    lambda: asyncio.create_task(shed_parked_session(session_id)))
+    # Listeners learn the speaker is gone; they get the session's metadata again if it resumes
+    broadcast.end(session_id)
+    log_rate_limiter.forget(session_id)
+
+async def close_parked_session(parked: ParkedSession):
+    """A parked session that won't be resumed: finalize and release it as a plain disconnect would have."""
+    session_id_var.set(parked.session_id)
+    memory.unregister(("parked", parked.session_id))
+    for task in parked.translations:
+        task.cancel()
+    await finalize_detached(parked.session_id, parked.service, parked.stream, parked.rechunker, parked.model_name,
+                            parked.language, parked.segment_start, parked.recorded_samples, parked.segment_index)
+    end_session(parked.session_id, parked.model_name, announce=False)
+    logger.info(f"Session {parked.session_id} closed after {time.monotonic() - parked.parked_at:.1f}s parked")
+
+async def shed_parked_session(session_id: str):
+    parked = parking.take(session_id)
+    if parked is not None:
+        await close_parked_session(parked)
+
+async def sweep_parked_sessions():
+    while True:
+        await asyncio.sleep(_resume_config.sweep_interval)
+        for parked in parking.expired():
+            try:
+                await close_parked_session(parked)
+            except Exception as e:
+                logger.error(f"Closing parked session {parked.session_id} failed: {e}", exc_info=True)
+
 @app.on_event("startup")
 async def startup_event():
     logger.info(f"Server starting... default model hybrid")
+    # Finish recordings whose transcoding was interrupted (or predates it)
+    transcoder.recover()
+    global memory_monitor, parking_sweeper
+    if memory.watermark_bytes is not None:
+        memory_monitor = asyncio.create_task(monitor_memory())
+    if _resume_config.enabled:
+        parking_sweeper = asyncio.create_task(sweep_parked_sessions())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if memory_monitor is not None:
+        memory_monitor.cancel()
+    if parking_sweeper is not None:
+        parking_sweeper.cancel()
+    # Flush any captured diagnostic audio still held in memory
+    tap_registry.writer.stop()
+    transcoder.shutdown()
+    if enricher is not None:
+        enricher.shutdown()
+    transcripts.close()
+    if translation is not None:
+        translation.stop()
+    log_listener.stop()
 
 
 @app.websocket("/ws/transcribe")
-async def websocket_endpoint(websocket: WebSocket, language: str = "en", session_id: str = None):
+async def websocket_endpoint(websocket: WebSocket, language: str = "en", session_id: str = None, model: str = "auto",
+                             sample_rate: int = SAMPLE_RATE, channels: int = 1, target_language: str = None,
+                             protocol: int = 1, resume: str = None, last_segment: int = -1):
     await websocket.accept()
+    # Every record logged by this task (and its to_thread calls) carries the session id
+    session_id_var.set(session_id)
     
-    logger.info(f"WebSocket connected. Lang: {language}, Session: {session_id}")
+    logger.info(f"WebSocket connected. Lang: {language}, Session: {session_id}, Model: {model}, "
+                f"Format: {sample_rate} Hz x{channels}, Translate to: {target_language}")
+
+    # Clients send interleaved float32 at their native rate; convert to 16 kHz mono here
+    try:
+        resampler = StreamingResampler(sample_rate, SAMPLE_RATE, channels=channels)
+    except ValueError as e:
+        await websocket.send_json({"error": str(e), "retry": False})
+        await websocket.close(code=1003) # Unsupported data
+        return
+    if protocol not in PROTOCOL_VERSIONS:
+        await websocket.send_json({"error": f"Unsupported protocol {protocol}; use one of {list(PROTOCOL_VERSIONS)}", "retry": False})
+        await websocket.close(code=1008) # Policy violation
+        return
+    # Protocol 2: partials are sent as deltas against the last partial text
+    encoder = PartialEncoder(_protocol_config.snapshot_every, _protocol_config.snapshot_interval) if protocol >= 2 else None
+
+    # A reconnect carrying the resume token continues its parked session. Without the token (wrong or
+    # missing) the connection is refused and the session stays parked for its owner
+    parked = None
+    if session_id and session_id in parking:
+        parked = parking.claim(session_id, resume)
+        if parked is None:
+            logger.warning(f"Session {session_id} is parked; refusing a connection without its resume token")
+            await websocket.send_json({"error": "Session is parked; reconnect with its resume token", "retry": False})
+            await websocket.close(code=1008) # Policy violation
+            return
+    resumable = _resume_config.enabled and bool(session_id)
+    resume_token = parked.token if parked is not None else new_resume_token()
+    replay = parked.replay if parked is not None else ReplayLog(_resume_config.replay_size)
+
+    # language=auto: identify the spoken language from the first seconds of speech, then bind models
+    detector = None
+    if parked is not None:
+        language, detector = parked.language, parked.detector
+    elif language == "auto" and language_identifier is not None:
+        detector = LanguageDetector(language_identifier, _language_id_config.detect_seconds,
+                                    _language_id_config.recheck_seconds, _language_id_config.confirmations)
+    elif not manager.supports_language(language):
+        logger.warning(f"No model serves language '{language}'; using {_language_id_config.default_language}")
+        language = _language_id_config.default_language
+
+    model_name = service = translator = rechunker = None
+    if parked is not None:
+        # Still holding its admission slot and streams; only the socket is new
+        memory.unregister(("parked", session_id))
+        model_name, service, rechunker = parked.model_name, parked.service, parked.rechunker
+        if parked.translations:
+            # Finals still translating when the socket dropped are replayed with the rest
+            await asyncio.wait(parked.translations)
+        if model_name is not None:
+            hello, translator = session_hello(model_name, model, language, target_language, protocol)
+            broadcast.set_meta(session_id, {"model": model_name, "language": language})
+        else:
+            hello = {"requested_model": model, "language": None, "detecting_language": True, "protocol": protocol}
+        hello.update({"resumed": True, "resume_token": resume_token, "segments": parked.segment_index})
+        await websocket.send_json(hello)
+        missed = replay.since(last_segment)
+        for message in missed:
+            await websocket.send_json(message)
+        logger.info(f"Session {session_id} resumed after {time.monotonic() - parked.parked_at:.1f}s, "
+                    f"{len(missed)} messages replayed")
+    elif detector is None:
+        try:
+            model_name, service = manager.acquire(model, language)
+        except AdmissionRejected as e:
+            logger.warning(f"Session {session_id} rejected: {e}")
+            await websocket.send_json({"error": str(e), "retry": True})
+            await websocket.close(code=1013) # Try Again Later
+            return
+        hello, translator = session_hello(model_name, model, language, target_language, protocol)
+        if resumable:
+            hello["resume_token"] = resume_token
+        await websocket.send_json(hello)
+        broadcast.set_meta(session_id, {"model": model_name, "language": language})
+        rechunker = session_rechunker(service)
+    else:
+        hello = {"requested_model": model, "language": None, "detecting_language": True, "protocol": protocol}
+        if resumable:
+            hello["resume_token"] = resume_token
+        await websocket.send_json(hello)
     
+    park = ended = False
+    stream = segment_start = None
+    recorded_samples = segment_index = 0
+    gate = None
+    recheck = None
+    trace = None
+    translation_tasks = set()
     try:
-        service = manager.get_service(language)
         
-        # Create stream for this connection
-        stream = service.create_stream()
+        # Diagnostic taps are keyed by session; without a session id there is nothing to tap
+        taps = tap_registry.session(session_id) if session_id else None
+
+        # Idle sessions skip the models entirely while the gate is closed
+        gate_config = manager.config.gate
+        gate = SilenceGate(gate_config.threshold, gate_config.hangover, gate_config.preroll) if gate_config.enabled else None
+
+        hibernate_after = manager.config.hibernation.idle_seconds
+        snapshot = SessionSnapshot(session_id, model_name)
+
+        # Create stream for this connection (language=auto: once the language is known)
+        pool = stream = None
+        if service is not None:
+            pool, stream = open_stream(model_name, language, service, taps, gate)
         
+        # Position in the session's recording timeline (16 kHz samples) and where the current segment began
+        recorded_samples = 0
+        segment_start = None
+        # Finals sent so far; translations refer to results by this index
+        segment_index = 0
+        # Client-set stream parameters (configure control frames), re-applied to every new stream
+        stream_params = {}
+        configured_stream = None
+        partial_translation = None
+        if parked is not None:
+            gate, snapshot, pool, stream = parked.gate, parked.snapshot, parked.pool, parked.stream
+            recorded_samples, segment_start, segment_index = parked.recorded_samples, parked.segment_start, parked.segment_index
+            stream_params, configured_stream = parked.stream_params, parked.stream
+
+        # What this session holds in memory; under host memory pressure it spills and finalizes early
+        shed_requested = asyncio.Event()
+
+        def memory_probe():
+            return session_memory(session_id, service, stream, rechunker, detector)
+
+        memory.register(id(websocket), session_id, memory_probe, shed_requested.set)
+
         if session_id:
-             session_buffers[session_id] = bytearray()
+             await wait_for_spill(session_id)
+             memory.unregister(("recording", session_id))
+             if parked is None:
+                 # A fresh connection for a known session keeps its recording (and any spill) and continues the timeline
+                 part_path = recording_part_path(RECORDINGS_DIR, session_id)
+                 snapshot.recording_offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                 recorded_samples = (snapshot.recording_offset + len(session_buffers.setdefault(session_id, bytearray()))) // 2
         
         while True:
-            data = await websocket.receive_bytes()
-            # logger.info(f"Received audio chunk: {len(data)} bytes") # Debug log
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            flush = end_of_stream = False
+            control_error = None
+            if message.get("text") is not None:
+                try:
+                    control = parse_control(message["text"])
+                except ValueError as e:
+                    await websocket.send_json({"control": None, "ok": False, "error": str(e)})
+                    continue
+                if control["type"] == "configure":
+                    # Checked against the live stream; kept for streams created later (rehydrate, language switch)
+                    try:
+                        applied = service.configure(stream, **control["params"]) if stream is not None else control["params"]
+                    except (TypeError, ValueError) as e:
+                        await websocket.send_json({"control": "configure", "ok": False, "error": str(e)})
+                        continue
+                    stream_params.update(control["params"])
+                    configured_stream = stream
+                    logger.info(f"Session {session_id} reconfigured: {applied}")
+                    await websocket.send_json({"control": "configure", "ok": True, "params": applied})
+                    continue
+                # flush / end: finalize whatever is buffered, as if the speaker had paused
+                flush, end_of_stream = True, control["type"] == "end"
+                chunk_start = time.perf_counter_ns()
+                samples = np.zeros(0, dtype=np.float32)
+            else:
+                data = message["bytes"]
+                chunk_start = time.perf_counter_ns()
+                # logger.info(f"Received audio chunk: {len(data)} bytes") # Debug log
             
-            # Convert bytes to numpy float32
-            # WebAudio sends float32 usually, but here likely 16-bit PCM or Float32 depending on client.
-            # Client sends Float32Array.buffer
-            samples = np.frombuffer(data, dtype=np.float32)
+                # Client sends Float32Array frames at the rate/channels declared on connect
+                samples = resampler.process(np.frombuffer(data, dtype=np.float32))
+                if len(samples) == 0:
+                    continue
+
+                if taps is not None:
+                    taps.capture("ingest", samples)
 
+                dropped = 0
+                if gate is not None:
+                    samples, dropped = gate.process(samples)
 
-            if session_id:
-                if session_id not in session_buffers:
-                    session_buffers[session_id] = bytearray()
+                if session_id:
+                    if session_id not in session_buffers:
+                        session_buffers[session_id] = bytearray()
                 
-                # Convert float32 (-1.0 to 1.0) to int16 PCM
-                pcm_data = (samples * 32767).clip(-32768, 32767).astype(np.int16).tobytes()
-                session_buffers[session_id].extend(pcm_data)
+                    # Gated-out silence is recorded as digital silence to keep the timeline aligned
+                    if dropped:
+                        session_buffers[session_id].extend(bytes(2 * dropped))
+                    # Convert float32 (-1.0 to 1.0) to int16 PCM
+                    if len(samples):
+                        session_buffers[session_id].extend(float_to_pcm16(samples))
+
+                if len(samples) and segment_start is None:
+                    segment_start = recorded_samples + dropped
+                recorded_samples += dropped + len(samples)
+
+                # An utterance is traced from its first forwarded chunk until its final is sent
+                if len(samples) and trace is None:
+                    trace = tracer.start(session_id, model_name)
+                    current_trace.set(trace)
+                if trace is not None:
+                    trace.add("ingest", chunk_start, time.perf_counter_ns(), {"samples": len(samples), "dropped": dropped})
+
+            if shed_requested.is_set():
+                # Host memory pressure: the recording so far goes to disk and buffered audio is finalized now
+                shed_requested.clear()
+                if session_id and session_buffers.get(session_id):
+                    part_path = recording_part_path(RECORDINGS_DIR, session_id)
+                    snapshot.recording_offset = await asyncio.to_thread(spill_recording, session_buffers[session_id], part_path)
+                flush = True
+
+            # The gate closed: the tail of the speech the rechunker held back goes to the model now,
+            # not whenever the speaker resumes
+            release = len(samples) == 0 and rechunker is not None and rechunker.pending > 0
+
+            # Silence ends language detection early if speech is being held for it
+            if len(samples) == 0 and not flush and not release and not (detector is not None and detector.pending):
+                if pool is not None and stream is not None and gate.idle_seconds >= hibernate_after:
+                    # Keep only the compact snapshot; the recording so far goes to disk
+                    if session_id and session_id in session_buffers:
+                        part_path = recording_part_path(RECORDINGS_DIR, session_id)
+                        snapshot.recording_offset = await asyncio.to_thread(spill_recording, session_buffers[session_id], part_path)
+                    stream = None
+                    hibernation.hibernate(id(websocket), snapshot)
+                continue
+
+            chunks = [samples] if len(samples) else []
+            if detector is not None and not detector.decided and (len(samples) or detector.pending):
+                # Hold speech until the language is identified, then replay it into the chosen models
+                if len(samples) and not detector.add(samples) and not flush:
+                    continue
+                with span("language_id"):
+                    detected = await asyncio.to_thread(detector.identify)
+                language = detected if detected and manager.supports_language(detected) else _language_id_config.default_language
+                detector.switched(language)
+                logger.info(f"Session {session_id} language identified as {detected}, serving {language}")
+                try:
+                    model_name, service = manager.acquire(model, language)
+                except AdmissionRejected as e:
+                    logger.warning(f"Session {session_id} rejected: {e}")
+                    await websocket.send_json({"error": str(e), "retry": True})
+                    await websocket.close(code=1013) # Try Again Later
+                    return
+                hello, translator = session_hello(model_name, model, language, target_language, protocol)
+                hello["detected_language"] = detected
+                await websocket.send_json(hello)
+                broadcast.set_meta(session_id, {"model": model_name, "language": language})
+                snapshot.model = model_name
+                pool, stream = open_stream(model_name, language, service, taps, gate)
+                rechunker = session_rechunker(service, rechunker)
+                chunks = detector.take_buffered()
+            elif detector is not None and detector.observe(samples) and (recheck is None or recheck.done()):
+                recheck = asyncio.create_task(asyncio.to_thread(detector.recheck, detector.recheck_audio()))
+
+            # Whole native frames of the model; a remainder waits for the next message (at most max_latency)
+            if rechunker is not None:
+                for chunk in chunks:
+                    rechunker.add(chunk)
+                chunks = rechunker.take(flush or release)
+                if not chunks and not flush:
+                    continue
+
+            if stream is None and chunks:
+                start = time.perf_counter()
+                with span("rehydrate"):
+                    stream = await asyncio.to_thread(pool.acquire, taps)
+                hibernation.woke(id(websocket), time.perf_counter() - start)
+                asyncio.create_task(refill_pool(pool))
+                logger.info(f"Session {session_id} rehydrated in {(time.perf_counter() - start) * 1000:.1f}ms")
+            chunk_seconds = sum(len(chunk) for chunk in chunks) / SAMPLE_RATE
+            snapshot.audio_seconds += chunk_seconds
             
             # logger.debug(f"Received {len(samples)} samples") 
             
+            if stream_params and stream is not None and stream is not configured_stream:
+                try:
+                    service.configure(stream, **stream_params)
+                except (TypeError, ValueError) as e:
+                    logger.warning(f"Session {session_id} parameters {stream_params} not applicable to {model_name}: {e}")
+                configured_stream = stream
+
             if service:
                 try:
                     # Pass the persistent stream if streaming mode
         
                     # Run blocking processing in a separate thread to keep the event loop responsive
                     # This is critical for heavy ML/transcription tasks (like MLX Whisper download or inference)
-                    results = await asyncio.to_thread(service.process_audio, samples, stream=stream)
+                    start = time.perf_counter()
+                    manager.admission.in_flight += 1
+                    try:
+                        results = await asyncio.to_thread(traced_call, "process", time.perf_counter_ns(),
+                                                          process_chunks, service, chunks, stream, flush)
+                    finally:
+                        manager.admission.in_flight -= 1
+                    # Includes thread-pool queueing, which is exactly the latency admission protects.
+                    # A flush decodes a whole utterance over a few leftover samples, so it isn't a per-chunk RTF.
+                    if not flush:
+                        manager.admission.observe(model_name, time.perf_counter() - start, chunk_seconds)
                     for res in results:
                         text = res["text"]
                         is_final = res["is_final"]
-                        logger.info(f"Sending text: {text} (Final: {is_final})")
-                        await websocket.send_json({"text": text, "is_final": is_final})
+                        logger.info(f"Sending text: {text} (Final: {is_final})", extra={"event": "final" if is_final else "partial"})
+                        if is_final:
+                            snapshot.finals += 1
+                            snapshot.last_final_text = text
+                            if session_id and text.strip():
+                                transcripts.append(Segment(session_id, segment_start or 0, recorded_samples, text, model_name, language))
+                            segment_start = None
+                        full = {"text": text, "is_final": is_final}
+                        if is_final:
+                            full["segment"] = segment_index
+                            replay.record(full)
+                        message = encoder.encode(text, is_final, segment_index) if encoder is not None else full
+                        with span("send", is_final=is_final):
+                            await websocket.send_json(message)
+                            # Listeners always get full text: deltas can't survive their drop-to-latest queues
+                            broadcast.publish(session_id, full, is_partial=not is_final)
+
+                        # At most one partial translation in flight; newer partials supersede skipped ones
+                        if translator is not None and text.strip() and (is_final or (
+                                _translation_config.translate_partials and (partial_translation is None or partial_translation.done()))):
+                            task = asyncio.create_task(send_translation(websocket, translator, text, is_final, segment_index, session_id, replay))
+                            translation_tasks.add(task)
+                            task.add_done_callback(translation_tasks.discard)
+                            if not is_final:
+                                partial_translation = task
+                        if is_final:
+                            segment_index += 1
+                        if is_final and trace is not None:
+                            tracer.finish(trace, (time.perf_counter_ns() - chunk_start) / 1e6, text=text)
+                            trace = None
+                            current_trace.set(None)
+
+                    # A confirmed language change takes effect at an utterance boundary
+                    if recheck is not None and recheck.done() and any(res["is_final"] for res in results):
+                        new_language, recheck = recheck.result(), None
+                        if new_language and manager.supports_language(new_language):
+                            try:
+                                new_model, new_service = manager.acquire(model, new_language)
+                            except AdmissionRejected as e:
+                                logger.warning(f"Session {session_id} stays on {language}: {e}")
+                            else:
+                                logger.info(f"Session {session_id} switched language {language} -> {new_language} ({new_model})")
+                                manager.release(model_name)
+                                if new_service is not service:
+                                    pool, stream = open_stream(new_model, new_language, new_service, taps, gate)
+                                model_name, service, language = new_model, new_service, new_language
+                                rechunker = session_rechunker(service, rechunker)
+                                detector.switched(language)
+                                snapshot.model = model_name
+                                hello, translator = session_hello(model_name, model, language, target_language, protocol)
+                                await websocket.send_json(hello)
+                                broadcast.set_meta(session_id, {"model": model_name, "language": language})
                 except Exception as e:
                     logger.error(f"Error processing audio chunk: {e}", exc_info=True)
-                    # We continue the loop, hoping the service recovered
-                    continue
+                    if message.get("text") is None:
+                        # We continue the loop, hoping the service recovered
+                        continue
+                    # A flush / end still gets its answer (and end still closes)
+                    control_error = str(e)
 
                     
                 except WebSocketDisconnect:
@@ -161,9 +1029,22 @@ async def websocket_endpoint(websocket: WebSocket, language: str = "en", session
                     logger.error(f"Error processing audio chunk: {e}", exc_info=True)
                     continue
 
-                    
-    except WebSocketDisconnect:
-        logger.info("Client disconnected")
+            if flush and message.get("text") is not None:
+                ack = {"control": "end" if end_of_stream else "flush", "ok": control_error is None, "segments": segment_index}
+                if control_error is not None:
+                    ack["error"] = control_error
+                await websocket.send_json(ack)
+                if end_of_stream:
+                    logger.info(f"Session {session_id} ended by client")
+                    ended = True
+                    await websocket.close(code=1000)
+                    break
+
+    except WebSocketDisconnect as e:
+        logger.info(f"Client disconnected ({e.code})")
+        # A network drop or backgrounded app parks the session, utterance in progress included; a normal
+        # close or the page going away (1001: tab closed, navigation) ends it
+        park = resumable and e.code not in (1000, 1001)
     except RuntimeError as e:
         if "WebSocket is not connected" in str(e):
              logger.info("WebSocket disconnected cleanly")
@@ -175,6 +1056,72 @@ async def websocket_endpoint(websocket: WebSocket, language: str = "en", session
             await websocket.close()
         except:
             pass
+    finally:
+        if not park and not ended:
+            # However the loop ended, what was said last still reaches the transcript and listeners
+            segment_index = await finalize_detached(session_id, service, stream, rechunker, model_name, language,
+                                                    segment_start, recorded_samples, segment_index)
+        if trace is not None:
+            # Utterance cut off by the disconnect; kept only if sampled
+            tracer.finish(trace, incomplete=True)
+        if recheck is not None:
+            recheck.cancel()
+        hibernation.forget(id(websocket))
+        memory.unregister(id(websocket))
+        if park:
+            # Partial translations are stale by the time the client is back; finals finish into the replay log
+            if partial_translation is not None:
+                partial_translation.cancel()
+            park_session(ParkedSession(
+                session_id, resume_token, model_name, language, service, pool, stream, rechunker, detector, gate,
+                snapshot, recorded_samples, segment_start, segment_index, stream_params, replay,
+                {task for task in translation_tasks if not task.done() and task is not partial_translation},
+            ))
+        else:
+            for task in list(translation_tasks):
+                task.cancel()
+            end_session(session_id, model_name)
+        if gate is not None:
+            logger.info(f"Session {session_id} silence gate: {gate.stats()}")
+        if encoder is not None:
+            logger.info(f"Session {session_id} delta partials: {encoder.seq} messages, {encoder.chars_reused} characters not resent")
+
+
+@app.websocket("/ws/subscribe")
+async def subscribe_endpoint(websocket: WebSocket, session_id: str):
+    """Follow another session's partials, finals and translations as a listener (no audio, no model)."""
+    await websocket.accept()
+    try:
+        subscriber = broadcast.subscribe(session_id)
+    except OverflowError as e:
+        await websocket.send_json({"error": str(e), "retry": True})
+        await websocket.close(code=1013) # Try Again Later
+        return
+    logger.info(f"Listener attached to session {session_id}")
+
+    async def wait_closed():
+        # Listeners don't send anything; receiving only notices them leaving
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    closed = asyncio.create_task(wait_closed())
+    outgoing = None
+    try:
+        while True:
+            outgoing = outgoing or asyncio.create_task(subscriber.get())
+            done, _ = await asyncio.wait({outgoing, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if closed in done:
+                break
+            payload, outgoing = outgoing.result(), None
+            await websocket.send_text(payload)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        closed.cancel()
+        if outgoing is not None:
+            outgoing.cancel()
+        broadcast.unsubscribe(subscriber)
+        logger.info(f"Listener left session {session_id} ({subscriber.dropped} messages dropped)")
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
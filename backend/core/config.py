@@ -7,12 +7,17 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MODEL_DIR = os.path.join(BASE_DIR, "models")
 LOG_DIR = os.path.join(BASE_DIR, "logs")
 RECORDINGS_DIR = os.path.join(BASE_DIR, "recordings")
+TAPS_DIR = os.path.join(BASE_DIR, "taps")
 
 # Ensure directories exist
 os.makedirs(LOG_DIR, exist_ok=True)
 os.makedirs(RECORDINGS_DIR, exist_ok=True)
+os.makedirs(TAPS_DIR, exist_ok=True)
 os.makedirs(MODEL_DIR, exist_ok=True)
 
+# Transcript index (final segments of every session, full-text searchable)
+TRANSCRIPT_DB = os.path.join(RECORDINGS_DIR, "transcripts.sqlite3")
+
 # Logging
 LOG_LEVEL = "INFO"
 LOG_FILE = os.path.join(LOG_DIR, "server.log")
@@ -0,0 +1,160 @@
+import contextvars
+import json
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+# Session id of the code currently running. Set once per websocket task;
+# asyncio.to_thread copies the context, so inference threads inherit it.
+session_id_var = contextvars.ContextVar("session_id", default=None)
+
+# High-frequency events that are sampled per session. Anything at WARNING or
+# above, and any event not listed here (finals included), is always kept.
+SAMPLED_EVENTS = frozenset({"partial", "buffer_stats"})
+
+PLAIN_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# LogRecord attributes that aren't user-supplied `extra` fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "session_id", "event", "suppressed"}
+
+
+class SessionContextFilter(logging.Filter):
+    """Stamp records with the current session id (runs in the emitting thread)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "session_id"):
+            record.session_id = session_id_var.get()
+        return True
+
+
+class SessionRateLimiter(logging.Filter):
+    """
+    Token bucket per (session, event) for SAMPLED_EVENTS: `rate` records per
+    second with bursts of `burst`. The next record that gets through carries
+    the number suppressed since the previous one, so totals stay visible.
+    """
+
+    def __init__(self, rate: float = 2.0, burst: int = 5, max_sessions: int = 10000):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.max_sessions = max_sessions
+        self._buckets = OrderedDict()  # (session_id, event) -> [tokens, last_time, suppressed]
+        self._lock = threading.Lock()
+        self.suppressed_total = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        if event not in SAMPLED_EVENTS or record.levelno >= logging.WARNING:
+            return True
+
+        key = (getattr(record, "session_id", None), event)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.burst), now, 0]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_sessions:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                self.suppressed_total += 1
+                return False
+            bucket[0] -= 1.0
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+    def forget(self, session_id):
+        """Drop a finished session's buckets."""
+        with self._lock:
+            for event in SAMPLED_EVENTS:
+                self._buckets.pop((session_id, event), None)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, session_id, event, plus any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "session_id": getattr(record, "session_id", None),
+        }
+        for key in ("event", "suppressed"):
+            if hasattr(record, key):
+                entry[key] = getattr(record, key)
+        for key, value in vars(record).items():
+            if key not in _RESERVED and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller: when the queue is full the record is counted and dropped."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Keep the record's attributes (session_id, extra fields) for the JSON formatter;
+        # only resolve the message and traceback here, where args are still valid.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(logger: logging.Logger, log_file: str, level: str = "INFO", json_file: bool = True,
+                  partial_rate: float = 2.0, partial_burst: int = 5, queue_size: int = 10000):
+    """
+    Route `logger` through a bounded queue to a background QueueListener that
+    writes the rotating file (JSON lines) and the console (plain text).
+    Returns (listener, rate_limiter); stop the listener on shutdown to flush.
+    """
+    log_queue = queue.Queue(maxsize=queue_size)
+    handler = DroppingQueueHandler(log_queue)
+    rate_limiter = SessionRateLimiter(partial_rate, partial_burst)
+    # Filters on the queue handler run in the caller's thread, where the context is right
+    handler.addFilter(SessionContextFilter())
+    handler.addFilter(rate_limiter)
+
+    # File handler with rotation (1 week retention)
+    file_handler = TimedRotatingFileHandler(filename=log_file, when="midnight", interval=1, backupCount=7, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter() if json_file else logging.Formatter(PLAIN_FORMAT))
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(PLAIN_FORMAT))
+
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+
+    logger.setLevel(level)
+    for old in list(logger.handlers):
+        logger.removeHandler(old)
+    logger.addHandler(handler)
+    return listener, rate_limiter
@@ -0,0 +1,118 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+# Pipeline stages, keyed by the qualified name of the function that runs them.
+# A sample is tagged with the innermost stage on its stack (beautify inside
+# punctuation counts as beautify); samples with none are tagged "other".
+STAGE_FUNCTIONS = {
+    "HybridStream.accept_waveform": "hybrid_stream",
+    "HybridStream._punctuate": "punctuation",
+    "beautify_text": "beautify",
+    "IncrementalBeautifier.process": "beautify",
+    "TextPipeline.process": "beautify",
+    "TextPipeline.process_batch": "beautify",
+    "MlxWhisperStream._transcribe": "final_transcribe",
+    "OfflineFinalPassStream._transcribe": "final_transcribe",
+    "MoonshineStream.accept_waveform": "moonshine_stream",
+    "WebSocket.send_json": "send",
+}
+
+OTHER_STAGE = "other"
+
+# asyncio_0, asyncio_1, ... fold into one "asyncio" root so worker threads merge in the flamegraph
+_THREAD_SUFFIX = re.compile(r"[_-]\d+$")
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of every thread (event loop and inference workers)
+    with sys._current_frames() from a background thread. Nothing runs between
+    profiles, and only one profile can run at a time.
+
+    Output is collapsed stacks ("stage;thread;outer;...;leaf count"), the input
+    format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float = 0.01, max_seconds: float = 60.0):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self._labels = {}  # code object -> frame label
+        self._stages = {}  # code object -> stage or None
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, seconds: float, interval: float = None) -> dict:
+        """Sample all threads for `seconds` (blocking). Raises ProfilerBusy if a profile is already running."""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            return self._sample(min(seconds, self.max_seconds), interval or self.interval)
+        finally:
+            self._lock.release()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+            self._labels[code] = label
+            self._stages[code] = STAGE_FUNCTIONS.get(name)
+        return label
+
+    def _sample(self, seconds: float, interval: float) -> dict:
+        me = threading.get_ident()
+        stacks = Counter()  # (thread root, code objects outer -> leaf) -> samples
+        samples = 0
+        sampler_seconds = 0.0
+        start = time.perf_counter()
+        deadline = start + seconds
+
+        while True:
+            tick = time.perf_counter()
+            if tick >= deadline:
+                break
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                codes.reverse()
+                root = _THREAD_SUFFIX.sub("", names.get(ident, str(ident)))
+                stacks[(root, tuple(codes))] += 1
+            samples += 1
+            sampler_seconds += time.perf_counter() - tick
+            time.sleep(max(0.0, interval - (time.perf_counter() - tick)))
+
+        stages = Counter()
+        lines = []
+        for (root, codes), count in stacks.items():
+            labels = [self._label(code) for code in codes]
+            stage = next((self._stages[code] for code in reversed(codes) if self._stages[code]), OTHER_STAGE)
+            stages[stage] += count
+            lines.append(f"{stage};{root};{';'.join(labels)} {count}")
+        lines.sort()
+
+        wall = time.perf_counter() - start
+        return {
+            "seconds": round(wall, 3),
+            "interval_ms": interval * 1000,
+            "samples": samples,
+            # Share of wall time spent taking samples (holds the GIL)
+            "overhead": round(sampler_seconds / wall, 4) if wall else 0.0,
+            "stages": dict(stages.most_common()),
+            "collapsed": "\n".join(lines) + ("\n" if lines else ""),
+        }
@@ -0,0 +1,91 @@
+import json
+import time
+
+# ?protocol= values /ws/transcribe accepts: 1 = full partial text, 2 = delta-encoded partials
+PROTOCOL_VERSIONS = (1, 2)
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    """Length of the longest common prefix; binary search over slice comparisons, which run in C."""
+    lo, hi = 0, min(len(a), len(b))
+    if a[:hi] == b[:hi]:
+        return hi
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def utf16_length(text: str) -> int:
+    # Offsets index JavaScript strings, which count UTF-16 code units
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le")) // 2
+
+
+class PartialEncoder:
+    """
+    Result messages of one protocol 2 session.
+
+    A partial only carries what changed since the last text sent:
+    {"seq", "offset", "suffix", "is_final": false}, meaning the client keeps the
+    first `offset` UTF-16 units of its partial and appends `suffix`. Every
+    snapshot_every partials (or snapshot_interval seconds) the full partial is
+    sent instead ({"seq", "text", "snapshot": true}). Finals are always full
+    text and carry their segment id. `seq` counts every message, so a client
+    that sees a gap ignores deltas until the next snapshot or final.
+    """
+
+    def __init__(self, snapshot_every: int = 20, snapshot_interval: float = 2.0):
+        self.snapshot_every = snapshot_every
+        self.snapshot_interval = snapshot_interval
+        self.seq = 0
+        self.last_text = ""
+        self._since_snapshot = 0
+        self._snapshot_at = time.monotonic()
+        self.chars_reused = 0  # Partial characters the client kept instead of receiving again
+
+    def encode(self, text: str, is_final: bool, segment: int = None) -> dict:
+        self.seq += 1
+        if is_final:
+            self.last_text = ""
+            self._since_snapshot = 0
+            self._snapshot_at = time.monotonic()
+            return {"seq": self.seq, "text": text, "is_final": True, "segment": segment}
+
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every or time.monotonic() - self._snapshot_at >= self.snapshot_interval:
+            self.last_text = text
+            self._since_snapshot = 0
+            self._snapshot_at = time.monotonic()
+            return {"seq": self.seq, "text": text, "is_final": False, "snapshot": True}
+
+        keep = common_prefix_length(self.last_text, text)
+        self.last_text = text
+        self.chars_reused += keep
+        return {"seq": self.seq, "offset": utf16_length(text[:keep]), "suffix": text[keep:], "is_final": False}
+
+
+# JSON text frames a /ws/transcribe client may send between audio frames
+CONTROL_TYPES = ("flush", "end", "configure")
+
+
+def parse_control(text: str) -> dict:
+    """
+    Validate a control frame: {"type": "flush"} finalizes buffered audio now,
+    {"type": "end"} does the same and then closes the session, and
+    {"type": "configure", "params": {...}} changes stream parameters (e.g.
+    interim_interval). Raises ValueError for anything else.
+    """
+    try:
+        control = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Control frame is not JSON: {e}")
+    if not isinstance(control, dict) or control.get("type") not in CONTROL_TYPES:
+        raise ValueError(f"Control frame needs a type, one of {list(CONTROL_TYPES)}")
+    if control["type"] == "configure" and not isinstance(control.get("params"), dict):
+        raise ValueError("configure needs a params object")
+    return control
@@ -0,0 +1,273 @@
+import dataclasses
+import json
+import logging
+import os
+import typing
+from dataclasses import dataclass, field
+from typing import Optional
+
+try:
+    from backend.core.config import BASE_DIR
+except ImportError:
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+logger = logging.getLogger("server")
+
+# Performance knobs for every service, loaded from a JSON file and/or environment.
+#
+# File: $RUNTIME_CONFIG, or backend/runtime_config.json if it exists. Only the
+# keys to override need to be present, e.g. {"moonshine": {"num_threads": 4}}.
+# Environment: RT_<SECTION>__<FIELD>, e.g. RT_MOONSHINE__NUM_THREADS=4 (wins over the file).
+DEFAULT_CONFIG_FILE = os.path.join(BASE_DIR, "runtime_config.json")
+ENV_PREFIX = "RT_"
+
+
+@dataclass
+class ZipformerConfig:
+    num_threads: int = 1
+
+
+@dataclass
+class PunctuationConfig:
+    num_threads: int = 1
+
+
+@dataclass
+class MlxWhisperConfig:
+    max_buffer_duration: float = 10.0  # Force a final after this much audio
+    silence_trigger: float = 0.6       # Seconds of RMS silence after speech that trigger a final
+    speech_threshold: float = 0.01     # RMS above this counts as speech
+    lookback_seconds: float = 1.0      # Tail of the previous chunk prepended to the next final
+
+
+@dataclass
+class MoonshineConfig:
+    num_threads: int = 2
+    max_buffer_duration: float = 7.0   # Fail-safe final trigger
+    interim_interval: float = 0.5      # Minimum (starting) audio seconds between interim decodes
+    max_interim_interval: float = 2.0  # Back-off ceiling under load
+    batch_decoding: bool = False       # One scheduler thread for all sessions; only pays off where decode_streams batches
+    max_batch_size: int = 8
+    batch_max_wait: float = 0.01
+
+
+@dataclass
+class ParakeetConfig:
+    gain: float = 0.1
+    max_segment_duration: float = 15.0
+    vad_min_silence: float = 0.35
+
+
+@dataclass
+class LanguageIdConfig:
+    enabled: bool = True               # language=auto runs spoken language ID (models/lid/sherpa-onnx-whisper-tiny)
+    detect_seconds: float = 3.0        # Speech buffered (and later replayed) before deciding
+    recheck_seconds: float = 0.0       # Re-identify this often during the session; 0 = decide once
+    confirmations: int = 2             # Consecutive rechecks that must agree before switching models
+    num_threads: int = 1
+    default_language: str = "en"       # Used when identification is unavailable or finds no served language
+
+
+@dataclass
+class TranslationConfig:
+    enabled: bool = True               # Needs ctranslate2 + sentencepiece and models/translation/opus-mt-<src>-<tgt>
+    translate_partials: bool = True    # Also translate partials (stable prefix reused); finals are always translated
+    compute_type: str = "int8"
+    num_threads: int = 2
+    max_batch_size: int = 16           # Sentences per model call, across sessions
+    max_wait: float = 0.02             # Seconds a batch waits for other sessions
+    cache_size: int = 20000            # Translated sentences kept (LRU)
+
+
+@dataclass
+class ProtocolConfig:
+    snapshot_every: int = 20           # Protocol 2: full partial after this many deltas
+    snapshot_interval: float = 2.0     # ... or after this many seconds
+
+
+@dataclass
+class BroadcastConfig:
+    max_queue: int = 32                # Messages buffered per listener; partials dropped first when full
+    max_subscribers: int = 1000        # Listeners per session
+
+
+@dataclass
+class GateConfig:
+    enabled: bool = True
+    threshold: float = 0.005           # RMS of a 20 ms frame that opens the gate
+    hangover: float = 1.0              # Seconds kept open after speech; must exceed model end-of-speech triggers
+    preroll: float = 0.5               # Seconds of gated audio replayed when the gate reopens
+
+
+@dataclass
+class RechunkConfig:
+    enabled: bool = True
+    chunk_seconds: float = 0.25        # Target block; rounded to whole native frames of the model (at least one)
+    max_latency: float = 0.35          # Held-back audio released early past this; keep above one Zipformer chunk (0.32 s)
+
+
+@dataclass
+class HibernationConfig:
+    enabled: bool = True
+    idle_seconds: float = 30.0         # Gated silence after which a session releases its streams (needs the gate)
+    pool_size: int = 2                 # Warm streams kept per model for waking sessions
+
+
+@dataclass
+class RecordingsConfig:
+    format: str = "flac"               # flac (lossless) or opus
+    workers: int = 1                   # Transcoding processes
+    max_archive_mb: Optional[float] = 2048.0  # Compressed recordings kept, oldest deleted first; None = unbounded
+
+
+@dataclass
+class EnrichmentConfig:
+    enabled: bool = True               # Re-transcribe and diarize saved recordings in the background
+    engine: str = "auto"               # whisper (MLX), moonshine, or auto (whisper when available)
+    diarization: bool = True           # Needs the pyannote segmentation and speaker embedding models
+    num_speakers: int = -1             # -1 = estimate from cluster_threshold
+    cluster_threshold: float = 0.5
+    num_threads: int = 2
+    max_live_queue: int = 2            # Pause while more live chunks than this are waiting for worker threads
+    max_live_rtf: float = 0.5          # ... or live sessions run slower than this real-time factor
+    resume_after: float = 2.0          # Seconds of low live load before a paused job continues
+
+
+@dataclass
+class LoggingConfig:
+    level: str = "INFO"
+    json_file: bool = True             # JSON lines in logs/server.log (console stays plain text)
+    partial_rate: float = 2.0          # Partial/buffer-stat records per second per session
+    partial_burst: int = 5
+    queue_size: int = 10000            # Records beyond this are dropped rather than blocking callers
+
+
+@dataclass
+class TracingConfig:
+    enabled: bool = True               # Record per-utterance spans (cheap; retention is sampled)
+    sample_rate: float = 0.05          # Fraction of utterances kept in the ring
+    slow_final_ms: Optional[float] = 1500.0  # Utterances whose final took longer are always kept; None = off
+    capacity: int = 500                # Utterance traces held in memory
+    max_spans: int = 4000              # Per utterance; further spans are counted and dropped
+
+
+@dataclass
+class ProfilerConfig:
+    enabled: bool = True               # Allow /api/admin/profile
+    interval_ms: float = 10.0          # Default sampling interval
+    max_seconds: float = 60.0          # Longest profile a request may ask for
+
+
+@dataclass
+class ResumeConfig:
+    enabled: bool = True
+    ttl: float = 30.0                  # Seconds a dropped session keeps its streams, waiting for the client to reconnect
+    replay_size: int = 50              # Finals (and their translations) kept to resend to a resumed client
+    sweep_interval: float = 1.0        # Seconds between checks for expired parked sessions
+
+
+@dataclass
+class MemoryConfig:
+    watermark_mb: Optional[float] = None  # Process RSS that refuses new sessions and sheds buffers; None = watermark_fraction of RAM
+    watermark_fraction: float = 0.8
+    resume_fraction: float = 0.9       # Shed, and keep refusing, until RSS is below this fraction of the watermark
+    check_interval: float = 2.0        # Seconds between RSS checks
+
+
+@dataclass
+class AdmissionConfig:
+    capacity: Optional[float] = None   # Host capacity units; None = CPU count
+    max_rtf: float = 0.8
+    rtf_window: float = 10.0           # RTF = processing / audio over the chunks of the last this many seconds
+    rtf_min_audio: float = 2.0         # ... once the window holds at least this much audio
+
+
+@dataclass
+class RuntimeConfig:
+    zipformer: ZipformerConfig = field(default_factory=ZipformerConfig)
+    punctuation: PunctuationConfig = field(default_factory=PunctuationConfig)
+    mlx_whisper: MlxWhisperConfig = field(default_factory=MlxWhisperConfig)
+    moonshine: MoonshineConfig = field(default_factory=MoonshineConfig)
+    parakeet: ParakeetConfig = field(default_factory=ParakeetConfig)
+    language_id: LanguageIdConfig = field(default_factory=LanguageIdConfig)
+    translation: TranslationConfig = field(default_factory=TranslationConfig)
+    protocol: ProtocolConfig = field(default_factory=ProtocolConfig)
+    broadcast: BroadcastConfig = field(default_factory=BroadcastConfig)
+    gate: GateConfig = field(default_factory=GateConfig)
+    rechunk: RechunkConfig = field(default_factory=RechunkConfig)
+    hibernation: HibernationConfig = field(default_factory=HibernationConfig)
+    recordings: RecordingsConfig = field(default_factory=RecordingsConfig)
+    enrichment: EnrichmentConfig = field(default_factory=EnrichmentConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
+    tracing: TracingConfig = field(default_factory=TracingConfig)
+    profiler: ProfilerConfig = field(default_factory=ProfilerConfig)
+    resume: ResumeConfig = field(default_factory=ResumeConfig)
+    memory: MemoryConfig = field(default_factory=MemoryConfig)
+    admission: AdmissionConfig = field(default_factory=AdmissionConfig)
+
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+
+
+def _coerce(value, annotation):
+    # Resolve Optional[X] to X; None stays None
+    if typing.get_origin(annotation) is typing.Union:
+        if value is None or value == "" or (isinstance(value, str) and value.lower() == "none"):
+            return None
+        annotation = next(a for a in typing.get_args(annotation) if a is not type(None))
+    if annotation is bool and isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return annotation(value)
+
+
+def _apply(section, values: dict, source: str):
+    hints = typing.get_type_hints(type(section))
+    for key, value in values.items():
+        if key not in hints:
+            raise ValueError(f"Unknown runtime config key '{type(section).__name__}.{key}' in {source}")
+        setattr(section, key, _coerce(value, hints[key]))
+
+
+def load_runtime_config(path: str = None, environ=None) -> RuntimeConfig:
+    """Defaults, then the JSON file (if any), then RT_* environment overrides."""
+    environ = os.environ if environ is None else environ
+    config = RuntimeConfig()
+    sections = {f.name: getattr(config, f.name) for f in dataclasses.fields(config)}
+
+    path = path or environ.get("RUNTIME_CONFIG") or (DEFAULT_CONFIG_FILE if os.path.exists(DEFAULT_CONFIG_FILE) else None)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for name, values in data.items():
+            if name not in sections:
+                raise ValueError(f"Unknown runtime config section '{name}' in {path}")
+            _apply(sections[name], values, path)
+        logger.info(f"Loaded runtime config from {path}")
+
+    for key, value in environ.items():
+        if not key.startswith(ENV_PREFIX) or "__" not in key:
+            continue
+        name, field_name = key[len(ENV_PREFIX):].lower().split("__", 1)
+        if name not in sections:
+            # The environment is shared with other software; an RT_ variable need not be ours
+            logger.warning(f"Ignoring environment variable {key}: no runtime config section '{name}'")
+            continue
+        _apply(sections[name], {field_name: value}, key)
+
+    return config
+
+
+_runtime_config = None
+
+
+def get_runtime_config() -> RuntimeConfig:
+    """Process-wide config, loaded on first use."""
+    global _runtime_config
+    if _runtime_config is None:
+        _runtime_config = load_runtime_config()
+    return _runtime_config
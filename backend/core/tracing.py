@@ -0,0 +1,202 @@
+import contextvars
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Trace of the utterance currently being processed. Set by the websocket task;
+# asyncio.to_thread copies the context, so spans recorded in inference threads
+# land in the same trace.
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class UtteranceTrace:
+    """Spans of one utterance: from the first forwarded chunk until its final is sent."""
+
+    def __init__(self, utterance_id: int, session_id: str, model: str, sampled: bool, max_spans: int):
+        self.utterance_id = utterance_id
+        self.session_id = session_id
+        self.model = model
+        self.sampled = sampled
+        self.max_spans = max_spans
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+        self.spans = []  # (name, start_ns, end_ns or None for instants, thread_id, args)
+        self.threads = {}  # thread_id -> thread name
+        self.dropped_spans = 0
+        self.meta = {}
+
+    def add(self, name: str, start_ns: int, end_ns: int = None, args: dict = None):
+        if len(self.spans) >= self.max_spans:
+            self.dropped_spans += 1
+            return
+        thread = threading.current_thread()
+        self.threads.setdefault(thread.ident, thread.name)
+        self.spans.append((name, start_ns, end_ns, thread.ident, args))
+
+    def summary(self) -> dict:
+        return {
+            "utterance_id": self.utterance_id,
+            "session_id": self.session_id,
+            "model": self.model,
+            "duration_ms": None if self.end_ns is None else round((self.end_ns - self.start_ns) / 1e6, 1),
+            "spans": len(self.spans),
+            "dropped_spans": self.dropped_spans,
+            **self.meta,
+        }
+
+
+@contextmanager
+def span(name: str, **args):
+    """Time the enclosed block as `name` in the current utterance trace (no-op when untraced)."""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        trace.add(name, start, time.perf_counter_ns(), args or None)
+
+
+def instant(name: str, **args):
+    """Mark a point event (e.g. a VAD trigger) in the current utterance trace."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(name, time.perf_counter_ns(), None, args or None)
+
+
+def traced_call(name: str, submitted_ns: int, fn, *args, **kwargs):
+    """
+    Run fn in a span called `name`, first recording the time since submitted_ns
+    as "queue". Meant to be handed to asyncio.to_thread so thread-pool wait shows up.
+    """
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add("queue", submitted_ns, time.perf_counter_ns())
+    with span(name):
+        return fn(*args, **kwargs)
+
+
+class Tracer:
+    """
+    Starts utterance traces and keeps finished ones in a bounded ring.
+
+    Every utterance is recorded while it runs (a few tuples per chunk); at the
+    end it is kept if it was sampled (`sample_rate`) or its final was slow
+    (`slow_final_ms`), so the slow ones users complain about are never sampled away.
+    """
+
+    def __init__(self, enabled: bool = True, sample_rate: float = 0.05, slow_final_ms: float = 1500.0,
+                 capacity: int = 500, max_spans: int = 4000):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_final_ms = slow_final_ms
+        self.max_spans = max_spans
+        self._ring = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.started = 0
+        self.retained = 0
+        self.retained_slow = 0
+
+    def start(self, session_id: str, model: str):
+        """New UtteranceTrace, or None when tracing is disabled."""
+        if not self.enabled:
+            return None
+        self.started += 1
+        sampled = random.random() < self.sample_rate
+        return UtteranceTrace(next(self._ids), session_id, model, sampled, self.max_spans)
+
+    def finish(self, trace: UtteranceTrace, final_latency_ms: float = None, **meta) -> bool:
+        """Close the trace and retain it if sampled or slow. Returns whether it was kept."""
+        trace.end_ns = time.perf_counter_ns()
+        trace.meta.update(meta)
+        if final_latency_ms is not None:
+            trace.meta["final_latency_ms"] = round(final_latency_ms, 1)
+        slow = final_latency_ms is not None and self.slow_final_ms is not None and final_latency_ms >= self.slow_final_ms
+        if not (trace.sampled or slow):
+            return False
+        with self._lock:
+            self._ring.append(trace)
+            self.retained += 1
+            if slow and not trace.sampled:
+                self.retained_slow += 1
+        return True
+
+    def session_traces(self, session_id: str) -> list:
+        with self._lock:
+            return [t for t in self._ring if t.session_id == session_id]
+
+    def export(self, session_id: str):
+        """Chrome trace-event JSON for a session's retained utterances, or None if there are none."""
+        traces = self.session_traces(session_id)
+        if not traces:
+            return None
+        return to_chrome_trace(traces)
+
+    def stats(self) -> dict:
+        with self._lock:
+            recent = [t.summary() for t in list(self._ring)[-20:]]
+            held = len(self._ring)
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "slow_final_ms": self.slow_final_ms,
+            "started": self.started,
+            "retained": self.retained,
+            "retained_slow": self.retained_slow,
+            "held": held,
+            "capacity": self._ring.maxlen,
+            "recent": recent,
+        }
+
+
+# Utterance bars get their own track above the thread tracks
+UTTERANCE_TID = 0
+
+
+def to_chrome_trace(traces: list) -> dict:
+    """
+    Trace-event format (loadable in Perfetto / chrome://tracing): one process
+    per session, one track per thread, plus an "utterances" track with a bar
+    per utterance whose args carry its summary.
+    """
+    events = []
+    pids = {}
+    named_threads = set()
+    for trace in traces:
+        if trace.session_id not in pids:
+            pid = len(pids) + 1
+            pids[trace.session_id] = pid
+            events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": UTTERANCE_TID,
+                           "args": {"name": f"session {trace.session_id}"}})
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": UTTERANCE_TID,
+                           "args": {"name": "utterances"}})
+        pid = pids[trace.session_id]
+
+        end_ns = trace.end_ns if trace.end_ns is not None else max(
+            [s[2] or s[1] for s in trace.spans] or [trace.start_ns])
+        events.append({
+            "name": f"utterance {trace.utterance_id}", "cat": "utterance", "ph": "X",
+            "ts": trace.start_ns / 1000, "dur": (end_ns - trace.start_ns) / 1000,
+            "pid": pid, "tid": UTTERANCE_TID, "args": trace.summary(),
+        })
+
+        for tid, name in trace.threads.items():
+            if (pid, tid) not in named_threads:
+                named_threads.add((pid, tid))
+                events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+
+        for name, start_ns, span_end_ns, tid, args in trace.spans:
+            event = {"name": name, "cat": "pipeline", "ts": start_ns / 1000, "pid": pid, "tid": tid,
+                     "args": dict(args or {}, utterance_id=trace.utterance_id)}
+            if span_end_ns is None:
+                event.update(ph="i", s="t")
+            else:
+                event.update(ph="X", dur=(span_end_ns - start_ns) / 1000)
+            events.append(event)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
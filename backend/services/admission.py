@@ -0,0 +1,162 @@
+import logging
+import os
+import time
+from collections import deque
+
+logger = logging.getLogger("server")
+
+
+class AdmissionRejected(Exception):
+    """Raised when no model can take another session on this host."""
+
+
+class ModelSpec:
+    def __init__(self, name: str, cost: float, max_sessions: int = None):
+        self.name = name
+        self.cost = cost                  # Per-session cost in host capacity units (~CPU cores)
+        self.max_sessions = max_sessions  # Hard per-model limit (None = only bounded by host capacity)
+        self.active = 0
+        # Recent chunks as (clock seconds, processing seconds, audio seconds), with running sums
+        self.window = deque()
+        self.processing = 0.0
+        self.audio = 0.0
+
+    def forget_before(self, cutoff: float):
+        while self.window and self.window[0][0] < cutoff:
+            _, processing, audio = self.window.popleft()
+            self.processing -= processing
+            self.audio -= audio
+        if not self.window:
+            self.processing = self.audio = 0.0
+
+
+class AdmissionController:
+    """
+    Host-level session admission.
+
+    Every model service declares a per-session cost (SESSION_COST) and optionally
+    a MAX_SESSIONS limit. A session is admitted to the requested model if that
+    fits in the remaining host capacity; otherwise it is downgraded to the next
+    cheaper model that fits, and rejected if none does. Independently of the
+    static budget, new sessions are refused while the observed real-time factor
+    of running sessions is above max_rtf, so existing sessions keep their latency,
+    and while `memory_pressure()` (if set) reports the host memory watermark.
+
+    A model's RTF is total processing time over total audio for the chunks of
+    the last rtf_window seconds. A single slow call (a Whisper final decoding a
+    whole utterance in one chunk) is averaged with the audio it covered instead
+    of dominating the estimate, and once sessions go quiet (silence is gated,
+    parked sessions send nothing) old chunks age out rather than keep refusing
+    sessions. Below rtf_min_audio seconds of audio there is no estimate.
+    """
+
+    def __init__(self, capacity: float = None, max_rtf: float = 0.8, preference: list = None,
+                 rtf_window: float = 10.0, rtf_min_audio: float = 2.0, clock=time.monotonic):
+        if capacity is None:
+            capacity = float(os.cpu_count() or 1)
+        self.capacity = capacity
+        self.max_rtf = max_rtf
+        self.rtf_window = rtf_window
+        self.rtf_min_audio = rtf_min_audio
+        self._clock = clock
+        self.models = {}
+        # Order in which "auto" sessions try models; defaults to most expensive first
+        self.preference = preference
+        self.rejected = 0
+        self.downgraded = 0
+        # Chunks handed to worker threads and not yet processed, across sessions (live queue depth)
+        self.in_flight = 0
+        # Optional callable; True while the host is above its memory watermark
+        self.memory_pressure = None
+
+    def register(self, name: str, cost: float, max_sessions: int = None):
+        self.models[name] = ModelSpec(name, cost, max_sessions)
+
+    @property
+    def load(self) -> float:
+        return sum(m.cost * m.active for m in self.models.values())
+
+    def model_rtf(self, spec: ModelSpec, now: float = None) -> float:
+        """Processing over audio seconds across the model's chunks in the last rtf_window seconds."""
+        spec.forget_before((self._clock() if now is None else now) - self.rtf_window)
+        if spec.audio < self.rtf_min_audio:
+            return 0.0
+        return spec.processing / spec.audio
+
+    def host_rtf(self) -> float:
+        # Worst real-time factor among models that currently have sessions
+        now = self._clock()
+        return max((self.model_rtf(m, now) for m in self.models.values() if m.active), default=0.0)
+
+    def candidates(self, requested: str) -> list:
+        """Models to try in order: the request first, then cheaper ones (most capable first)."""
+        by_cost = sorted(self.models.values(), key=lambda m: m.cost, reverse=True)
+        if requested == "auto" or requested not in self.models:
+            if self.preference:
+                return [name for name in self.preference if name in self.models]
+            return [m.name for m in by_cost]
+        cost = self.models[requested].cost
+        return [requested] + [m.name for m in by_cost if m.cost < cost]
+
+    def fits(self, name: str) -> bool:
+        spec = self.models[name]
+        if spec.max_sessions is not None and spec.active >= spec.max_sessions:
+            return False
+        return self.load + spec.cost <= self.capacity
+
+    def admit(self, requested: str, available=None) -> str:
+        """
+        Reserve capacity for a new session and return the model it should use.
+        available: optional callable(name) -> bool, to skip models that cannot load on this host.
+        """
+        if self.host_rtf() > self.max_rtf:
+            self.rejected += 1
+            raise AdmissionRejected(f"Host is saturated (RTF {self.host_rtf():.2f} > {self.max_rtf:.2f})")
+        if self.memory_pressure is not None and self.memory_pressure():
+            self.rejected += 1
+            raise AdmissionRejected("Host memory is above its watermark")
+
+        for name in self.candidates(requested):
+            if available is not None and not available(name):
+                continue
+            if self.fits(name):
+                self.models[name].active += 1
+                if requested not in ("auto", name):
+                    self.downgraded += 1
+                    logger.info(f"Admission: downgraded session from {requested} to {name}")
+                return name
+
+        self.rejected += 1
+        raise AdmissionRejected(f"No capacity for model '{requested}' (load {self.load:.1f}/{self.capacity:.1f})")
+
+    def release(self, name: str):
+        spec = self.models.get(name)
+        if spec is not None and spec.active > 0:
+            spec.active -= 1
+            if spec.active == 0:
+                spec.forget_before(float("inf"))
+
+    def observe(self, name: str, processing_seconds: float, audio_seconds: float):
+        """Add the processing time of one call and the audio it consumed to the model's RTF window."""
+        spec = self.models.get(name)
+        if spec is None or audio_seconds <= 0:
+            return
+        now = self._clock()
+        spec.window.append((now, processing_seconds, audio_seconds))
+        spec.processing += processing_seconds
+        spec.audio += audio_seconds
+        spec.forget_before(now - self.rtf_window)
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "load": self.load,
+            "host_rtf": self.host_rtf(),
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "downgraded": self.downgraded,
+            "models": {
+                m.name: {"cost": m.cost, "max_sessions": m.max_sessions, "active": m.active, "rtf": self.model_rtf(m)}
+                for m in self.models.values()
+            },
+        }
@@ -0,0 +1,100 @@
+from collections import deque
+
+import numpy as np
+
+
+class SilenceGate:
+    """
+    Per-session energy gate in front of the recognizers.
+
+    The gate opens as soon as any 20 ms frame of a chunk has RMS above
+    `threshold`, and stays open for `hangover` seconds after the last such
+    frame, which must outlast every model's own end-of-speech trigger
+    (MlxWhisper silence_trigger, Silero min_silence) so finals still fire.
+    While closed, chunks go into a `preroll`-second buffer instead of the
+    models; on reopening the buffer is replayed ahead of the current chunk, so
+    soft onsets aren't clipped.
+
+    process() returns (samples_to_forward, dropped_samples). Every ingested
+    sample is eventually either forwarded or counted as dropped, in order, so
+    callers can keep a time-aligned recording by writing silence for drops.
+    """
+
+    FRAME = 320  # 20 ms at 16 kHz
+
+    def __init__(self, threshold: float = 0.005, hangover: float = 1.0, preroll: float = 0.5,
+                 sample_rate: int = 16000):
+        self.threshold_sq = threshold * threshold
+        self.hangover_samples = int(hangover * sample_rate)
+        self.preroll_samples = int(preroll * sample_rate)
+        self.sample_rate = sample_rate
+
+        self.open = False
+        self._since_speech = self.hangover_samples  # Samples since the last loud frame
+        self._preroll = deque()
+        self._preroll_len = 0
+
+        self.forwarded_samples = 0
+        self.dropped_samples = 0
+
+    def _last_loud_frame_end(self, samples: np.ndarray) -> int:
+        """End offset (samples) of the last frame above threshold, or 0 if none."""
+        n = len(samples) // self.FRAME
+        if n == 0:
+            return len(samples) if np.mean(samples * samples) > self.threshold_sq else 0
+        frames = samples[:n * self.FRAME].reshape(n, self.FRAME)
+        energy = np.einsum("ij,ij->i", frames, frames) / self.FRAME
+        loud = np.flatnonzero(energy > self.threshold_sq)
+        return int(loud[-1] + 1) * self.FRAME if len(loud) else 0
+
+    def process(self, samples: np.ndarray):
+        loud_end = self._last_loud_frame_end(samples)
+        # Forward the chunk if the hangover was still running when it started
+        in_hangover = self._since_speech < self.hangover_samples
+        if loud_end:
+            self._since_speech = len(samples) - loud_end
+        else:
+            self._since_speech += len(samples)
+
+        if loud_end or in_hangover:
+            if not self.open:
+                self.open = True
+                if self._preroll:
+                    samples = np.concatenate((*self._preroll, samples))
+                    self._preroll.clear()
+                    self._preroll_len = 0
+            self.forwarded_samples += len(samples)
+            return samples, 0
+
+        # Closed: hold the chunk as pre-roll, evicting the oldest audio beyond the limit
+        self.open = False
+        self._preroll.append(samples)
+        self._preroll_len += len(samples)
+        dropped = 0
+        while self._preroll_len > self.preroll_samples:
+            excess = self._preroll_len - self.preroll_samples
+            head = self._preroll[0]
+            if len(head) <= excess:
+                self._preroll.popleft()
+                removed = len(head)
+            else:
+                self._preroll[0] = head[excess:]
+                removed = excess
+            self._preroll_len -= removed
+            dropped += removed
+        self.dropped_samples += dropped
+        return samples[:0], dropped
+
+    @property
+    def idle_seconds(self) -> float:
+        """How long the gate has been seeing silence (0 while open)."""
+        return 0.0 if self.open else self._since_speech / self.sample_rate
+
+    def stats(self) -> dict:
+        total = self.forwarded_samples + self.dropped_samples
+        return {
+            "open": self.open,
+            "forwarded_seconds": self.forwarded_samples / self.sample_rate,
+            "dropped_seconds": self.dropped_samples / self.sample_rate,
+            "gated_ratio": self.dropped_samples / total if total else 0.0,
+        }
@@ -0,0 +1,6 @@
+import numpy as np
+
+
+def float_to_pcm16(samples: np.ndarray) -> bytes:
+    """Convert float32 samples (-1.0 to 1.0) to 16-bit PCM bytes, clipping out-of-range values."""
+    return (samples * 32767).clip(-32768, 32767).astype(np.int16).tobytes()
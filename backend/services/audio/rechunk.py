@@ -0,0 +1,75 @@
+import numpy as np
+
+
+class Rechunker:
+    """
+    Per-session regrouping of ingest audio into whole model frames.
+
+    Browser frames (ScriptProcessorNode(4096) at the device rate, ~1365
+    samples after resampling 48 kHz to 16 kHz) rarely line up with what the
+    models consume: a 320 ms Zipformer chunk, a 512-sample Silero window.
+    take() returns blocks of exactly `frame_samples * multiple` samples, the
+    multiple being the whole number of frames nearest to `chunk_seconds` (at
+    least one); the remainder waits for more audio.
+
+    Held-back audio is added latency (audio arrives in real time), so once the
+    remainder reaches `max_latency` seconds it is released early, trimmed to
+    whole frames when at least one fits. take(flush=True) releases everything,
+    for flush / end of stream.
+    """
+
+    def __init__(self, frame_samples: int, chunk_seconds: float = 0.25, max_latency: float = 0.35,
+                 sample_rate: int = 16000):
+        self.chunk_seconds = chunk_seconds
+        self.sample_rate = sample_rate
+        self.max_latency_samples = int(max_latency * sample_rate)
+        self.set_frame(frame_samples)
+
+        self._pending = []
+        self._pending_len = 0
+        self.blocks = 0  # Full blocks emitted
+        self.early = 0   # Releases forced by max_latency or flush
+
+    def set_frame(self, frame_samples: int):
+        """Regroup for another model (e.g. after a language switch); pending audio is kept."""
+        if frame_samples <= 0:
+            raise ValueError("frame_samples must be positive")
+        self.frame_samples = frame_samples
+        self.multiple = max(1, round(self.chunk_seconds * self.sample_rate / frame_samples))
+        self.block_samples = frame_samples * self.multiple
+
+    @property
+    def pending(self) -> int:
+        """Samples held back for the next block."""
+        return self._pending_len
+
+    def add(self, samples: np.ndarray):
+        if len(samples):
+            self._pending.append(samples)
+            self._pending_len += len(samples)
+
+    def take(self, flush: bool = False) -> list:
+        if flush:
+            take = self._pending_len
+        else:
+            take = self._pending_len // self.block_samples * self.block_samples
+            rest = self._pending_len - take
+            if rest >= self.max_latency_samples:
+                whole = rest // self.frame_samples * self.frame_samples
+                take += whole or rest
+        if take == 0:
+            return []
+
+        audio = self._pending[0] if len(self._pending) == 1 else np.concatenate(self._pending)
+        blocks = [audio[i:min(i + self.block_samples, take)] for i in range(0, take, self.block_samples)]
+        full = take // self.block_samples
+        self.blocks += full
+        self.early += len(blocks) - full
+        rest = audio[take:]
+        self._pending = [rest] if len(rest) else []
+        self._pending_len = len(rest)
+        return blocks
+
+    def push(self, samples: np.ndarray, flush: bool = False) -> list:
+        self.add(samples)
+        return self.take(flush)
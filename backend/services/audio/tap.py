@@ -0,0 +1,273 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+try:
+    from backend.core.config import TAPS_DIR
+    from .pcm import float_to_pcm16
+except ImportError:
+    TAPS_DIR = "taps"
+    from pcm import float_to_pcm16
+
+logger = logging.getLogger("server")
+
+# Pipeline points where audio can be captured.
+#   ingest    - client frames after conversion to 16 kHz mono, before any model processing
+#   post_gain - exact samples handed to the streaming model (after any gain/scaling)
+#   pre_final - exact buffer handed to the final-pass transcriber
+TAP_POINTS = ("ingest", "post_gain", "pre_final")
+
+
+class AudioTap:
+    """
+    Bounded in-memory ring of float32 samples for one (session, point).
+
+    capture() only copies into a preallocated ring under a short lock, so it is
+    safe to call from the inference thread. Disk I/O happens in TapWriter.
+    When the writer falls behind, the oldest samples are overwritten and counted
+    in dropped_samples rather than blocking the caller.
+    """
+
+    def __init__(self, path: str, capacity_seconds: float = 30.0, sample_rate: int = 16000):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.capacity = int(capacity_seconds * sample_rate)
+        self._ring = np.zeros(self.capacity, dtype=np.float32)
+        self._lock = threading.Lock()
+
+        # Monotonic sample counters; (write_pos - read_pos) is the pending amount.
+        self._write_pos = 0
+        self._read_pos = 0
+
+        self.captured_samples = 0
+        self.dropped_samples = 0
+        self.written_samples = 0
+        self.last_flush = time.monotonic()
+        self.closed = False
+
+    def capture(self, samples: np.ndarray):
+        n = len(samples)
+        if n == 0 or self.closed:
+            return
+
+        with self._lock:
+            self.captured_samples += n
+            if n > self.capacity:
+                # Larger than the whole ring: keep only the newest part
+                self.dropped_samples += n - self.capacity
+                samples = samples[-self.capacity:]
+                n = self.capacity
+
+            overflow = (self._write_pos - self._read_pos) + n - self.capacity
+            if overflow > 0:
+                self.dropped_samples += overflow
+                self._read_pos += overflow
+
+            start = self._write_pos % self.capacity
+            first = min(n, self.capacity - start)
+            self._ring[start:start + first] = samples[:first]
+            if first < n:
+                self._ring[:n - first] = samples[first:]
+            self._write_pos += n
+
+    def pending(self) -> int:
+        return self._write_pos - self._read_pos
+
+    def drain(self) -> np.ndarray:
+        """Copy out all pending samples (oldest first) and mark them consumed."""
+        with self._lock:
+            n = self._write_pos - self._read_pos
+            if n <= 0:
+                return np.array([], dtype=np.float32)
+            start = self._read_pos % self.capacity
+            first = min(n, self.capacity - start)
+            out = np.empty(n, dtype=np.float32)
+            out[:first] = self._ring[start:start + first]
+            if first < n:
+                out[first:] = self._ring[:n - first]
+            self._read_pos = self._write_pos
+            return out
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "captured_seconds": self.captured_samples / self.sample_rate,
+            "written_seconds": self.written_samples / self.sample_rate,
+            "dropped_seconds": self.dropped_samples / self.sample_rate,
+            "pending_seconds": self.pending() / self.sample_rate,
+        }
+
+
+class SessionTaps:
+    """
+    The set of active taps for a single session.
+
+    Streams hold a reference to this object and call capture(point, samples);
+    when no tap is enabled for the point, the call is a single dict lookup.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.taps = {}
+
+    def capture(self, point: str, samples: np.ndarray):
+        tap = self.taps.get(point)
+        if tap is not None:
+            tap.capture(samples)
+
+    def stats(self) -> dict:
+        return {point: tap.stats() for point, tap in self.taps.items()}
+
+
+class TapWriter:
+    """
+    Single background thread that flushes every registered tap to disk.
+
+    A tap is flushed when it has at least block_seconds pending, when its
+    oldest data is older than max_age_seconds, or when it has been closed.
+    Output is raw 16-bit mono PCM appended to the tap's path.
+    """
+
+    def __init__(self, block_seconds: float = 5.0, max_age_seconds: float = 2.0, poll_interval: float = 0.25):
+        self.block_seconds = block_seconds
+        self.max_age_seconds = max_age_seconds
+        self.poll_interval = poll_interval
+
+        self._taps = []
+        self._files = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, tap: AudioTap):
+        with self._lock:
+            self._taps.append(tap)
+        self._ensure_started()
+
+    def close(self, tap: AudioTap):
+        """Mark a tap closed; the writer flushes its remainder and forgets it."""
+        tap.closed = True
+        self._wakeup.set()
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audio-tap-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            self.flush()
+        # Final flush on shutdown
+        for tap in list(self._taps):
+            tap.closed = True
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            taps = list(self._taps)
+
+        now = time.monotonic()
+        for tap in taps:
+            pending = tap.pending()
+            due = (
+                tap.closed
+                or pending >= self.block_seconds * tap.sample_rate
+                or (pending > 0 and now - tap.last_flush >= self.max_age_seconds)
+            )
+            if due:
+                self._write(tap, tap.drain())
+                tap.last_flush = now
+
+            if tap.closed:
+                f = self._files.pop(id(tap), None)
+                if f is not None:
+                    f.close()
+                with self._lock:
+                    if tap in self._taps:
+                        self._taps.remove(tap)
+
+    def _write(self, tap: AudioTap, samples: np.ndarray):
+        if len(samples) == 0:
+            return
+        try:
+            f = self._files.get(id(tap))
+            if f is None:
+                f = open(tap.path, "ab")
+                self._files[id(tap)] = f
+            f.write(float_to_pcm16(samples))
+            f.flush()
+            tap.written_samples += len(samples)
+        except Exception as e:
+            logger.error(f"Audio tap write failed ({tap.path}): {e}")
+
+
+class AudioTapRegistry:
+    """Per-session tap configuration, toggled through the HTTP API."""
+
+    def __init__(self, taps_dir: str = TAPS_DIR, capacity_seconds: float = 30.0, writer: TapWriter = None):
+        self.taps_dir = taps_dir
+        self.capacity_seconds = capacity_seconds
+        self.writer = writer or TapWriter()
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def session(self, session_id: str) -> SessionTaps:
+        """Return (creating if needed) the SessionTaps object for a session."""
+        with self._lock:
+            taps = self.sessions.get(session_id)
+            if taps is None:
+                taps = SessionTaps(session_id)
+                self.sessions[session_id] = taps
+            return taps
+
+    def enable(self, session_id: str, points) -> dict:
+        for point in points:
+            if point not in TAP_POINTS:
+                raise ValueError(f"Unknown tap point: {point}")
+
+        session_taps = self.session(session_id)
+        for point in points:
+            if point in session_taps.taps:
+                continue
+            path = os.path.join(self.taps_dir, f"{session_id}_{point}.pcm")
+            tap = AudioTap(path, capacity_seconds=self.capacity_seconds)
+            self.writer.add(tap)
+            # Publish last so capture() never sees a tap the writer doesn't know about
+            session_taps.taps[point] = tap
+            logger.info(f"Audio tap enabled: session={session_id} point={point} -> {path}")
+        return session_taps.stats()
+
+    def disable(self, session_id: str, points=None) -> dict:
+        session_taps = self.sessions.get(session_id)
+        if session_taps is None:
+            return {}
+        for point in list(points or session_taps.taps.keys()):
+            tap = session_taps.taps.pop(point, None)
+            if tap is not None:
+                self.writer.close(tap)
+                logger.info(f"Audio tap disabled: session={session_id} point={point}")
+        return session_taps.stats()
+
+    def release(self, session_id: str):
+        """Close all taps of a session and forget it (called on disconnect)."""
+        self.disable(session_id)
+        with self._lock:
+            self.sessions.pop(session_id, None)
+
+    def stats(self, session_id: str) -> dict:
+        session_taps = self.sessions.get(session_id)
+        return session_taps.stats() if session_taps else {}
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger("server")
+
+
+class Subscriber:
+    """
+    One listener's bounded outbox of serialized messages.
+
+    Drop-to-latest: when the outbox is full, queued partials are discarded
+    first (a newer message supersedes them); only if it is still full (a
+    listener behind by max_queue finals) is the oldest message dropped.
+    """
+
+    def __init__(self, session_id: str, max_queue: int = 32):
+        self.session_id = session_id
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._queue = deque()   # (payload, is_partial)
+        self._ready = asyncio.Event()
+
+    def put(self, payload: str, is_partial: bool):
+        if len(self._queue) >= self.max_queue:
+            kept = deque(item for item in self._queue if not item[1])
+            self.dropped += len(self._queue) - len(kept)
+            self._queue = kept
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.dropped += 1
+        self._queue.append((payload, is_partial))
+        self._ready.set()
+
+    async def get(self) -> str:
+        while not self._queue:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._queue.popleft()[0]
+
+    def __len__(self):
+        return len(self._queue)
+
+    @property
+    def queued_bytes(self) -> int:
+        return sum(len(payload) for payload, _ in self._queue)
+
+
+class BroadcastHub:
+    """
+    Fans one speaker session's results out to any number of listeners.
+
+    publish() serializes a message once and appends the same string to every
+    subscriber's outbox; each listener's websocket drains its own outbox, so a
+    slow listener never delays the speaker or other listeners. Listeners may
+    attach before the speaker connects and stay attached across reconnects.
+    The latest `meta` message of a session (model, language) is replayed to
+    new subscribers.
+    """
+
+    def __init__(self, max_queue: int = 32, max_subscribers: int = 1000):
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self._subscribers = {}  # session_id -> set of Subscriber
+        self._meta = {}         # session_id -> serialized meta message
+        self.published = 0
+        self.delivered = 0
+
+    def has_subscribers(self, session_id: Optional[str]) -> bool:
+        return bool(session_id) and bool(self._subscribers.get(session_id))
+
+    def subscribe(self, session_id: str) -> Subscriber:
+        subscribers = self._subscribers.setdefault(session_id, set())
+        if len(subscribers) >= self.max_subscribers:
+            raise OverflowError(f"Session {session_id} already has {len(subscribers)} listeners")
+        subscriber = Subscriber(session_id, self.max_queue)
+        subscribers.add(subscriber)
+        if session_id in self._meta:
+            subscriber.put(self._meta[session_id], False)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscribers = self._subscribers.get(subscriber.session_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.session_id]
+
+    def queued_bytes(self, session_id: Optional[str]) -> int:
+        """Serialized messages waiting in this session's listener outboxes."""
+        return sum(s.queued_bytes for s in self._subscribers.get(session_id, ())) if session_id else 0
+
+    def publish(self, session_id: Optional[str], message: dict, is_partial: bool = False):
+        subscribers = self._subscribers.get(session_id) if session_id else None
+        if not subscribers:
+            return
+        payload = json.dumps(message, ensure_ascii=False)
+        for subscriber in subscribers:
+            subscriber.put(payload, is_partial)
+        self.published += 1
+        self.delivered += len(subscribers)
+
+    def set_meta(self, session_id: Optional[str], message: dict):
+        """Session-level state (model, language, ...) that new listeners receive first; also published now."""
+        if not session_id:
+            return
+        message = {"event": "session", **message}
+        self._meta[session_id] = json.dumps(message, ensure_ascii=False)
+        self.publish(session_id, message)
+
+    def end(self, session_id: Optional[str]):
+        """The speaker disconnected; listeners stay subscribed in case it comes back."""
+        if not session_id:
+            return
+        self._meta.pop(session_id, None)
+        self.publish(session_id, {"event": "speaker_disconnected"})
+
+    def stats(self) -> dict:
+        subscribers = [s for subs in self._subscribers.values() for s in subs]
+        return {
+            "sessions": len(self._subscribers),
+            "subscribers": len(subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": sum(s.dropped for s in subscribers),
+            "max_queued": max((len(s) for s in subscribers), default=0),
+        }
@@ -0,0 +1,130 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger("server")
+
+
+@dataclass
+class SessionSnapshot:
+    """
+    Everything a hibernated session keeps: transcript context, counters and
+    where its recording continues. Recognizer streams, audio buffers and the
+    in-memory recording are released.
+    """
+    session_id: Optional[str]
+    model: str
+    last_final_text: str = ""
+    finals: int = 0
+    audio_seconds: float = 0.0
+    hibernations: int = 0
+    recording_offset: int = 0   # Bytes of PCM already spilled to the session's .part file
+    hibernated_at: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def recording_part_path(recordings_dir: str, session_id: str) -> str:
+    """Spill file holding the part of a session's recording flushed at hibernation."""
+    return os.path.join(recordings_dir, f"{session_id}.pcm.part")
+
+
+def spill_recording(buffer: bytearray, path: str) -> int:
+    """Append the in-memory recording to its spill file and clear it; returns the file size."""
+    if buffer:
+        with open(path, "ab") as f:
+            f.write(buffer)
+        buffer.clear()
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+class StreamPool:
+    """
+    Warm, unused streams for one service, so a waking session doesn't pay for
+    create_stream() (Zipformer OnlineStream, Silero VAD, ...) on its first
+    speech frame. Streams are never reused: a hibernated session's stream is
+    dropped and the pool is topped up with fresh ones off the hot path.
+    """
+
+    def __init__(self, service, size: int = 2):
+        self.service = service
+        self.size = size if getattr(service, "POOL_STREAMS", True) else 0
+        self._streams = deque()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, taps=None):
+        # Taps are bound at construction, so tapped sessions always get a fresh stream
+        if taps is None:
+            with self._lock:
+                if self._streams:
+                    self.hits += 1
+                    return self._streams.popleft()
+        with self._lock:
+            self.misses += 1
+        return self.service.create_stream(taps=taps)
+
+    def refill(self):
+        """Create streams until the pool is full (blocking; run it in a worker thread)."""
+        while len(self._streams) < self.size:
+            stream = self.service.create_stream()
+            with self._lock:
+                self._streams.append(stream)
+
+    def stats(self) -> dict:
+        return {"idle_streams": len(self._streams), "hits": self.hits, "misses": self.misses}
+
+
+class HibernationManager:
+    """Stream pools per model, the currently hibernated sessions and rehydration latency."""
+
+    def __init__(self, pool_size: int = 2, latency_window: int = 256):
+        self.pool_size = pool_size
+        self.pools = {}
+        self.hibernated = {}
+        self.rehydrations = 0
+        self._latencies = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+
+    def pool(self, model: str, service) -> StreamPool:
+        with self._lock:
+            pool = self.pools.get(model)
+            if pool is None or pool.service is not service:
+                pool = StreamPool(service, self.pool_size)
+                self.pools[model] = pool
+            return pool
+
+    def hibernate(self, key, snapshot: SessionSnapshot):
+        snapshot.hibernations += 1
+        snapshot.hibernated_at = time.time()
+        self.hibernated[key] = snapshot
+        logger.info(f"Session {snapshot.session_id} hibernated: {snapshot.to_dict()}")
+
+    def woke(self, key, latency_seconds: float):
+        self.hibernated.pop(key, None)
+        self.rehydrations += 1
+        self._latencies.append(latency_seconds)
+
+    def forget(self, key):
+        self.hibernated.pop(key, None)
+
+    def stats(self) -> dict:
+        lat = np.array(self._latencies) * 1000
+        return {
+            "hibernated_sessions": len(self.hibernated),
+            "rehydrations": self.rehydrations,
+            "rehydration_ms": {
+                "p50": float(np.percentile(lat, 50)) if len(lat) else None,
+                "p95": float(np.percentile(lat, 95)) if len(lat) else None,
+                "max": float(lat.max()) if len(lat) else None,
+            },
+            "pools": {model: pool.stats() for model, pool in self.pools.items()},
+        }
@@ -0,0 +1,156 @@
+import logging
+import os
+import threading
+from collections import deque
+
+import numpy as np
+import sherpa_onnx
+
+try:
+    from backend.core.config import MODEL_DIR
+except ImportError:
+    MODEL_DIR = "models"
+
+logger = logging.getLogger("server")
+
+# Multilingual Whisper encoder/decoder used only for language identification
+LID_MODEL_DIR = os.path.join(MODEL_DIR, "lid", "sherpa-onnx-whisper-tiny")
+
+SAMPLE_RATE = 16000
+
+
+class SpokenLanguageIdentifier:
+    """sherpa-onnx spoken language identification; identify() returns an ISO code such as "en"."""
+
+    def __init__(self, model_dir: str = LID_MODEL_DIR, num_threads: int = 1):
+        encoder = os.path.join(model_dir, "tiny-encoder.int8.onnx")
+        decoder = os.path.join(model_dir, "tiny-decoder.int8.onnx")
+        if not (os.path.exists(encoder) and os.path.exists(decoder)):
+            raise FileNotFoundError(f"Language identification model not found in {model_dir}")
+        logger.info(f"Loading language identification model from {model_dir}")
+        config = sherpa_onnx.SpokenLanguageIdentificationConfig(
+            whisper=sherpa_onnx.SpokenLanguageIdentificationWhisperConfig(encoder=encoder, decoder=decoder),
+            num_threads=num_threads,
+        )
+        self.slid = sherpa_onnx.SpokenLanguageIdentification(config)
+        # One identification at a time; they only run at session start and on rechecks
+        self._lock = threading.Lock()
+
+    def identify(self, samples: np.ndarray) -> str:
+        with self._lock:
+            stream = self.slid.create_stream()
+            stream.accept_waveform(SAMPLE_RATE, samples)
+            return self.slid.compute(stream)
+
+
+class LanguageDetector:
+    """
+    Per-session language decision for language=auto.
+
+    Until the language is decided, forwarded chunks are held: add() returns
+    True once detect_seconds of them are buffered, identify() runs on them and
+    take_buffered() hands them back, in their original chunking, for replay
+    into the models chosen for that language.
+
+    With recheck_seconds set, the latest detect_seconds of speech are
+    identified again every recheck_seconds; recheck() reports a switch once
+    `confirmations` consecutive checks agree on a different language.
+    """
+
+    def __init__(self, identifier, detect_seconds: float = 3.0, recheck_seconds: float = 0.0, confirmations: int = 2):
+        self.identifier = identifier
+        self.detect_samples = int(detect_seconds * SAMPLE_RATE)
+        self.recheck_samples = int(recheck_seconds * SAMPLE_RATE)
+        self.confirmations = confirmations
+        self.language = None
+        self.decided = False
+
+        self._chunks = []
+        self._buffered = 0
+        # Latest speech for rechecks
+        self._window = deque()
+        self._window_samples = 0
+        self._since_check = 0
+        self._candidate = None
+        self._votes = 0
+        self.checks = 0
+
+    @property
+    def pending(self) -> bool:
+        """Undecided with speech held back (e.g. the speaker stopped before detect_seconds)."""
+        return not self.decided and self._buffered > 0
+
+    def add(self, samples: np.ndarray) -> bool:
+        self._chunks.append(samples)
+        self._buffered += len(samples)
+        return self._buffered >= self.detect_samples
+
+    def identify(self) -> str:
+        """Decide from the buffered speech (blocking). Returns the language, or None if identification failed."""
+        audio = np.concatenate(self._chunks) if self._chunks else np.zeros(0, dtype=np.float32)
+        try:
+            self.language = self.identifier.identify(audio) or None
+        except Exception as e:
+            logger.error(f"Language identification failed: {e}")
+            self.language = None
+        self.decided = True
+        self.checks += 1
+        for chunk in self._chunks:
+            self._remember(chunk)
+        return self.language
+
+    def memory_bytes(self) -> int:
+        """Speech held for the decision plus the recheck window (float32)."""
+        return (self._buffered + self._window_samples) * 4
+
+    def take_buffered(self) -> list:
+        chunks, self._chunks, self._buffered = self._chunks, [], 0
+        return chunks
+
+    def observe(self, samples: np.ndarray) -> bool:
+        """Track speech after the decision; True when a recheck is due."""
+        if not self.recheck_samples:
+            return False
+        self._remember(samples)
+        self._since_check += len(samples)
+        return self._since_check >= self.recheck_samples and self._window_samples >= self.detect_samples
+
+    def recheck_audio(self) -> np.ndarray:
+        """
+        The latest speech to recheck, copied out of the window. Taken where
+        observe() runs, so a recheck in a worker thread never reads the window
+        while it is being appended to.
+        """
+        self._since_check = 0
+        self.checks += 1
+        return np.concatenate(self._window)
+
+    def recheck(self, audio: np.ndarray):
+        """Identify `audio` (from recheck_audio) again (blocking). Returns the new language once confirmed, else None."""
+        try:
+            heard = self.identifier.identify(audio)
+        except Exception as e:
+            logger.error(f"Language recheck failed: {e}")
+            return None
+
+        if not heard or heard == self.language:
+            self._candidate, self._votes = None, 0
+            return None
+        if heard == self._candidate:
+            self._votes += 1
+        else:
+            self._candidate, self._votes = heard, 1
+        if self._votes >= self.confirmations:
+            self._candidate, self._votes = None, 0
+            return heard
+        return None
+
+    def switched(self, language: str):
+        self.language = language
+        self._candidate, self._votes = None, 0
+
+    def _remember(self, samples: np.ndarray):
+        self._window.append(samples)
+        self._window_samples += len(samples)
+        while self._window and self._window_samples - len(self._window[0]) >= self.detect_samples:
+            self._window_samples -= len(self._window.popleft())
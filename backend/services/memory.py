@@ -0,0 +1,117 @@
+import logging
+import os
+from typing import Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger("server")
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Resident set size of this process (psutil if installed, else /proc); None where neither works."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def physical_memory_bytes() -> Optional[int]:
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class MemoryAccountant:
+    """
+    Resident bytes per session, by component, and the host memory watermark.
+
+    Sessions register a probe returning {component: bytes} (recording PCM,
+    stream audio buffers, send queues, ...). Probes only run when usage is
+    queried, so the audio path pays nothing for the accounting.
+
+    check() (called periodically) compares the process RSS with the
+    watermark. Above it, `pressure` is set, which refuses new sessions, and
+    the largest sessions are asked to shed through their shed callback until
+    the bytes requested should bring RSS back under resume_fraction of the
+    watermark. Pressure clears once RSS is below that level.
+    """
+
+    def __init__(self, watermark_bytes: Optional[int] = None, resume_fraction: float = 0.9, rss=process_rss_bytes):
+        self.watermark_bytes = watermark_bytes
+        self.resume_fraction = resume_fraction
+        self._rss = rss
+        self._sessions = {}  # key -> (session_id, probe, shed)
+        self.pressure = False
+        self.last_rss = None
+        self.shed_requests = 0
+
+    def register(self, key, session_id: Optional[str], probe, shed=None):
+        self._sessions[key] = (session_id, probe, shed)
+
+    def unregister(self, key):
+        self._sessions.pop(key, None)
+
+    def usage(self) -> list:
+        """Every registered session, largest first: {"key", "session_id", "bytes", "components"}."""
+        entries = []
+        for key, (session_id, probe, _) in list(self._sessions.items()):
+            try:
+                components = {name: int(size) for name, size in probe().items() if size}
+            except Exception as e:
+                logger.warning(f"Memory probe for session {session_id} failed: {e}")
+                continue
+            entries.append({"key": key, "session_id": session_id, "bytes": sum(components.values()),
+                            "components": components})
+        entries.sort(key=lambda entry: entry["bytes"], reverse=True)
+        return entries
+
+    def over_watermark(self) -> bool:
+        return self.pressure
+
+    def check(self) -> int:
+        """Re-read RSS, update `pressure` and ask the largest sessions to shed; returns how many were asked."""
+        rss = self.last_rss = self._rss()
+        if rss is None or self.watermark_bytes is None:
+            return 0
+        resume_at = self.watermark_bytes * self.resume_fraction
+        if rss >= self.watermark_bytes and not self.pressure:
+            logger.warning(f"Memory watermark reached: RSS {rss / 2**20:.0f} MB >= {self.watermark_bytes / 2**20:.0f} MB; "
+                           f"refusing new sessions")
+        elif self.pressure and rss < resume_at:
+            logger.info(f"Memory pressure cleared: RSS {rss / 2**20:.0f} MB")
+        self.pressure = rss >= self.watermark_bytes or (self.pressure and rss >= resume_at)
+        if not self.pressure:
+            return 0
+
+        needed, requested, asked = rss - resume_at, 0, 0
+        for entry in self.usage():
+            shed = self._sessions.get(entry["key"], (None, None, None))[2]
+            if shed is None or not entry["bytes"]:
+                continue
+            shed()
+            requested += entry["bytes"]
+            asked += 1
+            logger.warning(f"Shedding session {entry['session_id']} ({entry['bytes'] / 2**20:.1f} MB: {entry['components']})")
+            if requested >= needed:
+                break
+        self.shed_requests += asked
+        return asked
+
+    def stats(self, limit: int = 10) -> dict:
+        usage = self.usage()
+        return {
+            "rss": self._rss(),
+            "watermark": self.watermark_bytes,
+            "pressure": self.pressure,
+            "sessions": len(usage),
+            "accounted": sum(entry["bytes"] for entry in usage),
+            "shed_requests": self.shed_requests,
+            "top": [{k: v for k, v in entry.items() if k != "key"} for entry in usage[:limit]],
+        }
@@ -0,0 +1,419 @@
+import json
+import logging
+import os
+import queue
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+import numpy as np
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+try:
+    import mlx_whisper
+except ImportError:
+    # Apple Silicon only; elsewhere recordings are re-transcribed with Moonshine
+    mlx_whisper = None
+
+try:
+    from backend.core.config import MODEL_DIR
+except ImportError:
+    MODEL_DIR = "models"
+
+logger = logging.getLogger("server")
+
+SAMPLE_RATE = 16000
+
+# Directory containing the `backend` package, for `python -m` worker processes
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Lowest priority: enrichment only gets CPU nobody else wants (and is paused under live load)
+WORKER_NICENESS = 19
+
+WHISPER_MODEL = "mlx-community/whisper-large-v3-turbo"
+MOONSHINE_MODEL_DIR = os.path.join(MODEL_DIR, "asr", "sherpa-onnx-moonshine-base-en-int8")
+VAD_MODEL = os.path.join(MODEL_DIR, "vad", "silero_vad.onnx")
+DIARIZATION_SEGMENTATION_MODEL = os.path.join(MODEL_DIR, "diarization", "sherpa-onnx-pyannote-segmentation-3-0", "model.onnx")
+DIARIZATION_EMBEDDING_MODEL = os.path.join(MODEL_DIR, "diarization", "3dspeaker_speech_eres2net_base_sv_zh-cn_3dspeaker_16k.onnx")
+
+
+def load_audio(path: str) -> np.ndarray:
+    """A saved recording (WAV, FLAC or Opus) as float32 samples at 16 kHz."""
+    if path.endswith(".wav"):
+        with wave.open(path, "rb") as wf:
+            pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        return pcm.astype(np.float32) / 32768.0
+    if soundfile is None:
+        raise RuntimeError("soundfile is not installed")
+    samples, rate = soundfile.read(path, dtype="float32")
+    if rate != SAMPLE_RATE:
+        raise RuntimeError(f"Unexpected sample rate {rate} in {path}")
+    return samples
+
+
+def transcribe_whisper(samples: np.ndarray, language: str) -> list:
+    """Full-quality pass: Whisper over the whole recording, with word timestamps (seconds)."""
+    result = mlx_whisper.transcribe(
+        samples,
+        path_or_hf_repo=WHISPER_MODEL,
+        language=language,
+        word_timestamps=True,
+        condition_on_previous_text=True,
+        temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+    )
+    return [
+        {
+            "start": s["start"],
+            "end": s["end"],
+            "text": s["text"].strip(),
+            "words": [{"start": w["start"], "end": w["end"], "word": w["word"]} for w in s.get("words", [])],
+        }
+        for s in result.get("segments", [])
+        if s["text"].strip()
+    ]
+
+
+def transcribe_moonshine(samples: np.ndarray, num_threads: int = 2) -> list:
+    """Fallback pass without MLX: Silero VAD splits the recording, Moonshine decodes each utterance."""
+    import sherpa_onnx
+
+    recognizer = sherpa_onnx.OfflineRecognizer.from_moonshine(
+        preprocessor=f"{MOONSHINE_MODEL_DIR}/preprocess.onnx",
+        encoder=f"{MOONSHINE_MODEL_DIR}/encode.int8.onnx",
+        uncached_decoder=f"{MOONSHINE_MODEL_DIR}/uncached_decode.int8.onnx",
+        cached_decoder=f"{MOONSHINE_MODEL_DIR}/cached_decode.int8.onnx",
+        tokens=f"{MOONSHINE_MODEL_DIR}/tokens.txt",
+        num_threads=num_threads,
+    )
+    vad_config = sherpa_onnx.VadModelConfig()
+    vad_config.silero_vad.model = VAD_MODEL
+    vad_config.silero_vad.min_silence_duration = 0.5
+    vad_config.silero_vad.max_speech_duration = 20.0
+    vad_config.sample_rate = SAMPLE_RATE
+    vad = sherpa_onnx.VoiceActivityDetector(vad_config, buffer_size_in_seconds=60)
+
+    segments = []
+
+    def drain():
+        while not vad.empty():
+            start, audio = vad.front.start, np.array(vad.front.samples, dtype=np.float32)
+            vad.pop()
+            stream = recognizer.create_stream()
+            stream.accept_waveform(SAMPLE_RATE, audio)
+            recognizer.decode_stream(stream)
+            text = stream.result.text.strip()
+            if text:
+                segments.append({"start": start / SAMPLE_RATE, "end": (start + len(audio)) / SAMPLE_RATE,
+                                 "text": text, "words": []})
+
+    window = vad_config.silero_vad.window_size
+    for i in range(0, len(samples), window):
+        vad.accept_waveform(samples[i:i + window])
+        drain()
+    vad.flush()
+    drain()
+    return segments
+
+
+def diarize(samples: np.ndarray, num_speakers: int = -1, threshold: float = 0.5, num_threads: int = 2) -> Optional[list]:
+    """Speaker turns [(start, end, speaker)] in seconds, or None when the diarization models aren't installed."""
+    if not (os.path.exists(DIARIZATION_SEGMENTATION_MODEL) and os.path.exists(DIARIZATION_EMBEDDING_MODEL)):
+        return None
+    import sherpa_onnx
+
+    config = sherpa_onnx.OfflineSpeakerDiarizationConfig(
+        segmentation=sherpa_onnx.OfflineSpeakerSegmentationModelConfig(
+            pyannote=sherpa_onnx.OfflineSpeakerSegmentationPyannoteModelConfig(model=DIARIZATION_SEGMENTATION_MODEL),
+            num_threads=num_threads,
+        ),
+        embedding=sherpa_onnx.SpeakerEmbeddingExtractorConfig(model=DIARIZATION_EMBEDDING_MODEL, num_threads=num_threads),
+        clustering=sherpa_onnx.FastClusteringConfig(num_clusters=num_speakers, threshold=threshold),
+        min_duration_on=0.3,
+        min_duration_off=0.5,
+    )
+    diarizer = sherpa_onnx.OfflineSpeakerDiarization(config)
+    result = diarizer.process(samples).sort_by_start_time()
+    return [(t.start, t.end, t.speaker) for t in result]
+
+
+def speaker_at(start: float, end: float, turns: list) -> Optional[int]:
+    """Speaker whose turns overlap [start, end] the most; the nearest turn for gaps between turns."""
+    if not turns:
+        return None
+    overlap = {}
+    for t_start, t_end, speaker in turns:
+        o = min(end, t_end) - max(start, t_start)
+        if o > 0:
+            overlap[speaker] = overlap.get(speaker, 0.0) + o
+    if overlap:
+        return max(overlap, key=overlap.get)
+    middle = (start + end) / 2
+    return min(turns, key=lambda t: min(abs(middle - t[0]), abs(middle - t[1])))[2]
+
+
+def align(segments: list, turns: Optional[list]) -> list:
+    """
+    Place the transcript on the recording timeline and attribute it to speakers.
+
+    Segments with word timestamps are split wherever the speaker changes;
+    others get the speaker overlapping them most. Returns rows with sample
+    offsets, in the units of the live transcript.
+    """
+    rows = []
+
+    def emit(start, end, text, speaker):
+        rows.append({"start_sample": int(round(start * SAMPLE_RATE)), "end_sample": int(round(end * SAMPLE_RATE)),
+                     "text": text.strip(), "speaker": speaker})
+
+    for segment in segments:
+        words = segment.get("words") or []
+        if not turns or not words:
+            emit(segment["start"], segment["end"], segment["text"], speaker_at(segment["start"], segment["end"], turns))
+            continue
+        run, run_speaker = [], None
+        for word in words:
+            speaker = speaker_at(word["start"], word["end"], turns)
+            if run and speaker != run_speaker:
+                emit(run[0]["start"], run[-1]["end"], "".join(w["word"] for w in run), run_speaker)
+                run = []
+            run.append(word)
+            run_speaker = speaker
+        if run:
+            emit(run[0]["start"], run[-1]["end"], "".join(w["word"] for w in run), run_speaker)
+    return [r for r in rows if r["text"]]
+
+
+def enrich(path: str, language: str = "en", engine: str = "auto", diarization: bool = True,
+           num_speakers: int = -1, cluster_threshold: float = 0.5, num_threads: int = 2) -> dict:
+    """Re-transcribe, diarize and align one recording (runs in the worker process)."""
+    samples = load_audio(path)
+    if engine == "auto":
+        engine = "whisper" if mlx_whisper is not None else "moonshine"
+    if engine == "whisper":
+        if mlx_whisper is None:
+            raise RuntimeError("mlx-whisper is not installed (requires Apple Silicon)")
+        segments = transcribe_whisper(samples, language)
+        model = WHISPER_MODEL
+    else:
+        segments = transcribe_moonshine(samples, num_threads)
+        model = "moonshine"
+    turns = diarize(samples, num_speakers, cluster_threshold, num_threads) if diarization else None
+    return {
+        "model": model,
+        "language": language,
+        "duration": len(samples) / SAMPLE_RATE,
+        "diarized": turns is not None,
+        "speakers": len({t[2] for t in turns}) if turns else 0,
+        "segments": align(segments, turns),
+    }
+
+
+@dataclass
+class EnrichmentJob:
+    session_id: str
+    recording_path: str
+    language: str = "en"
+    status: str = "queued"      # queued -> running <-> paused -> done | failed
+    pauses: int = 0
+    paused_seconds: float = 0.0
+    model: Optional[str] = None
+    speakers: int = 0
+    segments: int = 0
+    error: Optional[str] = None
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    _paused_at: Optional[float] = field(default=None, repr=False)
+
+    def to_dict(self) -> dict:
+        out = asdict(self)
+        out.pop("_paused_at")
+        return out
+
+
+class RecordingEnricher:
+    """
+    Post-session enrichment of saved recordings: a full-quality
+    re-transcription, offline speaker diarization and alignment of both to the
+    recording timeline, stored next to the live transcript.
+
+    Jobs run one at a time in a `python -m` worker process at the lowest OS
+    priority. A supervisor thread watches `busy()` (live sessions' queue depth
+    and real-time factor): no job starts while it is true, and a running worker
+    is stopped with SIGSTOP until live load has stayed low for resume_after
+    seconds, so enrichment never competes with live sessions for CPU.
+    """
+
+    def __init__(self, store, busy=None, engine: str = "auto", diarization: bool = True, num_speakers: int = -1,
+                 cluster_threshold: float = 0.5, num_threads: int = 2, poll_interval: float = 0.2,
+                 resume_after: float = 2.0, history: int = 200):
+        self.store = store
+        self.busy = busy or (lambda: False)
+        self.engine = engine
+        self.diarization = diarization
+        self.num_speakers = num_speakers
+        self.cluster_threshold = cluster_threshold
+        self.num_threads = num_threads
+        self.poll_interval = poll_interval
+        self.resume_after = resume_after
+        self.history = history
+        self.jobs = {}
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._proc = None
+        self._stop = threading.Event()
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, session_id: str, recording_path: str, language: str = "en") -> EnrichmentJob:
+        job = EnrichmentJob(session_id, recording_path, language or "en", created_at=time.time())
+        with self._lock:
+            self.jobs[session_id] = job
+            # Forget the oldest finished jobs
+            finished = [sid for sid, j in self.jobs.items() if j.finished_at is not None]
+            for sid in finished[:max(0, len(self.jobs) - self.history)]:
+                del self.jobs[sid]
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="recording-enrich", daemon=True)
+                self._thread.start()
+        self._queue.put(job)
+        return job
+
+    def status(self, session_id: str) -> Optional[dict]:
+        job = self.jobs.get(session_id)
+        return job.to_dict() if job else None
+
+    def stats(self) -> dict:
+        jobs = list(self.jobs.values())
+        return {
+            "queued": sum(j.status == "queued" for j in jobs),
+            "running": [j.session_id for j in jobs if j.status in ("running", "paused")],
+            "paused": any(j.status == "paused" for j in jobs),
+            "completed": self.completed,
+            "failed": self.failed,
+            "live_busy": bool(self.busy()),
+        }
+
+    def shutdown(self):
+        self._stop.set()
+        self._queue.put(None)
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            self._signal(proc, getattr(signal, "SIGCONT", None))
+            proc.terminate()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def _command(self, job: EnrichmentJob) -> list:
+        options = {
+            "language": job.language, "engine": self.engine, "diarization": self.diarization,
+            "num_speakers": self.num_speakers, "cluster_threshold": self.cluster_threshold,
+            "num_threads": self.num_threads,
+        }
+        return [sys.executable, "-m", "backend.services.recordings.enrichment", job.recording_path, json.dumps(options)]
+
+    def _run(self):
+        while not self._stop.is_set():
+            job = self._queue.get()
+            if job is None:
+                break
+            # Don't start while live sessions are loaded
+            while self.busy() and not self._stop.is_set():
+                time.sleep(self.poll_interval)
+            if self._stop.is_set():
+                break
+            self._enrich(job)
+
+    def _enrich(self, job: EnrichmentJob):
+        job.status, job.started_at = "running", time.time()
+        try:
+            result = self._supervise(job)
+            self.store.replace_enriched(job.session_id, result["segments"], result["model"], result["language"])
+            job.model, job.speakers, job.segments = result["model"], result["speakers"], len(result["segments"])
+            job.status = "done"
+            self.completed += 1
+            logger.info(f"Enriched recording {job.session_id}: {job.segments} segments, {job.speakers} speakers "
+                        f"({job.model}, paused {job.pauses}x for {job.paused_seconds:.1f}s)")
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+            self.failed += 1
+            logger.error(f"Enriching {job.session_id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+
+    def _supervise(self, job: EnrichmentJob) -> dict:
+        """Run the worker, pausing it whenever live sessions are busy; returns its JSON result."""
+        can_pause = hasattr(signal, "SIGSTOP")
+        with tempfile.TemporaryFile("w+") as out, tempfile.TemporaryFile("w+") as err:
+            proc = self._proc = subprocess.Popen(self._command(job), cwd=PACKAGE_ROOT, stdout=out, stderr=err, text=True)
+            quiet_since = None
+            try:
+                while True:
+                    try:
+                        proc.wait(timeout=self.poll_interval)
+                        break
+                    except subprocess.TimeoutExpired:
+                        pass
+                    if self._stop.is_set():
+                        raise RuntimeError("Enricher stopped")
+                    if not can_pause:
+                        continue
+                    if self.busy():
+                        quiet_since = None
+                        if job.status != "paused":
+                            self._signal(proc, signal.SIGSTOP)
+                            job.status, job._paused_at = "paused", time.monotonic()
+                            job.pauses += 1
+                    elif job.status == "paused":
+                        quiet_since = quiet_since or time.monotonic()
+                        if time.monotonic() - quiet_since >= self.resume_after:
+                            self._signal(proc, signal.SIGCONT)
+                            job.paused_seconds += time.monotonic() - job._paused_at
+                            job.status, job._paused_at = "running", None
+            finally:
+                self._proc = None
+                if proc.poll() is None:
+                    self._signal(proc, getattr(signal, "SIGCONT", None))
+                    proc.kill()
+                    proc.wait()
+
+            if proc.returncode != 0:
+                err.seek(0)
+                lines = err.read().strip().splitlines()
+                raise RuntimeError(lines[-1] if lines else f"worker exited with {proc.returncode}")
+            out.seek(0)
+            return json.loads(out.read())
+
+    @staticmethod
+    def _signal(proc, sig):
+        if sig is None:
+            return
+        try:
+            os.kill(proc.pid, sig)
+        except ProcessLookupError:
+            pass
+
+
+def main():
+    # Worker entry point: python -m backend.services.recordings.enrichment RECORDING OPTIONS_JSON
+    path, options = sys.argv[1], json.loads(sys.argv[2])
+    if hasattr(os, "nice"):
+        os.nice(WORKER_NICENESS)
+    print(json.dumps(enrich(path, **options)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import glob
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import numpy as np
+
+try:
+    import soundfile
+except ImportError:
+    # Without libsndfile, jobs fail and the WAV is kept as the recording
+    soundfile = None
+
+logger = logging.getLogger("server")
+
+SAMPLE_RATE = 16000
+
+# Directory containing the `backend` package, for `python -m` worker processes
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Encoders run at low priority so they never compete with live inference
+WORKER_NICENESS = 10
+
+# Output format -> (extension, soundfile format, subtype)
+FORMATS = {
+    "flac": (".flac", "FLAC", "PCM_16"),
+    "opus": (".opus", "OGG", "OPUS"),
+}
+
+
+def failed_marker_path(wav_path: str) -> str:
+    """Next to a WAV whose encode failed; recover() skips it (delete the marker to retry)."""
+    return wav_path + ".failed"
+
+
+def write_wav(path: str, pcm: bytes):
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)  # 16-bit PCM (2 bytes)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(pcm)
+
+
+def transcode_file(wav_path: str, output_path: str, fmt: str) -> int:
+    """
+    Encode a 16-bit mono WAV to `fmt` and return the output size in bytes.
+    Writes to a temp name and renames, so a crash never leaves a truncated
+    file that looks complete.
+    """
+    if soundfile is None:
+        raise RuntimeError("soundfile is not installed")
+    _, sf_format, subtype = FORMATS[fmt]
+
+    with wave.open(wav_path, "rb") as wf:
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+    tmp_path = output_path + ".tmp"
+    soundfile.write(tmp_path, samples, SAMPLE_RATE, format=sf_format, subtype=subtype)
+    if soundfile.info(tmp_path).frames == 0 and len(samples):
+        os.remove(tmp_path)
+        raise RuntimeError("encoder produced an empty file")
+    os.replace(tmp_path, output_path)
+    return os.path.getsize(output_path)
+
+
+@dataclass
+class TranscodeJob:
+    session_id: str
+    format: str
+    status: str = "queued"      # queued -> writing -> transcoding -> done | failed
+    wav_path: Optional[str] = None
+    output_path: Optional[str] = None
+    wav_bytes: int = 0
+    output_bytes: int = 0
+    error: Optional[str] = None
+    created_at: float = 0.0
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class RecordingTranscoder:
+    """
+    Background pipeline for saved recordings: write the WAV, encode it to
+    FLAC/Opus in a worker process, delete the WAV once the encode succeeded,
+    then trim the compressed archive to max_archive_bytes (oldest first).
+
+    submit() only records the job and hands it to one of `workers` coordinator
+    threads, each running at most one encoder process at a time, so the
+    request handler returns immediately. A failed job keeps its WAV.
+
+    Encoders are `python -m` subprocesses rather than a multiprocessing pool:
+    spawn/forkserver children re-import the main module, which for
+    `uv run server.py` would re-run the whole server's startup code.
+
+    on_done(job) is called once a recording is stored: compressed, or as the
+    WAV if encoding failed.
+    """
+
+    def __init__(self, recordings_dir: str, fmt: str = "flac", workers: int = 1,
+                 max_archive_bytes: Optional[int] = None, on_done=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown recording format: {fmt}")
+        self.recordings_dir = recordings_dir
+        self.format = fmt
+        self.workers = workers
+        self.max_archive_bytes = max_archive_bytes
+        self.on_done = on_done
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._coordinator = None
+
+    def _executors(self):
+        if self._coordinator is None:
+            self._coordinator = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="recording-transcode")
+        return self._coordinator
+
+    @staticmethod
+    def _encode(wav_path: str, output_path: str, fmt: str) -> int:
+        """Run transcode_file() in a low-priority child process; returns the output size."""
+        proc = subprocess.run(
+            [sys.executable, "-m", "backend.services.recordings.transcoder", wav_path, output_path, fmt],
+            cwd=PACKAGE_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            lines = proc.stderr.strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else f"encoder exited with {proc.returncode}")
+        return int(proc.stdout.strip())
+
+    def submit(self, session_id: str, pcm: bytes, prefix_path: Optional[str] = None) -> TranscodeJob:
+        """Queue a recording. `prefix_path` is raw PCM recorded earlier (hibernation spill) that goes first."""
+        job = TranscodeJob(session_id, self.format, created_at=time.time())
+        with self._lock:
+            self.jobs[session_id] = job
+        self._executors().submit(self._run, job, pcm, prefix_path)
+        return job
+
+    def recover(self):
+        """Re-queue WAVs left behind by a crash; WAVs whose encode already failed are kept as they are."""
+        for wav_path in sorted(glob.glob(os.path.join(self.recordings_dir, "*.wav"))):
+            if os.path.exists(failed_marker_path(wav_path)):
+                continue
+            session_id = os.path.splitext(os.path.basename(wav_path))[0]
+            job = TranscodeJob(session_id, self.format, status="transcoding", wav_path=wav_path,
+                               wav_bytes=os.path.getsize(wav_path), created_at=time.time())
+            with self._lock:
+                self.jobs[session_id] = job
+            self._executors().submit(self._transcode, job)
+
+    def status(self, session_id: str) -> Optional[dict]:
+        job = self.jobs.get(session_id)
+        return job.to_dict() if job else None
+
+    def _run(self, job: TranscodeJob, pcm: bytes, prefix_path: Optional[str]):
+        try:
+            job.status = "writing"
+            if prefix_path and os.path.exists(prefix_path):
+                with open(prefix_path, "rb") as f:
+                    pcm = f.read() + pcm
+            job.wav_path = os.path.join(self.recordings_dir, f"{job.session_id}.wav")
+            write_wav(job.wav_path, pcm)
+            # A new recording for the session gets its own encode attempt
+            if os.path.exists(failed_marker_path(job.wav_path)):
+                os.remove(failed_marker_path(job.wav_path))
+            job.wav_bytes = os.path.getsize(job.wav_path)
+            if prefix_path and os.path.exists(prefix_path):
+                os.remove(prefix_path)
+            logger.info(f"Saved recording: {job.wav_path}")
+        except Exception as e:
+            job.status, job.error, job.finished_at = "failed", str(e), time.time()
+            logger.error(f"Failed to save WAV for {job.session_id}: {e}")
+            return
+        self._transcode(job)
+
+    def _transcode(self, job: TranscodeJob):
+        job.status = "transcoding"
+        extension = FORMATS[job.format][0]
+        output_path = os.path.join(self.recordings_dir, job.session_id + extension)
+        try:
+            job.output_bytes = self._encode(job.wav_path, output_path, job.format)
+            job.output_path = output_path
+            os.remove(job.wav_path)
+            job.wav_path = None
+            job.status = "done"
+            logger.info(f"Transcoded recording {job.session_id}: {job.wav_bytes} -> {job.output_bytes} bytes ({job.format})")
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+            logger.error(f"Transcoding {job.session_id} failed, keeping WAV: {e}")
+            try:
+                with open(failed_marker_path(job.wav_path), "w") as f:
+                    f.write(job.error)
+            except OSError as marker_error:
+                logger.error(f"Could not mark {job.wav_path} as failed: {marker_error}")
+        finally:
+            job.finished_at = time.time()
+        if job.status == "done":
+            self.enforce_retention()
+        if self.on_done is not None:
+            try:
+                self.on_done(job)
+            except Exception as e:
+                logger.error(f"Post-save hook failed for {job.session_id}: {e}")
+
+    def archive_files(self) -> list:
+        """Compressed recordings, oldest first."""
+        files = []
+        for extension, _, _ in FORMATS.values():
+            files.extend(glob.glob(os.path.join(self.recordings_dir, "*" + extension)))
+        return sorted(files, key=os.path.getmtime)
+
+    def enforce_retention(self) -> list:
+        """Delete the oldest compressed recordings until the archive fits; the newest is always kept."""
+        if self.max_archive_bytes is None:
+            return []
+        with self._lock:
+            files = self.archive_files()
+            sizes = {path: os.path.getsize(path) for path in files}
+            total = sum(sizes.values())
+            removed = []
+            for path in files[:-1]:
+                if total <= self.max_archive_bytes:
+                    break
+                os.remove(path)
+                total -= sizes[path]
+                removed.append(path)
+        for path in removed:
+            logger.info(f"Archive over {self.max_archive_bytes} bytes, deleted oldest recording {path}")
+        return removed
+
+    def shutdown(self, wait: bool = True):
+        if self._coordinator is not None:
+            self._coordinator.shutdown(wait=wait)
+            self._coordinator = None
+
+
+def main():
+    # Worker entry point: python -m backend.services.recordings.transcoder WAV OUTPUT FORMAT
+    wav_path, output_path, fmt = sys.argv[1:4]
+    if hasattr(os, "nice"):
+        os.nice(WORKER_NICENESS)
+    print(transcode_file(wav_path, output_path, fmt))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+try:
+    from backend.core.config import TRANSCRIPT_DB
+except ImportError:
+    TRANSCRIPT_DB = "transcripts.sqlite3"
+
+logger = logging.getLogger("server")
+
+SAMPLE_RATE = 16000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    start_sample INTEGER NOT NULL,
+    end_sample INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    model TEXT,
+    language TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_session ON segments (session_id, start_sample);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5 (text, content='segments', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS segments_ai AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TABLE IF NOT EXISTS enriched_segments (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    start_sample INTEGER NOT NULL,
+    end_sample INTEGER NOT NULL,
+    speaker INTEGER,
+    text TEXT NOT NULL,
+    model TEXT,
+    language TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS enriched_segments_session ON enriched_segments (session_id, start_sample);
+"""
+
+
+@dataclass
+class Segment:
+    session_id: str
+    start_sample: int   # Offsets into the session's recording (16 kHz samples)
+    end_sample: int
+    text: str
+    model: Optional[str] = None
+    language: Optional[str] = None
+    created_at: float = 0.0
+
+
+def samples_to_ms(samples: int) -> int:
+    return samples * 1000 // SAMPLE_RATE
+
+
+class TranscriptStore:
+    """
+    Append-only SQLite store of final segments with an FTS5 index.
+
+    append() only enqueues; a single writer thread inserts in batched
+    transactions, so the websocket loop never waits on disk. Reads use their
+    own connection and see committed batches (WAL mode lets them run while the
+    writer is busy).
+    """
+
+    def __init__(self, db_path: str = TRANSCRIPT_DB, batch_size: int = 256, flush_interval: float = 0.5):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._read_lock = threading.Lock()
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.close()
+        self._reader = self._connect()
+
+        # Counters only ever grow; appended is bumped on the event loop, the others by the writer
+        self.appended = 0
+        self.written = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def append(self, segment: Segment):
+        if not segment.created_at:
+            segment.created_at = time.time()
+        self.appended += 1
+        self._queue.put(segment)
+
+    def _run(self):
+        conn = self._connect()
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            stop = item is None  # close() sentinel
+            if batch:
+                self._write(conn, batch)
+        conn.close()
+
+    def _write(self, conn: sqlite3.Connection, batch: list):
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO segments (session_id, start_sample, end_sample, text, model, language, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(s.session_id, s.start_sample, s.end_sample, s.text, s.model, s.language, s.created_at) for s in batch],
+                )
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            self.dropped += len(batch)
+            logger.error(f"Transcript store write failed ({len(batch)} segments dropped): {e}")
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything appended so far is committed (or dropped); used by tests and shutdown."""
+        target = self.appended
+        deadline = time.monotonic() + timeout
+        while self.written + self.dropped < target:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> dict:
+        return {"appended": self.appended, "written": self.written, "dropped": self.dropped}
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5.0)
+        self._reader.close()
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> dict:
+        out = {
+            "id": row["id"],
+            "session_id": row["session_id"],
+            "start_ms": samples_to_ms(row["start_sample"]),
+            "end_ms": samples_to_ms(row["end_sample"]),
+            "text": row["text"],
+            "model": row["model"],
+            "language": row["language"],
+            "created_at": row["created_at"],
+        }
+        if "snippet" in row.keys():
+            out["snippet"] = row["snippet"]
+        return out
+
+    def search(self, query: str, session_id: Optional[str] = None, limit: int = 50) -> list:
+        """
+        Best-matching segments for an FTS5 query (e.g. `latency`, `"final pass"`,
+        `kube*`). Raises ValueError on malformed query syntax.
+        """
+        sql = (
+            "SELECT s.*, snippet(segments_fts, 0, '[', ']', '…', 12) AS snippet "
+            "FROM segments_fts JOIN segments s ON s.id = segments_fts.rowid "
+            "WHERE segments_fts MATCH ?"
+        )
+        params = [query]
+        if session_id:
+            sql += " AND s.session_id = ?"
+            params.append(session_id)
+        sql += " ORDER BY bm25(segments_fts) LIMIT ?"
+        params.append(limit)
+        try:
+            with self._read_lock:
+                rows = self._reader.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query: {e}")
+        return [self._row(r) for r in rows]
+
+    def replace_enriched(self, session_id: str, rows: list, model: str = None, language: str = None):
+        """
+        Store the post-session transcript of a session (dicts with start_sample,
+        end_sample, text and speaker), replacing any earlier one. Rare and off the
+        event loop, so it writes directly instead of through the writer queue.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM enriched_segments WHERE session_id = ?", (session_id,))
+                conn.executemany(
+                    "INSERT INTO enriched_segments (session_id, start_sample, end_sample, speaker, text, model, language, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(session_id, r["start_sample"], r["end_sample"], r.get("speaker"), r["text"], model, language, now) for r in rows],
+                )
+        finally:
+            conn.close()
+
+    def enriched_segments(self, session_id: str) -> list:
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT * FROM enriched_segments WHERE session_id = ? ORDER BY start_sample", (session_id,)
+            ).fetchall()
+        return [dict(self._row(r), speaker=r["speaker"]) for r in rows]
+
+    def session_language(self, session_id: str) -> Optional[str]:
+        """Language of a session's live transcript (its last segment), if any."""
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT language FROM segments WHERE session_id = ? ORDER BY start_sample DESC LIMIT 1", (session_id,)
+            ).fetchone()
+        return row["language"] if row else None
+
+    def session_segments(self, session_id: str) -> list:
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT * FROM segments WHERE session_id = ? ORDER BY start_sample", (session_id,)
+            ).fetchall()
+        return [self._row(r) for r in rows]
@@ -0,0 +1,116 @@
+import logging
+import secrets
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+logger = logging.getLogger("server")
+
+
+def new_resume_token() -> str:
+    return secrets.token_urlsafe(16)
+
+
+class ReplayLog:
+    """
+    Finals (and final translations) a session sent, newest `size` kept, so a
+    client that reconnects can be sent what it missed: every message whose
+    segment is after the last one it saw. Messages are recorded before they are
+    sent, so a send that failed because the socket dropped is replayed too.
+    """
+
+    def __init__(self, size: int = 50):
+        self._messages = deque(maxlen=size)
+
+    def record(self, message: dict):
+        self._messages.append(message)
+
+    def since(self, last_segment: int) -> list:
+        return [message for message in self._messages if message["segment"] > last_segment]
+
+    def __len__(self):
+        return len(self._messages)
+
+
+@dataclass
+class ParkedSession:
+    """
+    A session whose socket dropped: its model binding and admission slot,
+    recognizer stream (decoder context, buffered audio, any utterance in
+    progress) and place in the recording, kept until the client comes back
+    with the token or the TTL runs out.
+    """
+    session_id: str
+    token: str
+    model_name: Optional[str]
+    language: str
+    service: Any
+    pool: Any
+    stream: Any
+    rechunker: Any
+    detector: Any
+    gate: Any
+    snapshot: Any
+    recorded_samples: int
+    segment_start: Optional[int]
+    segment_index: int
+    stream_params: dict
+    replay: ReplayLog
+    translations: set = field(default_factory=set)  # Final translations still running; they land in `replay`
+    parked_at: float = field(default_factory=time.monotonic)
+
+
+class SessionParking:
+    """Parked sessions by session id, claimed with their resume token or expired after `ttl` seconds."""
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._sessions = {}
+        self.parked = 0
+        self.resumed = 0
+        self.expired_sessions = 0
+
+    def park(self, session: ParkedSession):
+        self._sessions[session.session_id] = session
+        self.parked += 1
+        logger.info(f"Session {session.session_id} parked for {self.ttl:.0f}s ({session.segment_index} segments)")
+
+    def claim(self, session_id: str, token: Optional[str]) -> Optional[ParkedSession]:
+        """The parked session if `token` matches it; a wrong token leaves it parked."""
+        session = self._sessions.get(session_id)
+        if session is None or not token or not secrets.compare_digest(session.token, token):
+            return None
+        del self._sessions[session_id]
+        self.resumed += 1
+        return session
+
+    def take(self, session_id: Optional[str]) -> Optional[ParkedSession]:
+        """Remove a parked session regardless of token (memory pressure)."""
+        return self._sessions.pop(session_id, None)
+
+    def expired(self, now: float = None) -> list:
+        now = time.monotonic() if now is None else now
+        expired = [s for s in self._sessions.values() if now - s.parked_at >= self.ttl]
+        for session in expired:
+            del self._sessions[session.session_id]
+        self.expired_sessions += len(expired)
+        return expired
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "ttl": self.ttl,
+            "parked_sessions": len(self._sessions),
+            "parked": self.parked,
+            "resumed": self.resumed,
+            "expired": self.expired_sessions,
+            "sessions": [{"session_id": s.session_id, "model": s.model_name, "segments": s.segment_index,
+                          "parked_seconds": round(now - s.parked_at, 1)} for s in self._sessions.values()],
+        }
@@ -7,45 +7,52 @@ import sys
 # Ensure backend modules can be found
 try:
     from .mlx_whisper_service import MlxWhisperService
+    from .zipformer import ZIPFORMER_MODELS, create_online_recognizer
     from backend.core.config import MODEL_DIR
-    from backend.utils.text_processing import beautify_text
+    from backend.core.runtime_config import get_runtime_config
+    from backend.core.tracing import span
+    from backend.utils.text_processing import beautify_text, IncrementalBeautifier
 except ImportError:
     # Fallback or strict import
     from mlx_whisper_service import MlxWhisperService
+    from zipformer import ZIPFORMER_MODELS, create_online_recognizer
     from backend.core.config import MODEL_DIR
-    from backend.utils.text_processing import beautify_text
+    from backend.core.runtime_config import get_runtime_config
+    from backend.core.tracing import span
+    from backend.utils.text_processing import beautify_text, IncrementalBeautifier
     # MODEL_DIR = "models" 
 
 logger = logging.getLogger("server")
 
 class HybridService:
-    def __init__(self):
-        logger.info("Initializing Hybrid Service (Zipformer + MLX Whisper)...")
+    # Admission cost per session (host capacity units): Zipformer streaming + Whisper final pass
+    SESSION_COST = 2.0
+    MAX_SESSIONS = None
+    # Ingest is regrouped into multiples of this: one chunk-16 Zipformer decode (32 feature frames, 320 ms)
+    FRAME_SAMPLES = 5120
+    # Spoken languages whose streaming Zipformer is installed; Whisper handles all of them.
+    # Routing relies on this, so a language without its model falls back instead of failing to load.
+    LANGUAGES = tuple(language for language, model_dir in ZIPFORMER_MODELS.items() if os.path.isdir(model_dir))
+    # The CT-Transformer punctuation model is Chinese/English only
+    PUNCTUATION_LANGUAGES = ("en", "zh")
+
+    def __init__(self, config=None, language: str = "en"):
+        logger.info(f"Initializing Hybrid Service (Zipformer + MLX Whisper), language {language}...")
+        self.config = config or get_runtime_config()
+        self.language = language
         
         # 1. Initialize MLX Whisper (for Final determination)
-        self.mlx_whisper_service = MlxWhisperService()
+        self.mlx_whisper_service = MlxWhisperService(config=self.config, language=language)
         
         # 2. Initialize Zipformer (for Real-time Preview)
-        model_dir = os.path.join(MODEL_DIR, "asr", "sherpa-onnx-streaming-zipformer-en-2023-06-26")
-        tokens_path = os.path.join(model_dir, "tokens.txt")
-        encoder_path = os.path.join(model_dir, "encoder-epoch-99-avg-1-chunk-16-left-128.int8.onnx")
-        decoder_path = os.path.join(model_dir, "decoder-epoch-99-avg-1-chunk-16-left-128.int8.onnx")
-        joiner_path = os.path.join(model_dir, "joiner-epoch-99-avg-1-chunk-16-left-128.int8.onnx")
-        
-        logger.info(f"Loading Zipformer model from {model_dir}")
-        self.online_recognizer = sherpa_onnx.OnlineRecognizer.from_transducer(
-            tokens=tokens_path,
-            encoder=encoder_path,
-            decoder=decoder_path,
-            joiner=joiner_path,
-            num_threads=1,
-            sample_rate=16000,
-            feature_dim=80,
-            decoding_method="greedy_search",
-            provider="cpu"
-        )
+        self.online_recognizer = create_online_recognizer(num_threads=self.config.zipformer.num_threads,
+                                                          model_dir=ZIPFORMER_MODELS[language])
         
         # 3. Initialize Punctuation
+        self.punct_model = None
+        if language not in self.PUNCTUATION_LANGUAGES:
+            logger.info("Hybrid Service initialized (no punctuation model for this language).")
+            return
         punct_model_dir = os.path.join(MODEL_DIR, "punctuation", "sherpa-onnx-punct-ct-transformer-zh-en-vocab272727-2024-04-12")
         punct_model_path = os.path.join(punct_model_dir, "model.onnx")
         if not os.path.exists(punct_model_path):
@@ -57,6 +64,7 @@ class HybridService:
         try:
             punct_config = sherpa_onnx.OfflinePunctuationConfig()
             punct_config.model.ct_transformer = punct_model_path
+            punct_config.model.num_threads = self.config.punctuation.num_threads
             self.punct_model = sherpa_onnx.OfflinePunctuation(punct_config)
             logger.info("Punctuation model loaded successfully.")
         except Exception as e:
@@ -65,8 +73,8 @@ class HybridService:
             
         logger.info("Hybrid Service initialized.")
 
-    def create_stream(self):
-        return HybridStream(self.mlx_whisper_service, self.online_recognizer, self.punct_model)
+    def create_stream(self, taps=None):
+        return HybridStream(self.mlx_whisper_service, self.online_recognizer, self.punct_model, taps=taps)
 
     def process_audio(self, samples: np.ndarray, stream=None) -> list:
         if stream is None:
@@ -74,10 +82,19 @@ class HybridService:
         
         return stream.accept_waveform(samples)
 
+    def finalize(self, stream=None) -> list:
+        return stream.finalize() if stream is not None else []
+
+    def configure(self, stream, **params) -> dict:
+        return stream.configure(**params)
+
+    def memory_usage(self, stream) -> dict:
+        return stream.memory_usage() if stream is not None else {}
+
 class HybridStream:
-    def __init__(self, mlx_whisper_service, online_recognizer, punct_model):
+    def __init__(self, mlx_whisper_service, online_recognizer, punct_model, taps=None):
         # Stream for MLX Whisper (Buffered)
-        self.mlx_stream = mlx_whisper_service.create_stream()
+        self.mlx_stream = mlx_whisper_service.create_stream(taps=taps)
         
         # Stream for Zipformer (Real-time)
         self.online_stream = online_recognizer.create_stream()
@@ -87,6 +104,13 @@ class HybridStream:
         self.punct_model = punct_model
         
         self.last_zipformer_text = ""
+        # Re-beautifies only the part of each growing partial after its last complete sentence
+        self.beautifier = IncrementalBeautifier()
+        self.taps = taps # Optional SessionTaps for diagnostic capture
+        # Minimum audio seconds between partials (0 = on every change); clients can raise it
+        self.partial_interval = 0.0
+        self.since_partial = 0.0
+        self.online_samples = 0  # Fed to the Zipformer stream since it was last re-created
 
     def accept_waveform(self, samples: np.ndarray) -> list:
         results = []
@@ -103,18 +127,24 @@ class HybridStream:
                 results.append(res) # Add Final result to output
         
         if final_mlx_result:
-            # Re-create the online stream to clear context
-            self.online_stream = self.online_recognizer.create_stream()
-            self.last_zipformer_text = ""
+            self._reset_partial()
             # We don't need to add anything else, the Final result replaces everything.
             return results
 
         # --- 2. Feed Zipformer (Real-time) ---
+        if self.taps is not None:
+            self.taps.capture("post_gain", samples)
         self.online_stream.accept_waveform(16000, samples)
+        self.online_samples += len(samples)
         
         if self.online_recognizer.is_ready(self.online_stream):
-            self.online_recognizer.decode_stream(self.online_stream)
+            with span("zipformer_decode"):
+                self.online_recognizer.decode_stream(self.online_stream)
                  
+        self.since_partial += len(samples) / 16000.0
+        if self.since_partial < self.partial_interval:
+            return results
+
         # Regular Result Check
         result = self.online_recognizer.get_result(self.online_stream)
         if isinstance(result, str):
@@ -130,14 +160,8 @@ class HybridStream:
             if self.punct_model:
                 # Add punctuation to the text
                 try:
-                    # Step 1: Lowercase input to help punctuation model
-                    input_to_punct = zipformer_text.lower()
-                    
-                    # Step 2: Apply punctuation
-                    punctuated_text = self.punct_model.add_punctuation(input_to_punct)
-                    
-                    # Step 3: Verify & Beautify (Normalization + Casing)
-                    display_text = beautify_text(punctuated_text)
+                    with span("punctuation", words=zipformer_text.count(" ") + 1):
+                        display_text = self._punctuate(zipformer_text)
                     
                 except Exception as e:
                     logger.error(f"Punctuation/Beautify failed: {e}")
@@ -148,11 +172,50 @@ class HybridStream:
                  # Even if no punctuation model, still beautify
                  display_text = beautify_text(zipformer_text)
                 
-            logger.info(f"Zipformer emitting: {display_text}")
+            logger.info(f"Zipformer emitting: {display_text}", extra={"event": "partial"})
             results.append({
                 "text": display_text, 
                 "is_final": False # Always interim
             })
             self.last_zipformer_text = zipformer_text
+            self.since_partial = 0.0
             
         return results
+
+    def finalize(self) -> list:
+        """Final for the buffered utterance now, without waiting for the silence trigger (flush / end of stream)."""
+        results = self.mlx_stream.finalize()
+        if results:
+            self._reset_partial()
+        return results
+
+    def configure(self, partial_interval: float = None, **params) -> dict:
+        """Change partial rate and final-pass triggers mid-session; returns the current values."""
+        if partial_interval is not None:
+            if partial_interval < 0:
+                raise ValueError("partial_interval must not be negative")
+            self.partial_interval = float(partial_interval)
+        return {"partial_interval": self.partial_interval, **self.mlx_stream.configure(**params)}
+
+    def memory_usage(self) -> dict:
+        # The Zipformer stream's state lives in sherpa-onnx; estimate it from its 80-dim float32 fbank frames (10 ms hop)
+        return {**self.mlx_stream.memory_usage(), "zipformer_features": self.online_samples // 160 * 80 * 4}
+
+    def _reset_partial(self):
+        # Re-create the online stream to clear context
+        self.online_stream = self.online_recognizer.create_stream()
+        self.online_samples = 0
+        self.last_zipformer_text = ""
+        self.since_partial = 0.0
+        self.beautifier.reset()
+
+    def _punctuate(self, zipformer_text: str) -> str:
+        # A method of its own so the sampling profiler can attribute punctuation time
+        # Step 1: Lowercase input to help punctuation model
+        input_to_punct = zipformer_text.lower()
+
+        # Step 2: Apply punctuation
+        punctuated_text = self.punct_model.add_punctuation(input_to_punct)
+
+        # Step 3: Verify & Beautify (Normalization + Casing)
+        return self.beautifier.process(punctuated_text)
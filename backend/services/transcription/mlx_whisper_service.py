@@ -3,18 +3,33 @@ import time
 import sherpa_onnx
 import numpy as np
 import os
-import mlx_whisper
 
 try:
-    from backend.core.config import MODEL_DIR
+    import mlx_whisper
 except ImportError:
-    MODEL_DIR = "models"
+    # Apple Silicon only. Streams can still be constructed (e.g. for benchmarks with a
+    # stubbed _transcribe), but MlxWhisperService refuses to start without it.
+    mlx_whisper = None
+
+from backend.core.config import MODEL_DIR
+from backend.core.runtime_config import get_runtime_config
+from backend.core.tracing import instant, span
 
 logger = logging.getLogger("server")
 
 class MlxWhisperService:
-    def __init__(self):
+    def __init__(self, config=None, language: str = "en"):
+        if mlx_whisper is None:
+            raise ImportError("mlx-whisper is not installed (requires Apple Silicon)")
         logger.info("Initializing MLX Whisper Service...")
+        runtime = config or get_runtime_config()
+        self.config = runtime.mlx_whisper
+        self.language = language
+        # The silence gate forwards only `hangover` seconds of silence after speech; a longer trigger never fires
+        self.max_silence_trigger = runtime.gate.hangover if runtime.gate.enabled else None
+        if self.max_silence_trigger is not None and self.config.silence_trigger >= self.max_silence_trigger:
+            logger.warning(f"mlx_whisper.silence_trigger ({self.config.silence_trigger}s) is not shorter than the "
+                           f"silence gate hangover ({self.max_silence_trigger}s); finals will wait for max_buffer_duration")
         
         # 1. Model Configuration
         # We don't explicitly "load" the model object in __init__ for mlx_whisper 
@@ -31,11 +46,30 @@ class MlxWhisperService:
         
         # 2. Buffer State (VAD is now RMS-based, no external model loaded)
         self.sample_rate = 16000
-        self.max_buffer_duration = 10.0 
+        self.max_buffer_duration = self.config.max_buffer_duration
         
-    def create_stream(self):
+    def create_stream(self, taps=None):
         # Create explicit stream with clean state
-        return MlxWhisperStream(self.model_path, self.initial_prompt, self.max_buffer_duration)
+        return MlxWhisperStream(
+            self.model_path,
+            self.initial_prompt,
+            self.max_buffer_duration,
+            taps=taps,
+            silence_trigger=self.config.silence_trigger,
+            speech_threshold=self.config.speech_threshold,
+            lookback_seconds=self.config.lookback_seconds,
+            language=self.language,
+            max_silence_trigger=self.max_silence_trigger,
+        )
+
+    def finalize(self, stream=None) -> list:
+        return stream.finalize() if stream is not None else []
+
+    def configure(self, stream, **params) -> dict:
+        return stream.configure(**params)
+
+    def memory_usage(self, stream) -> dict:
+        return stream.memory_usage() if stream is not None else {}
 
     def process_audio(self, samples: np.ndarray, stream=None) -> list:
         if stream is None:
@@ -45,10 +79,14 @@ class MlxWhisperService:
         return results
 
 class MlxWhisperStream:
-    def __init__(self, model_path, initial_prompt, max_buffer_duration):
+    def __init__(self, model_path, initial_prompt, max_buffer_duration, taps=None,
+                 silence_trigger=0.6, speech_threshold=0.01, lookback_seconds=1.0, language="en",
+                 max_silence_trigger=None):
         self.model_path = model_path
+        self.language = language
         self.initial_prompt = initial_prompt
         self.max_buffer_duration = max_buffer_duration
+        self.taps = taps # Optional SessionTaps for diagnostic capture
         
         self.buffer = np.array([], dtype=np.float32)
         self.buffer_duration = 0.0
@@ -56,7 +94,10 @@ class MlxWhisperStream:
         # Manual VAD State (RMS Based)
         self.silence_counter = 0.0
         self.is_speech_active = False
-        self.speech_threshold = 0.01
+        self.speech_threshold = speech_threshold
+        self.silence_trigger = silence_trigger # Seconds of silence after speech that trigger a final
+        self.max_silence_trigger = max_silence_trigger # Silence the stream can see at most (gate hangover), if bounded
+        self.lookback_seconds = lookback_seconds
 
         # Overlap State
         self.prev_chunk_tail = np.array([], dtype=np.float32)
@@ -92,11 +133,13 @@ class MlxWhisperStream:
             
         # Debug Log periodically (every ~1 second)
         if len(self.buffer) % 16000 == 0: 
-             logger.info(f"Buf: {self.buffer_duration:.2f}s, RMS: {rms:.4f}, Active: {self.is_speech_active}, Sil: {self.silence_counter:.2f}s")
+             logger.info(f"Buf: {self.buffer_duration:.2f}s, RMS: {rms:.4f}, Active: {self.is_speech_active}, Sil: {self.silence_counter:.2f}s",
+                         extra={"event": "buffer_stats"})
 
-        # Trigger Rule: We had speech recently, and now we have >0.6s silence
-        if self.is_speech_active and self.silence_counter > 0.6:
+        # Trigger Rule: We had speech recently, and now we have > silence_trigger (0.6s) silence
+        if self.is_speech_active and self.silence_counter > self.silence_trigger:
              logger.info(f"VAD Silence Triggered (RMS). Buffer: {self.buffer_duration:.2f}s")
+             instant("rms_trigger", buffer_seconds=round(self.buffer_duration, 2))
              should_decode = True
              self.is_speech_active = False # Reset state
              self.silence_counter = 0.0
@@ -104,6 +147,7 @@ class MlxWhisperStream:
         # Priority 2: Max Duration Timeout
         if self.buffer_duration >= self.max_buffer_duration:
             logger.info(f"Max Duration Triggered. Buffer: {self.buffer_duration:.2f}s")
+            instant("max_duration_trigger", buffer_seconds=round(self.buffer_duration, 2))
             should_decode = True
             
         if should_decode and len(self.buffer) > 0:
@@ -111,6 +155,24 @@ class MlxWhisperStream:
             
         return results
 
+    def configure(self, silence_trigger: float = None, speech_threshold: float = None,
+                  max_buffer_duration: float = None) -> dict:
+        """Change trigger parameters mid-session (client control frame); returns the current values."""
+        for name, value in (("silence_trigger", silence_trigger), ("speech_threshold", speech_threshold),
+                            ("max_buffer_duration", max_buffer_duration)):
+            if value is not None:
+                if value <= 0:
+                    raise ValueError(f"{name} must be positive")
+                if name == "silence_trigger" and self.max_silence_trigger is not None and value >= self.max_silence_trigger:
+                    raise ValueError(f"silence_trigger must be shorter than the silence gate hangover "
+                                     f"({self.max_silence_trigger}s), or finals never fire")
+                setattr(self, name, float(value))
+        return {"silence_trigger": self.silence_trigger, "speech_threshold": self.speech_threshold,
+                "max_buffer_duration": self.max_buffer_duration}
+
+    def memory_usage(self) -> dict:
+        return {"audio_buffer": self.buffer.nbytes, "lookback": self.prev_chunk_tail.nbytes}
+
     def finalize(self) -> list:
         """Force finalize (transcribe) current buffer if meaningful."""
         if len(self.buffer) / 16000.0 > 0.5: # Only transcribe if buffer > 0.5s
@@ -129,14 +191,18 @@ class MlxWhisperStream:
         else:
             audio_to_transcribe = self.buffer
 
+        if self.taps is not None:
+            self.taps.capture("pre_final", audio_to_transcribe)
+
         # Transcribe
-        text = self._transcribe(audio_to_transcribe)
+        with span("final_transcribe", audio_seconds=round(len(audio_to_transcribe) / 16000.0, 2)):
+            text = self._transcribe(audio_to_transcribe)
         if text.strip():
             results.append({"text": text, "is_final": True})
         
         # Save Tail for Next Chunk (Lookback)
-        # Keep last 1.0s (16000 samples)
-        lookback_samples = 16000
+        # Keep last lookback_seconds (1.0s = 16000 samples by default)
+        lookback_samples = int(self.lookback_seconds * 16000)
         if len(self.buffer) > lookback_samples:
             self.prev_chunk_tail = self.buffer[-lookback_samples:]
         else:
@@ -161,7 +227,7 @@ class MlxWhisperStream:
             result = mlx_whisper.transcribe(
                 audio_data,
                 path_or_hf_repo=self.model_path,
-                language="en", 
+                language=self.language,
                 initial_prompt=self.initial_prompt,
                 # Hallucination Suppression Parameters
                 condition_on_previous_text=False,
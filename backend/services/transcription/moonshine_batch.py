@@ -0,0 +1,171 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger("server")
+
+
+class _DecodeRequest:
+    __slots__ = ("audio", "final", "text", "decode_seconds", "error", "done")
+
+    def __init__(self, audio: np.ndarray, final: bool):
+        self.audio = audio
+        self.final = final
+        self.text = ""
+        self.decode_seconds = 0.0
+        self.error = None
+        self.done = threading.Event()
+
+
+class MoonshineBatchScheduler:
+    """
+    Groups Moonshine decode requests from all sessions into batched ONNX runs.
+
+    Streams call decode() from their worker thread and block until the result is
+    ready. A single scheduler thread collects requests for up to max_wait seconds
+    (or until max_batch_size are queued), takes finals before interims, sorts the
+    batch by length and splits it wherever padding would exceed max_padding_ratio,
+    then runs each group through recognizer.decode_streams().
+
+    Decode time is wall-clock per group: onnxruntime runs the model on its own
+    intra-op threads, which the scheduler thread's CPU time would not include.
+    """
+
+    def __init__(self, recognizer, max_batch_size: int = 8, max_wait: float = 0.01, max_padding_ratio: float = 2.0):
+        self.recognizer = recognizer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_padding_ratio = max_padding_ratio
+
+        self._finals = deque()
+        self._interims = deque()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+        # Throughput counters
+        self.batches = 0
+        self.requests = 0
+        self.audio_seconds = 0.0
+        self.decode_seconds = 0.0
+
+    def decode(self, audio: np.ndarray, final: bool = False) -> _DecodeRequest:
+        """
+        Queue audio for decoding and block until its batch has run.
+        Returns the completed request (text and attributed decode_seconds).
+        """
+        request = _DecodeRequest(audio, final)
+        with self._cond:
+            self._ensure_started()
+            (self._finals if final else self._interims).append(request)
+            self._cond.notify()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "audio_seconds": self.audio_seconds,
+            "decode_seconds": self.decode_seconds,
+            "audio_seconds_per_decode_second": self.audio_seconds / self.decode_seconds if self.decode_seconds else 0.0,
+        }
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def _ensure_started(self):
+        # Called with self._cond held
+        if self._thread is None or not self._thread.is_alive():
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="moonshine-batch", daemon=True)
+            self._thread.start()
+
+    def _pending(self) -> int:
+        return len(self._finals) + len(self._interims)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending() and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    break
+
+                # Give other sessions a short window to join this batch
+                deadline = time.monotonic() + self.max_wait
+                while self._pending() < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                # Finals have priority; interims fill the remaining slots oldest-first
+                batch = []
+                while self._finals and len(batch) < self.max_batch_size:
+                    batch.append(self._finals.popleft())
+                while self._interims and len(batch) < self.max_batch_size:
+                    batch.append(self._interims.popleft())
+
+            for group in self._group_by_length(batch):
+                self._decode_group(group)
+
+        # Fail anything still queued at shutdown so no caller blocks forever
+        with self._cond:
+            leftover = list(self._finals) + list(self._interims)
+            self._finals.clear()
+            self._interims.clear()
+        for request in leftover:
+            request.error = RuntimeError("Moonshine batch scheduler stopped")
+            request.done.set()
+
+    def _group_by_length(self, batch: list) -> list:
+        batch = sorted(batch, key=lambda r: len(r.audio))
+        groups = []
+        for request in batch:
+            if groups and len(request.audio) <= self.max_padding_ratio * max(len(groups[-1][0].audio), 1):
+                groups[-1].append(request)
+            else:
+                groups.append([request])
+        return groups
+
+    def _decode_group(self, group: list):
+        start = time.perf_counter()
+        try:
+            streams = []
+            for request in group:
+                stream = self.recognizer.create_stream()
+                stream.accept_waveform(16000, request.audio)
+                streams.append(stream)
+            self.recognizer.decode_streams(streams)
+            for request, stream in zip(group, streams):
+                request.text = stream.result.text
+        except Exception as e:
+            logger.error(f"Moonshine batch decode failed ({len(group)} streams): {e}")
+            for request in group:
+                request.error = e
+        elapsed = time.perf_counter() - start
+
+        # Attribute the group's decode time to requests in proportion to their audio length
+        total_samples = sum(len(r.audio) for r in group) or 1
+        for request in group:
+            request.decode_seconds = elapsed * len(request.audio) / total_samples
+
+        self.batches += 1
+        self.requests += len(group)
+        self.audio_seconds += total_samples / 16000.0
+        self.decode_seconds += elapsed
+
+        for request in group:
+            request.done.set()
@@ -4,15 +4,27 @@ import sherpa_onnx
 import numpy as np
 import os
 
+from backend.core.config import MODEL_DIR
+from backend.core.runtime_config import get_runtime_config
+from backend.core.tracing import instant, span
+
 try:
-    from backend.core.config import MODEL_DIR
+    from .moonshine_batch import MoonshineBatchScheduler
 except ImportError:
-    MODEL_DIR = "models"
+    from moonshine_batch import MoonshineBatchScheduler
 
 logger = logging.getLogger("server")
 
 class MoonshineService:
-    def __init__(self, model_dir: str = None):
+    # Admission cost per session (host capacity units): VAD + batched offline decodes
+    SESSION_COST = 1.0
+    MAX_SESSIONS = None
+    # Ingest is regrouped into multiples of this: the Silero VAD window
+    FRAME_SAMPLES = 512
+    LANGUAGES = ("en",)
+
+    def __init__(self, model_dir: str = None, config=None, language: str = "en"):
+        self.config = (config or get_runtime_config()).moonshine
         if model_dir is None:
             model_dir = os.path.join(MODEL_DIR, "asr", "sherpa-onnx-moonshine-base-en-int8")
         logger.info("Initializing Moonshine Service...")
@@ -26,7 +38,7 @@ class MoonshineService:
                 uncached_decoder=f"{model_dir}/uncached_decode.int8.onnx",
                 cached_decoder=f"{model_dir}/cached_decode.int8.onnx",
                 tokens=f"{model_dir}/tokens.txt",
-                num_threads=2,
+                num_threads=self.config.num_threads,
                 debug=False
              )
         except Exception as e:
@@ -34,24 +46,40 @@ class MoonshineService:
              raise
         logger.info("Moonshine OfflineRecognizer loaded.")
 
+        # Cross-session batching: all streams share one scheduler feeding decode_streams().
+        # Off by default: sherpa-onnx decodes offline Moonshine streams one at a time, so a single
+        # scheduler thread serializes decodes that otherwise run in parallel on worker threads.
+        self.scheduler = None
+        if self.config.batch_decoding:
+            self.scheduler = MoonshineBatchScheduler(
+                self.recognizer,
+                max_batch_size=self.config.max_batch_size,
+                max_wait=self.config.batch_max_wait,
+            )
+
         # 2. VAD Setup (Reusing Silero VAD)
+        # VAD is stateful, so each stream gets its own detector built from this config.
         vad_config = sherpa_onnx.VadModelConfig()
         vad_config.silero_vad.model = os.path.join(MODEL_DIR, "vad", "silero_vad.onnx")
         vad_config.silero_vad.threshold = 0.5
         vad_config.silero_vad.min_silence_duration = 0.5
         vad_config.silero_vad.min_speech_duration = 0.25
         vad_config.sample_rate = 16000
-        self.vad = sherpa_onnx.VoiceActivityDetector(
-            config=vad_config,
-            buffer_size_in_seconds=60
-        )
+        self.vad_config = vad_config
         
         # 3. Buffer State
         self.sample_rate = 16000
-        self.max_buffer_duration = 7.0  # Force trigger after 7 seconds (Fail-safe)
+        self.max_buffer_duration = self.config.max_buffer_duration  # Force trigger after 7 seconds (Fail-safe)
         
-    def create_stream(self, enable_interim_results: bool = True):
-        return MoonshineStream(self.recognizer, self.vad, self.max_buffer_duration, enable_interim_results)
+    def create_stream(self, enable_interim_results: bool = True, taps=None):
+        vad = sherpa_onnx.VoiceActivityDetector(
+            config=self.vad_config,
+            buffer_size_in_seconds=60
+        )
+        return MoonshineStream(
+            self.recognizer, vad, self.max_buffer_duration, enable_interim_results, taps=taps, scheduler=self.scheduler,
+            interim_interval=self.config.interim_interval, max_interim_interval=self.config.max_interim_interval,
+        )
 
     def process_audio(self, samples: np.ndarray, stream=None) -> list:
         if stream is None:
@@ -60,8 +88,32 @@ class MoonshineService:
         results = stream.accept_waveform(samples)
         return results
 
+    def finalize(self, stream=None) -> list:
+        return stream.finalize() if stream is not None else []
+
+    def configure(self, stream, **params) -> dict:
+        return stream.configure(**params)
+
+    def memory_usage(self, stream) -> dict:
+        return stream.memory_usage() if stream is not None else {}
+
+def _norm_word(word: str) -> str:
+    # Comparison key for local agreement: ignore casing and trailing punctuation
+    return word.lower().strip(".,?!;:\"'")
+
+
 class MoonshineStream:
-    def __init__(self, recognizer, vad, max_buffer_duration, enable_interim_results=True):
+    # Local agreement: lock the agreed prefix only when the window is long enough
+    # to be worth shrinking, and keep the last agreed word(s) unlocked as margin.
+    MIN_WINDOW_TO_LOCK = 1.5
+    LOCK_MARGIN_WORDS = 1
+    # Cut the window slightly before the estimated prefix boundary; the overlap
+    # is removed again by matching the locked tail against the new hypothesis.
+    LOCK_BACKOFF = 0.2
+    LOCK_SEARCH = 0.25 # search +-0.25s for the quietest 20ms frame to cut at
+
+    def __init__(self, recognizer, vad, max_buffer_duration, enable_interim_results=True, taps=None, scheduler=None,
+                 interim_interval=0.5, max_interim_interval=2.0):
         self.recognizer = recognizer
         self.vad = vad
         self.max_buffer_duration = max_buffer_duration
@@ -69,7 +121,23 @@ class MoonshineStream:
         self.buffer = np.array([], dtype=np.float32)
         self.buffer_duration = 0.0
         self.last_interim_duration = 0.0
-        self.interim_interval = 0.5 # 0.5s
+        # Seconds of audio between interim decodes; adaptive, backs off under load
+        self.min_interim_interval = interim_interval
+        self.max_interim_interval = max_interim_interval
+        self.interim_interval = interim_interval
+        self.taps = taps # Optional SessionTaps for diagnostic capture
+        self.scheduler = scheduler # Optional MoonshineBatchScheduler shared across sessions
+
+        # Incremental interim state (reset on every final)
+        self.locked_words = []    # Agreed-upon prefix, never re-decoded
+        self.window_start = 0     # Sample offset in buffer where the re-decoded window begins
+        self.prev_hypothesis = [] # Words decoded from the window on the previous interim
+
+        # Per-session interim cost accounting
+        self.interim_decodes = 0
+        self.interim_audio_seconds = 0.0
+        self.interim_wall_seconds = 0.0
+        self.interim_decode_seconds = 0.0
 
     def accept_waveform(self, samples: np.ndarray) -> list:
         results = []
@@ -98,39 +166,180 @@ class MoonshineStream:
              if not self.vad.is_speech_detected():
                  if self.buffer_duration > 0.5:
                      should_decode = True
+                     instant("vad_trigger", buffer_seconds=round(self.buffer_duration, 2))
 
         # Priority 2: Fail-safe Timeout (Long Continuous Speech)
         if self.buffer_duration >= self.max_buffer_duration:
              should_decode = True
+             instant("max_duration_trigger", buffer_seconds=round(self.buffer_duration, 2))
         
         # Priority 3: Interim Results (Real-time Feedback)
         # Only if NOT committing and we have new data since last interim
         if self.enable_interim_results and not should_decode and self.buffer_duration - self.last_interim_duration >= self.interim_interval:
             if self.buffer_duration > 0.2: # Minimum buffer to avoid garbage
-                 stream = self.recognizer.create_stream()
-                 stream.accept_waveform(16000, self.buffer)
-                 self.recognizer.decode_stream(stream)
-                 text = stream.result.text
-                 if text.strip():
+                 text = self._interim()
+                 if text:
                      results.append({"text": text, "is_final": False})
-                     self.last_interim_duration = self.buffer_duration
 
         if should_decode and len(self.buffer) > 0:
-            # Decode the buffer (Final)
-            stream = self.recognizer.create_stream()
-            stream.accept_waveform(16000, self.buffer)
-            self.recognizer.decode_stream(stream)
-            text = stream.result.text
-            
-            if text.strip():
-                results.append({"text": text, "is_final": True})
-            
-            # Clear buffer
-            self.buffer = np.array([], dtype=np.float32)
-            self.buffer_duration = 0.0
-            self.last_interim_duration = 0.0 # Reset interim tracker
-            
-            # Reset VAD to avoid carry-over state issues
-            self.vad.reset()
+            results.extend(self._final())
+
+        return results
+
+    def finalize(self) -> list:
+        """Final for the buffered utterance now, without waiting for VAD (flush / end of stream)."""
+        return self._final() if len(self.buffer) > 0 else []
+
+    def configure(self, interim_interval: float = None, max_interim_interval: float = None,
+                  max_buffer_duration: float = None, interim_results: bool = None) -> dict:
+        """Change interim rate and the fail-safe final trigger mid-session; returns the current values."""
+        for name, value in (("interim_interval", interim_interval), ("max_interim_interval", max_interim_interval),
+                            ("max_buffer_duration", max_buffer_duration)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive")
+        if interim_interval is not None:
+            # Restart the adaptive interval from the new floor
+            self.min_interim_interval = self.interim_interval = float(interim_interval)
+        if max_interim_interval is not None:
+            self.max_interim_interval = float(max_interim_interval)
+        self.max_interim_interval = max(self.max_interim_interval, self.min_interim_interval)
+        if max_buffer_duration is not None:
+            self.max_buffer_duration = float(max_buffer_duration)
+        if interim_results is not None:
+            self.enable_interim_results = bool(interim_results)
+        return {"interim_interval": self.min_interim_interval, "max_interim_interval": self.max_interim_interval,
+                "max_buffer_duration": self.max_buffer_duration, "interim_results": self.enable_interim_results}
+
+    def memory_usage(self) -> dict:
+        return {"audio_buffer": self.buffer.nbytes}
 
+    def _final(self) -> list:
+        # Decode the buffer (Final)
+        # The final always sees the whole utterance; only interims are incremental.
+        results = []
+        if self.taps is not None:
+            self.taps.capture("pre_final", self.buffer)
+        with span("final_decode", audio_seconds=round(self.buffer_duration, 2)):
+            text, _ = self._decode(self.buffer, final=True)
+        
+        if text.strip():
+            results.append({"text": text, "is_final": True})
+
+        logger.info(
+            f"Moonshine interim cost: {self.interim_decodes} decodes, "
+            f"{self.interim_audio_seconds:.2f}s audio, {self.interim_decode_seconds:.3f}s decoding, "
+            f"interval {self.interim_interval:.2f}s"
+        )
+        
+        # Clear buffer
+        self.buffer = np.array([], dtype=np.float32)
+        self.buffer_duration = 0.0
+        self.last_interim_duration = 0.0 # Reset interim tracker
+        self.locked_words = []
+        self.window_start = 0
+        self.prev_hypothesis = []
+        
+        # Reset VAD to avoid carry-over state issues
+        self.vad.reset()
         return results
+
+    def stats(self) -> dict:
+        """Per-session interim decoding cost."""
+        return {
+            "interim_decodes": self.interim_decodes,
+            "interim_audio_seconds": self.interim_audio_seconds,
+            "interim_wall_seconds": self.interim_wall_seconds,
+            "interim_decode_seconds": self.interim_decode_seconds,
+            "interim_interval": self.interim_interval,
+        }
+
+    def _decode(self, audio: np.ndarray, final: bool = False):
+        """
+        Returns (text, seconds spent decoding this audio). Wall-clock: onnxruntime decodes
+        on its own intra-op threads, which this thread's CPU time would leave out.
+        """
+        if self.scheduler is not None:
+            request = self.scheduler.decode(audio, final=final)
+            return request.text, request.decode_seconds
+
+        start = time.perf_counter()
+        stream = self.recognizer.create_stream()
+        stream.accept_waveform(16000, audio)
+        self.recognizer.decode_stream(stream)
+        return stream.result.text, time.perf_counter() - start
+
+    def _interim(self) -> str:
+        """
+        Decode only the window past the locked prefix (local agreement).
+
+        Words that two consecutive window hypotheses agree on are locked, and the
+        window start moves up to (roughly) where they end, so the interim cost
+        stays bounded by the unstable tail instead of the whole utterance.
+        """
+        window = self.buffer[self.window_start:]
+        window_duration = len(window) / 16000.0
+
+        wall_start = time.perf_counter()
+        with span("interim_decode", audio_seconds=round(window_duration, 2)):
+            text, decode_seconds = self._decode(window)
+        wall = time.perf_counter() - wall_start
+        self.interim_decode_seconds += decode_seconds
+        self.interim_wall_seconds += wall
+        self.interim_decodes += 1
+        self.interim_audio_seconds += window_duration
+
+        # Adaptive interval: if a decode took longer than the audio it is meant to
+        # keep up with, back off; relax towards the minimum when there is headroom.
+        elapsed_audio = self.buffer_duration - self.last_interim_duration
+        if wall > elapsed_audio:
+            self.interim_interval = min(self.max_interim_interval, self.interim_interval * 2)
+        elif wall < elapsed_audio / 2:
+            self.interim_interval = max(self.min_interim_interval, self.interim_interval * 0.75)
+        self.last_interim_duration = self.buffer_duration
+
+        words = self._strip_locked_overlap(text.split())
+
+        # Longest common prefix with the previous hypothesis of the same window
+        agreed = 0
+        for a, b in zip(self.prev_hypothesis, words):
+            if _norm_word(a) != _norm_word(b):
+                break
+            agreed += 1
+
+        to_lock = agreed - self.LOCK_MARGIN_WORDS
+        if to_lock > 0 and window_duration >= self.MIN_WINDOW_TO_LOCK:
+            locked_chars = len(" ".join(words[:to_lock]))
+            total_chars = max(len(" ".join(words)), 1)
+            boundary = int(len(window) * locked_chars / total_chars - self.LOCK_BACKOFF * 16000)
+            if boundary > 0:
+                boundary = self._quietest_point(window, boundary)
+                self.locked_words.extend(words[:to_lock])
+                words = words[to_lock:]
+                self.window_start += boundary
+
+        self.prev_hypothesis = words
+        return " ".join(self.locked_words + words).strip()
+
+    def _strip_locked_overlap(self, words: list) -> list:
+        # The window overlaps the end of the locked prefix; drop repeated words
+        if not self.locked_words:
+            return words
+        max_overlap = min(3, len(self.locked_words), len(words))
+        for n in range(max_overlap, 0, -1):
+            tail = [_norm_word(w) for w in self.locked_words[-n:]]
+            head = [_norm_word(w) for w in words[:n]]
+            if tail == head:
+                return words[n:]
+        return words
+
+    def _quietest_point(self, window: np.ndarray, around: int) -> int:
+        # Snap the cut to the lowest-energy 20ms frame near the estimate
+        frame = 320
+        lo = max(0, around - int(self.LOCK_SEARCH * 16000))
+        hi = min(len(window), around + int(self.LOCK_SEARCH * 16000))
+        n_frames = (hi - lo) // frame
+        if n_frames <= 1:
+            return around
+        frames = window[lo:lo + n_frames * frame].reshape(n_frames, frame)
+        energy = np.einsum("ij,ij->i", frames, frames)
+        return lo + int(np.argmin(energy)) * frame
@@ -0,0 +1,53 @@
+import logging
+
+import numpy as np
+
+try:
+    from backend.core.runtime_config import get_runtime_config
+    from .mlx_whisper_service import MlxWhisperStream
+except ImportError:
+    from mlx_whisper_service import MlxWhisperStream
+
+logger = logging.getLogger("server")
+
+
+class OfflineFinalPassService:
+    """
+    CPU-capable final pass for HybridStream.
+
+    Keeps MlxWhisperStream's buffering, RMS silence trigger and lookback, but
+    transcribes with a sherpa-onnx OfflineRecognizer (e.g. Moonshine) instead of
+    MLX Whisper, so the hybrid pipeline can run on machines without Apple Silicon.
+    """
+
+    def __init__(self, recognizer, config=None):
+        self.recognizer = recognizer
+        self.config = (config or get_runtime_config()).mlx_whisper
+
+    def create_stream(self, taps=None):
+        return OfflineFinalPassStream(
+            self.recognizer,
+            self.config.max_buffer_duration,
+            taps=taps,
+            silence_trigger=self.config.silence_trigger,
+            speech_threshold=self.config.speech_threshold,
+            lookback_seconds=self.config.lookback_seconds,
+        )
+
+
+class OfflineFinalPassStream(MlxWhisperStream):
+    def __init__(self, recognizer, max_buffer_duration, **kwargs):
+        super().__init__(None, None, max_buffer_duration, **kwargs)
+        self.recognizer = recognizer
+
+    def _transcribe(self, audio_data: np.ndarray) -> str:
+        try:
+            stream = self.recognizer.create_stream()
+            stream.accept_waveform(16000, audio_data)
+            self.recognizer.decode_stream(stream)
+            text = stream.result.text.strip()
+            logger.info(f"Offline final pass result: {text}")
+            return text
+        except Exception as e:
+            logger.error(f"Offline final pass failed: {e}")
+            return ""
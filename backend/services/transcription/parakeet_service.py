@@ -6,16 +6,29 @@ from parakeet_mlx import from_pretrained
 from parakeet_mlx.audio import load_audio
 import os
 
-try:
-    from backend.core.config import MODEL_DIR
-except ImportError:
-    MODEL_DIR = "."
+from backend.core.config import MODEL_DIR
+from backend.core.runtime_config import get_runtime_config
+from backend.core.tracing import instant, span
 
 logger = logging.getLogger("server")
 
 class ParakeetService:
-    def __init__(self, model_name: str = "mlx-community/parakeet-tdt-0.6b-v3"):
+    # Admission cost per session (host capacity units). The service owns a single
+    # transcriber stream, so it can only serve one session at a time.
+    SESSION_COST = 3.0
+    MAX_SESSIONS = 1
+    # Ingest is regrouped into multiples of this: the Silero VAD window
+    FRAME_SAMPLES = 512
+    # create_stream() restarts the shared transcriber, so streams can't be pre-created
+    POOL_STREAMS = False
+    # parakeet-tdt-0.6b-v3 detects these itself, so one model serves them all
+    LANGUAGES = ("bg", "hr", "cs", "da", "nl", "en", "et", "fi", "fr", "de", "el", "hu", "it", "lv", "lt", "mt",
+                 "pl", "pt", "ro", "sk", "sl", "es", "sv", "ru", "uk")
+    AUTO_LANGUAGE = True
+
+    def __init__(self, model_name: str = "mlx-community/parakeet-tdt-0.6b-v3", config=None, language: str = "en"):
         self.model_name = model_name
+        self.config = (config or get_runtime_config()).parakeet
         logger.info(f"Loading Parakeet model: {model_name}")
         self.model = from_pretrained(model_name)
         logger.info(f"Parakeet model loaded successfully. Expected SR: {self.model.preprocessor_config.sample_rate}")
@@ -27,7 +40,7 @@ class ParakeetService:
         vad_config = sherpa_onnx.VadModelConfig()
         vad_config.silero_vad.model = os.path.join(MODEL_DIR, "vad", "silero_vad.onnx") # Updated path
         vad_config.silero_vad.threshold = 0.5
-        vad_config.silero_vad.min_silence_duration = 0.35 # Reduced from 1.0 for faster endpointing
+        vad_config.silero_vad.min_silence_duration = self.config.vad_min_silence # 0.35, reduced from 1.0 for faster endpointing
         vad_config.silero_vad.min_speech_duration = 0.25
         vad_config.sample_rate = 16000
         self.vad = sherpa_onnx.VoiceActivityDetector(
@@ -36,15 +49,19 @@ class ParakeetService:
         )
         self.punctuation = None # Todo: Add punctuation support if compatible
         self.current_segment_duration = 0.0
+        self.taps = None # SessionTaps for diagnostic audio capture
 
     def normalize_punctuation(self, text: str) -> str:
         # Simple normalizer
         return text.replace("。", ".").replace("，", ",").replace("？", "?").replace("！", "!").replace("、", ",")
         
-    def create_stream(self):
+    def create_stream(self, taps=None):
         """
         Returns a streaming transcriber object.
         """
+        # The transcriber is shared (one session at a time), so the taps follow whichever session opened it last;
+        # a session without taps must not keep writing into the previous session's
+        self.taps = taps
         if self.context_manager is None:
             self.context_manager = self.model.transcribe_stream(context_size=(256, 256))
             self.stream = self.context_manager.__enter__()
@@ -70,23 +87,18 @@ class ParakeetService:
         stream = self.stream
         
         if stream:
-            # DEBUG: Capture raw audio to verify what the model hears
-            import wave
-            try:
-                # Append to raw PCM
-                with open("debug_capture.pcm", "ab") as f:
-                    # Convert float32 samples to int16 bytes
-                     f.write((samples * 32767).clip(-32768, 32767).astype(np.int16).tobytes())
-            except Exception:
-                pass 
-
             # Apply gain reduction (0.1) just in case input is too hot for Parakeet
             # Many MLX models are sensitive to scale.
-            scaled_samples = samples * 0.1 
+            scaled_samples = samples * self.config.gain
+
+            # Diagnostic capture of exactly what the model hears (no-op unless enabled via /api/taps)
+            if self.taps is not None:
+                self.taps.capture("post_gain", scaled_samples)
             
             # 1. Update Transcription
             # Convert numpy to mlx array for compatibility with parakeet's internal mx.concat
-            stream.add_audio(mx.array(scaled_samples))
+            with span("parakeet_decode"):
+                stream.add_audio(mx.array(scaled_samples))
             res = stream.result
             text = res.text
             
@@ -106,11 +118,11 @@ class ParakeetService:
             should_commit = False
             
             # Logic: 
-            # - If Timeout (>15s): Force commit
+            # - If Timeout (>max_segment_duration, 15s): Force commit
             # - If VAD Endpoint + Punctuation: Commit
             # - If VAD Endpoint + No Punctuation: Ignore (wait for more context)
             
-            if self.current_segment_duration > 15.0:
+            if self.current_segment_duration > self.config.max_segment_duration:
                 logger.info(f"Forcing endpoint due to max duration ({self.current_segment_duration:.2f}s)")
                 should_commit = True
             elif is_vad_endpoint:
@@ -125,17 +137,37 @@ class ParakeetService:
                     should_commit = False
             
             if should_commit:
-                # Clear VAD just in case
-                while not self.vad.empty():
-                    self.vad.pop()
-                
-                # Reset stream on endpoint to segment text
-                self.close_stream()
-                self.create_stream() # Re-create immediately
-                
-                logger.info(f"Parakeet Commit: {text}")
-                results.append({"text": text, "is_final": True})
+                instant("endpoint", segment_seconds=round(self.current_segment_duration, 2))
+                results.extend(self._commit(text))
             else:
                 results.append({"text": text, "is_final": False})
             
         return results
+
+    def finalize(self, stream=None) -> list:
+        """Commit the current text now, without waiting for an endpoint (flush / end of stream)."""
+        if self.stream is None or self.current_segment_duration == 0.0:
+            return []
+        text = self.stream.result.text
+        return self._commit(text) if text.strip() else []
+
+    def configure(self, stream, **params) -> dict:
+        if params:
+            raise ValueError(f"Parakeet has no runtime parameters (got {', '.join(params)})")
+        return {}
+
+    def memory_usage(self, stream) -> dict:
+        # Estimate: the transcriber holds the current segment's audio (as features) until it commits
+        return {"segment_audio": int(self.current_segment_duration * 16000) * 4}
+
+    def _commit(self, text: str) -> list:
+        # Clear VAD just in case
+        while not self.vad.empty():
+            self.vad.pop()
+        
+        # Reset stream on endpoint to segment text
+        self.close_stream()
+        self.create_stream() # Re-create immediately
+        
+        logger.info(f"Parakeet Commit: {text}")
+        return [{"text": text, "is_final": True}]
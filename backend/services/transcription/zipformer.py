@@ -0,0 +1,52 @@
+import glob
+import logging
+import os
+
+import sherpa_onnx
+
+try:
+    from backend.core.config import MODEL_DIR
+except ImportError:
+    MODEL_DIR = "models"
+
+logger = logging.getLogger("server")
+
+ZIPFORMER_MODEL_DIR = os.path.join(MODEL_DIR, "asr", "sherpa-onnx-streaming-zipformer-en-2023-06-26")
+
+# Streaming Zipformer per spoken language (sherpa-onnx release names under models/asr)
+ZIPFORMER_MODELS = {
+    "en": ZIPFORMER_MODEL_DIR,
+    "zh": os.path.join(MODEL_DIR, "asr", "sherpa-onnx-streaming-zipformer-bilingual-zh-en-2023-02-20"),
+    "fr": os.path.join(MODEL_DIR, "asr", "sherpa-onnx-streaming-zipformer-fr-2023-04-14"),
+    "ko": os.path.join(MODEL_DIR, "asr", "sherpa-onnx-streaming-zipformer-korean-2024-06-16"),
+}
+
+
+def _model_file(model_dir: str, part: str) -> str:
+    # The English model's exact file; other releases use their own epoch/avg naming
+    path = os.path.join(model_dir, f"{part}-epoch-99-avg-1-chunk-16-left-128.int8.onnx")
+    if os.path.exists(path):
+        return path
+    matches = sorted(glob.glob(os.path.join(model_dir, f"{part}-*.int8.onnx"))) or sorted(glob.glob(os.path.join(model_dir, f"{part}-*.onnx")))
+    return matches[0] if matches else path
+
+
+def create_online_recognizer(num_threads: int = 1, model_dir: str = ZIPFORMER_MODEL_DIR):
+    """Streaming Zipformer used for real-time previews (shared by HybridService and the autotuner)."""
+    tokens_path = os.path.join(model_dir, "tokens.txt")
+    encoder_path = _model_file(model_dir, "encoder")
+    decoder_path = _model_file(model_dir, "decoder")
+    joiner_path = _model_file(model_dir, "joiner")
+
+    logger.info(f"Loading Zipformer model from {model_dir} (num_threads={num_threads})")
+    return sherpa_onnx.OnlineRecognizer.from_transducer(
+        tokens=tokens_path,
+        encoder=encoder_path,
+        decoder=decoder_path,
+        joiner=joiner_path,
+        num_threads=num_threads,
+        sample_rate=16000,
+        feature_dim=80,
+        decoding_method="greedy_search",
+        provider="cpu"
+    )
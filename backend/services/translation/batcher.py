@@ -0,0 +1,236 @@
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger("server")
+
+
+def normalize_text(text: str) -> str:
+    """Cache key form of a source segment: NFC, whitespace collapsed. Case and punctuation matter to MT, so they stay."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TranslationCache:
+    """LRU of (source, target, normalized text) -> translation."""
+
+    def __init__(self, capacity: int = 20000):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        translation = self._entries.get(key)
+        if translation is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return translation
+
+    def put(self, key, translation: str):
+        if self.capacity <= 0:
+            return
+        self._entries[key] = translation
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _TranslationRequest:
+    __slots__ = ("pair", "texts", "keys", "results", "missing", "final", "cache", "future", "submitted")
+
+    def __init__(self, pair: tuple, texts: list, final: bool, cache: bool):
+        self.pair = pair
+        self.texts = texts
+        self.keys = [(pair[0], pair[1], normalize_text(t)) for t in texts]
+        self.results = [None] * len(texts)
+        self.missing = []  # Indices still to translate
+        self.final = final
+        self.cache = cache
+        self.future = Future()
+        self.submitted = time.perf_counter()
+
+
+class TranslationBatcher:
+    """
+    Groups translation requests from all sessions into batched model calls per
+    language pair, in front of an LRU cache.
+
+    submit() answers cache hits immediately and returns a Future, so callers on
+    the event loop never hold a worker thread while waiting. A single batcher
+    thread collects misses for up to max_wait seconds (or max_batch_size
+    segments), picks the language pair with the oldest waiting final (finals
+    before partials), merges duplicate segments and translates them in one call.
+    """
+
+    def __init__(self, translator, max_batch_size: int = 16, max_wait: float = 0.02, cache_size: int = 20000):
+        self.translator = translator
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.cache = TranslationCache(cache_size)
+
+        self._queues = {}  # (source, target) -> (finals deque, partials deque)
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+        # Throughput and latency counters
+        self.requests = 0
+        self.batches = 0
+        self.segments = 0
+        self.failures = 0
+        self._latencies = deque(maxlen=1000)  # Seconds from submit to result, queued requests only
+        self.requests_by_target = {}
+
+    def supports(self, source: str, target: str) -> bool:
+        return self.translator.supports(source, target)
+
+    def submit(self, texts: list, source: str, target: str, final: bool = False, cache: bool = True) -> Future:
+        """
+        Translate `texts` (sentences) from source to target; the Future resolves to
+        the list of translations. cache=False skips storing results (unstable partial tails).
+        """
+        request = _TranslationRequest((source, target), texts, final, cache)
+        with self._cond:
+            self.requests += 1
+            self.requests_by_target[target] = self.requests_by_target.get(target, 0) + 1
+            for i, key in enumerate(request.keys):
+                translation = self.cache.get(key) if key[2] else ""
+                if translation is None:
+                    request.missing.append(i)
+                else:
+                    request.results[i] = translation
+            if not request.missing:
+                request.future.set_result(request.results)
+                return request.future
+
+            self._ensure_started()
+            finals, partials = self._queues.setdefault(request.pair, (deque(), deque()))
+            (finals if final else partials).append(request)
+            self._cond.notify()
+        return request.future
+
+    def stats(self) -> dict:
+        lookups = self.cache.hits + self.cache.misses
+        lat = np.array(self._latencies) * 1000
+        return {
+            "requests": self.requests,
+            "requests_by_target": dict(self.requests_by_target),
+            "batches": self.batches,
+            "segments_translated": self.segments,
+            "avg_batch_size": self.segments / self.batches if self.batches else 0.0,
+            "failures": self.failures,
+            "cache": {
+                "size": len(self.cache),
+                "capacity": self.cache.capacity,
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+                "hit_rate": self.cache.hits / lookups if lookups else 0.0,
+            },
+            "latency_ms": {
+                "p50": float(np.percentile(lat, 50)) if len(lat) else None,
+                "p95": float(np.percentile(lat, 95)) if len(lat) else None,
+                "max": float(lat.max()) if len(lat) else None,
+            },
+        }
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def _ensure_started(self):
+        # Called with self._cond held
+        if self._thread is None or not self._thread.is_alive():
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="translation-batch", daemon=True)
+            self._thread.start()
+
+    def _pending_segments(self) -> int:
+        return sum(len(r.missing) for finals, partials in self._queues.values() for r in (*finals, *partials))
+
+    def _next_pair(self):
+        # Oldest waiting final wins; otherwise the oldest partial
+        def oldest(index):
+            heads = [(queues[index][0].submitted, pair) for pair, queues in self._queues.items() if queues[index]]
+            return min(heads)[1] if heads else None
+        return oldest(0) or oldest(1)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._next_pair() is None and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    break
+
+                # Give other sessions a short window to join this batch
+                deadline = time.monotonic() + self.max_wait
+                while self._pending_segments() < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                pair = self._next_pair()
+                batch, size = [], 0
+                for queue in self._queues[pair]:
+                    while queue and (not batch or size + len(queue[0].missing) <= self.max_batch_size):
+                        request = queue.popleft()
+                        batch.append(request)
+                        size += len(request.missing)
+
+            # Requests whose caller went away (session closed) are skipped; the rest can no longer be cancelled
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if batch:
+                self._translate(pair, batch)
+
+        # Fail anything still queued at shutdown so no caller waits forever
+        with self._cond:
+            leftover = [r for finals, partials in self._queues.values() for r in (*finals, *partials)]
+            self._queues.clear()
+        for request in leftover:
+            if request.future.set_running_or_notify_cancel():
+                request.future.set_exception(RuntimeError("Translation batcher stopped"))
+
+    def _translate(self, pair: tuple, batch: list):
+        # The same sentence from several sessions (or repeated within one) is translated once
+        unique = OrderedDict()
+        for request in batch:
+            for i in request.missing:
+                unique.setdefault(request.keys[i], request.texts[i])
+
+        try:
+            translations = self.translator.translate_batch(list(unique.values()), pair[0], pair[1])
+        except Exception as e:
+            logger.error(f"Translation batch failed ({pair[0]}->{pair[1]}, {len(unique)} segments): {e}")
+            self.failures += 1
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        by_key = dict(zip(unique, translations))
+        now = time.perf_counter()
+        with self._cond:
+            self.batches += 1
+            self.segments += len(unique)
+            for request in batch:
+                for i in request.missing:
+                    request.results[i] = by_key[request.keys[i]]
+                    if request.cache:
+                        self.cache.put(request.keys[i], request.results[i])
+                self._latencies.append(now - request.submitted)
+        for request in batch:
+            request.future.set_result(request.results)
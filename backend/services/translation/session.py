@@ -0,0 +1,77 @@
+import asyncio
+
+from backend.utils.text_processing import RE_SENTENCE_END
+
+# Targets written without spaces between sentences
+NO_SPACE_LANGUAGES = {"ja", "zh", "yue", "th"}
+
+
+def split_sentences(text: str) -> tuple:
+    """
+    (complete sentences, end of the last one). A sentence is complete once
+    punctuation and whitespace follow it; text[end:] is the unfinished tail.
+    """
+    sentences, end = [], 0
+    for match in RE_SENTENCE_END.finditer(text):
+        sentences.append(text[end:match.end()].strip())
+        end = match.end()
+    return sentences, end
+
+
+class SessionTranslator:
+    """
+    Translates one session's results through the shared TranslationBatcher.
+
+    Finals are translated sentence by sentence (sentences repeat across
+    sessions and between partials and finals, so they hit the cache). For a
+    growing partial, sentences that are already complete form a stable prefix
+    whose translation is kept; only sentences completed since, plus the
+    unfinished tail, are submitted. Tails are not cached.
+    """
+
+    def __init__(self, batcher, source: str, target: str):
+        self.batcher = batcher
+        self.source = source
+        self.target = target
+        self.separator = "" if target in NO_SPACE_LANGUAGES else " "
+        self.prefix_src = ""
+        self.prefix_out = []
+        # Bumped by every final, so partial translations that finish late are dropped
+        self.generation = 0
+
+    def reset(self):
+        self.prefix_src = ""
+        self.prefix_out = []
+
+    async def translate(self, text: str, is_final: bool):
+        """Translation of `text`, or None for a partial superseded by a final while it was translated."""
+        if is_final:
+            self.generation += 1
+            self.reset()
+            sentences, end = split_sentences(text)
+            if text[end:].strip():
+                sentences.append(text[end:].strip())
+            translated = await asyncio.wrap_future(self.batcher.submit(sentences, self.source, self.target, final=True))
+            return self.separator.join(t for t in translated if t)
+
+        generation = self.generation
+        if not text.startswith(self.prefix_src):
+            self.reset()
+        prefix_src, prefix_out = self.prefix_src, list(self.prefix_out)
+        rest = text[len(prefix_src):]
+        sentences, end = split_sentences(rest)
+        tail = rest[end:].strip()
+
+        stable = self.batcher.submit(sentences, self.source, self.target) if sentences else None
+        unstable = self.batcher.submit([tail], self.source, self.target, cache=False) if tail else None
+        new_out = await asyncio.wrap_future(stable) if stable else []
+        tail_out = await asyncio.wrap_future(unstable) if unstable else []
+        if generation != self.generation:
+            return None
+
+        # Extend the stable prefix up to the last complete sentence
+        prefix_out += new_out
+        if sentences:
+            self.prefix_src = prefix_src + rest[:end]
+            self.prefix_out = prefix_out
+        return self.separator.join(t for t in prefix_out + tail_out if t)
@@ -0,0 +1,82 @@
+import logging
+import os
+import threading
+
+try:
+    import ctranslate2
+    import sentencepiece
+except ImportError:
+    # Translation is optional; the server runs transcription-only without these
+    ctranslate2 = None
+    sentencepiece = None
+
+try:
+    from backend.core.config import MODEL_DIR
+except ImportError:
+    MODEL_DIR = "models"
+
+logger = logging.getLogger("server")
+
+# One directory per language pair, e.g. models/translation/opus-mt-en-de/ holding an
+# int8 CTranslate2 conversion of Helsinki-NLP/opus-mt-en-de plus its SentencePiece models:
+#   ct2-transformers-converter --model Helsinki-NLP/opus-mt-en-de --quantization int8 \
+#       --output_dir models/translation/opus-mt-en-de --copy_files source.spm target.spm
+TRANSLATION_MODEL_DIR = os.path.join(MODEL_DIR, "translation")
+
+
+class CTranslate2Translator:
+    """
+    CPU machine translation with int8 Opus-MT (Marian) models run by CTranslate2.
+
+    Pair models are loaded on first use and kept. translate_batch() is called
+    from the batcher thread only, so each call can use all intra_threads.
+    """
+
+    def __init__(self, model_root: str = TRANSLATION_MODEL_DIR, compute_type: str = "int8",
+                 intra_threads: int = 2, beam_size: int = 1, max_decoding_length: int = 256):
+        if ctranslate2 is None:
+            raise ImportError("ctranslate2 and sentencepiece are required for translation")
+        self.model_root = model_root
+        self.compute_type = compute_type
+        self.intra_threads = intra_threads
+        self.beam_size = beam_size
+        self.max_decoding_length = max_decoding_length
+        self._models = {}  # (source, target) -> (translator, source_spm, target_spm)
+        self._lock = threading.Lock()
+
+    def model_dir(self, source: str, target: str) -> str:
+        return os.path.join(self.model_root, f"opus-mt-{source}-{target}")
+
+    def supports(self, source: str, target: str) -> bool:
+        return os.path.exists(os.path.join(self.model_dir(source, target), "model.bin"))
+
+    def pairs(self) -> list:
+        """Installed (source, target) pairs."""
+        if not os.path.isdir(self.model_root):
+            return []
+        pairs = []
+        for name in sorted(os.listdir(self.model_root)):
+            parts = name.split("-")
+            if len(parts) == 4 and name.startswith("opus-mt-") and self.supports(parts[2], parts[3]):
+                pairs.append((parts[2], parts[3]))
+        return pairs
+
+    def _load(self, source: str, target: str):
+        with self._lock:
+            if (source, target) not in self._models:
+                model_dir = self.model_dir(source, target)
+                logger.info(f"Loading translation model {source}->{target} from {model_dir} ({self.compute_type})")
+                translator = ctranslate2.Translator(model_dir, device="cpu", compute_type=self.compute_type,
+                                                    inter_threads=1, intra_threads=self.intra_threads)
+                source_spm = sentencepiece.SentencePieceProcessor(model_file=os.path.join(model_dir, "source.spm"))
+                target_spm = sentencepiece.SentencePieceProcessor(model_file=os.path.join(model_dir, "target.spm"))
+                self._models[(source, target)] = (translator, source_spm, target_spm)
+            return self._models[(source, target)]
+
+    def translate_batch(self, texts: list, source: str, target: str) -> list:
+        translator, source_spm, target_spm = self._load(source, target)
+        # Marian expects the end-of-sentence token on every source
+        tokens = [pieces + ["</s>"] for pieces in source_spm.encode(texts, out_type=str)]
+        results = translator.translate_batch(tokens, beam_size=self.beam_size,
+                                             max_decoding_length=self.max_decoding_length)
+        return [target_spm.decode(result.hypotheses[0]) for result in results]
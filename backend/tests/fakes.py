@@ -0,0 +1,144 @@
+"""
+Model-free stand-ins for sherpa-onnx / MLX objects, so the stream classes can be
+driven on any machine without downloading models. Each fake does a trivial
+amount of work and produces output shaped like the real thing.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+
+WORDS = ("so", "i", "think", "the", "latency", "is", "fine", "but", "we", "should", "measure", "it", "again")
+
+
+def speech_like(seconds: float, seed: int = 0) -> np.ndarray:
+    """Noise with a syllable-rate envelope, loud enough to pass the RMS speech gate."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * 16000)) / 16000.0
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    return (0.1 * envelope * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def chunks_of(audio: np.ndarray, chunk_samples: int = 4096) -> list:
+    return [audio[i:i + chunk_samples] for i in range(0, len(audio) - chunk_samples + 1, chunk_samples)]
+
+
+def words_for(samples: int, words_per_second: float = 2.5) -> str:
+    n = int(samples / 16000.0 * words_per_second)
+    return " ".join(WORDS[i % len(WORDS)] for i in range(n))
+
+
+class FakeOnlineStream:
+    def __init__(self):
+        self.samples = 0
+        self.decoded = 0
+
+    def accept_waveform(self, sample_rate, samples):
+        self.samples += len(samples)
+
+
+class FakeOnlineRecognizer:
+    """
+    Zipformer stand-in: transcript grows with the audio fed, upper-case like the real model.
+    With chunk_samples set, audio only counts once decoded, one fixed-size chunk per
+    decode_stream() like the real streaming model; otherwise every call decodes everything.
+    """
+
+    def __init__(self, chunk_samples: int = None, words_per_second: float = 2.5):
+        self.chunk_samples = chunk_samples
+        self.words_per_second = words_per_second
+
+    def create_stream(self):
+        return FakeOnlineStream()
+
+    def is_ready(self, stream):
+        return self.chunk_samples is None or stream.samples - stream.decoded >= self.chunk_samples
+
+    def decode_stream(self, stream):
+        stream.decoded = stream.samples if self.chunk_samples is None else stream.decoded + self.chunk_samples
+
+    def get_result(self, stream):
+        return words_for(stream.samples if self.chunk_samples is None else stream.decoded, self.words_per_second).upper()
+
+
+class FakePunctuation:
+    def add_punctuation(self, text):
+        words = text.split()
+        # A comma every 5 words and a full stop every 9, like a chatty punctuation model
+        out = []
+        for i, w in enumerate(words, 1):
+            out.append(w + ("." if i % 9 == 0 else "," if i % 5 == 0 else ""))
+        return " ".join(out) + ("" if not out or out[-1].endswith(".") else ".")
+
+
+class FakeOfflineStream:
+    def __init__(self):
+        self.samples = 0
+        self.result = SimpleNamespace(text="")
+
+    def accept_waveform(self, sample_rate, samples):
+        self.samples = len(samples)
+
+
+class FakeOfflineRecognizer:
+    """Moonshine stand-in supporting both decode_stream and decode_streams."""
+
+    def create_stream(self):
+        return FakeOfflineStream()
+
+    def decode_stream(self, stream):
+        stream.result.text = words_for(stream.samples)
+
+    def decode_streams(self, streams):
+        for stream in streams:
+            self.decode_stream(stream)
+
+
+class FakeVad:
+    """Silero VAD stand-in that always reports ongoing speech (no VAD-triggered finals)."""
+
+    def accept_waveform(self, samples):
+        pass
+
+    def empty(self):
+        return True
+
+    def is_speech_detected(self):
+        return True
+
+    def reset(self):
+        pass
+
+
+def fake_transcribe(audio_data: np.ndarray) -> str:
+    """Replacement for MlxWhisperStream._transcribe."""
+    return words_for(len(audio_data))
+
+
+class FakeTranslator:
+    """CTranslate2Translator stand-in: tags each segment with the target and records every batch."""
+
+    def __init__(self, pairs=(("en", "de"), ("en", "fr"))):
+        self._pairs = set(pairs)
+        self.batches = []
+
+    def supports(self, source, target):
+        return (source, target) in self._pairs
+
+    def pairs(self):
+        return sorted(self._pairs)
+
+    def translate_batch(self, texts, source, target):
+        self.batches.append((target, list(texts)))
+        return [f"[{target}] {t}" for t in texts]
+
+
+class FakeLanguageIdentifier:
+    """SpokenLanguageIdentifier stand-in: answers from a script, last answer repeating, and records audio lengths."""
+
+    def __init__(self, answers=("en",)):
+        self.answers = list(answers)
+        self.heard = []
+
+    def identify(self, samples):
+        self.heard.append(len(samples))
+        return self.answers.pop(0) if len(self.answers) > 1 else self.answers[0]
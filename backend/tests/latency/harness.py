@@ -0,0 +1,345 @@
+"""
+End-to-end latency regression harness.
+
+Streams every WAV in a reference corpus through each service at simulated real
+time and records, per file:
+    first_partial_ms   speech onset -> first non-empty result
+    partial_jitter_ms  standard deviation of the gaps between partials of one utterance
+    eos_to_final_ms    end of a speech region -> the final covering it (mean / max)
+    rtf                processing time / audio duration
+    wer                word error rate of the joined finals vs. the reference
+
+Simulated real time: chunk i "arrives" when its last sample would have been
+spoken; processing starts at max(arrival, previous chunk finished) and takes
+the measured wall time, so queueing behind slow decodes is accounted for
+without actually sleeping.
+
+Corpus: a directory of <name>.wav (16 kHz mono 16-bit) + <name>.txt (reference).
+
+Usage:
+    python backend/tests/latency/harness.py --corpus DIR [--services hybrid,moonshine,hybrid_cpu]
+    python backend/tests/latency/harness.py --corpus DIR --update-baseline
+    # 48 kHz browser messages (~1365 samples at 16 kHz), regrouped into native model frames:
+    python backend/tests/latency/harness.py --corpus DIR --chunk-samples 1365 --rechunk
+
+The report (JSON, sorted keys, rounded values) is written next to the baseline
+so that runs can be compared with a plain diff; the exit code is 1 when any
+metric regressed beyond tolerance.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
+
+from backend.core.runtime_config import get_runtime_config
+from backend.services.audio.rechunk import Rechunker
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(HERE, "corpus")
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+DEFAULT_REPORT = os.path.join(HERE, "report.json")
+
+CHUNK_SAMPLES = 4096
+TRAILING_SILENCE = 2.0  # Seconds appended so silence-triggered finals can fire
+SPEECH_RMS = 0.01       # Same threshold MlxWhisperStream uses
+MIN_GAP = 0.3           # Silence shorter than this does not split speech regions
+
+# Regression tolerances: a metric regresses when it exceeds baseline by both
+# the relative and the absolute margin (latency), or by the absolute margin (WER).
+LATENCY_REL_TOLERANCE = 0.2
+LATENCY_ABS_TOLERANCE_MS = 50
+RTF_REL_TOLERANCE = 0.2
+WER_ABS_TOLERANCE = 0.02
+
+
+def load_wav(path: str) -> np.ndarray:
+    with wave.open(path, "rb") as wf:
+        if wf.getframerate() != 16000 or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16 kHz mono 16-bit WAV")
+        data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    return data.astype(np.float32) / 32768.0
+
+
+def load_corpus(corpus_dir: str) -> list:
+    items = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.endswith(".wav"):
+            continue
+        stem = name[:-4]
+        ref_path = os.path.join(corpus_dir, stem + ".txt")
+        reference = open(ref_path, encoding="utf-8").read() if os.path.exists(ref_path) else ""
+        items.append((stem, load_wav(os.path.join(corpus_dir, name)), reference))
+    return items
+
+
+def speech_regions(audio: np.ndarray, frame: int = 320) -> list:
+    """(start_s, end_s) of energy-based speech regions, merging gaps shorter than MIN_GAP."""
+    n = len(audio) // frame
+    if n == 0:
+        return []
+    frames = audio[:n * frame].reshape(n, frame)
+    active = np.sqrt(np.mean(frames ** 2, axis=1)) > SPEECH_RMS
+    regions = []
+    for i in np.flatnonzero(active):
+        start, end = i * frame / 16000.0, (i + 1) * frame / 16000.0
+        if regions and start - regions[-1][1] < MIN_GAP:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+    return [tuple(r) for r in regions]
+
+
+def normalize_words(text: str) -> list:
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(hypothesis: str, reference: str) -> float:
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    # Levenshtein distance over words, one row at a time
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1] / len(ref)
+
+
+def run_file(stream, audio: np.ndarray, reference: str, chunk_samples: int = CHUNK_SAMPLES, rechunker=None) -> dict:
+    """
+    Feed one file through a stream at simulated real time and compute its metrics.
+    With a Rechunker, each incoming chunk is regrouped first, as the server does.
+    """
+    padded = np.concatenate((audio, np.zeros(int(TRAILING_SILENCE * 16000), dtype=np.float32)))
+    regions = speech_regions(audio)
+    onset = regions[0][0] if regions else 0.0
+
+    clock = 0.0          # Simulated time at which the pipeline becomes free
+    processing = 0.0
+    first_partial = None
+    last_partial = None
+    partial_gaps = []
+    finals = []          # (emit_time, audio_position, text)
+
+    def consume(results, finished, position):
+        nonlocal first_partial, last_partial
+        for res in results:
+            if not res.get("text", "").strip():
+                continue
+            if first_partial is None:
+                first_partial = finished
+            if res.get("is_final"):
+                finals.append((finished, position, res["text"]))
+                last_partial = None
+            else:
+                if last_partial is not None:
+                    partial_gaps.append(finished - last_partial)
+                last_partial = finished
+
+    def feed(chunk, flush=False):
+        if rechunker is None:
+            return stream.accept_waveform(chunk)
+        results = []
+        for block in rechunker.push(chunk, flush):
+            results.extend(stream.accept_waveform(block))
+        return results
+
+    for start in range(0, len(padded), chunk_samples):
+        chunk = padded[start:start + chunk_samples]
+        arrival = (start + len(chunk)) / 16000.0
+        t0 = time.perf_counter()
+        results = feed(chunk)
+        elapsed = time.perf_counter() - t0
+        processing += elapsed
+        clock = max(clock, arrival) + elapsed
+        consume(results, clock, arrival)
+
+    # Flush whatever the rechunker and the stream still hold, if it supports it
+    if hasattr(stream, "finalize"):
+        t0 = time.perf_counter()
+        results = feed(padded[:0], flush=True) if rechunker is not None else []
+        results += stream.finalize()
+        elapsed = time.perf_counter() - t0
+        processing += elapsed
+        clock += elapsed
+        consume(results, clock, len(padded) / 16000.0)
+
+    # Each final covers the latest speech region that ended before its audio position
+    eos_latencies = []
+    for emit_time, position, _ in finals:
+        ended = [end for _, end in regions if end <= position]
+        if ended:
+            eos_latencies.append(emit_time - ended[-1])
+
+    hypothesis = " ".join(text for _, _, text in finals)
+    return {
+        "first_partial_ms": None if first_partial is None else round((first_partial - onset) * 1000),
+        "partial_jitter_ms": round(float(np.std(partial_gaps)) * 1000) if len(partial_gaps) > 1 else None,
+        "eos_to_final_mean_ms": round(float(np.mean(eos_latencies)) * 1000) if eos_latencies else None,
+        "eos_to_final_max_ms": round(float(np.max(eos_latencies)) * 1000) if eos_latencies else None,
+        "rtf": round(processing / (len(padded) / 16000.0), 4),
+        "wer": round(word_error_rate(hypothesis, reference), 3),
+        "finals": len(finals),
+    }
+
+
+def build_services(names: list) -> dict:
+    """name -> zero-arg stream factory; services that cannot load here are skipped."""
+    factories = {}
+    for name in names:
+        try:
+            if name == "hybrid":
+                from backend.services.transcription.hybrid_service import HybridService
+                service = HybridService()
+                factories[name] = service.create_stream
+            elif name == "moonshine":
+                from backend.services.transcription.moonshine_service import MoonshineService
+                service = MoonshineService()
+                factories[name] = service.create_stream
+            elif name == "hybrid_cpu":
+                factories[name] = build_hybrid_cpu()
+            else:
+                raise ValueError(f"Unknown service: {name}")
+        except Exception as e:
+            print(f"Skipping {name}: {e}", file=sys.stderr)
+    return factories
+
+
+def native_frame(name: str) -> int:
+    """Samples per native model frame of a service, for --rechunk (hybrid_cpu previews with Zipformer too)."""
+    if name == "moonshine":
+        from backend.services.transcription.moonshine_service import MoonshineService
+        return MoonshineService.FRAME_SAMPLES
+    from backend.services.transcription.hybrid_service import HybridService
+    return HybridService.FRAME_SAMPLES
+
+
+def build_hybrid_cpu():
+    # Zipformer preview + Moonshine final pass: the hybrid pipeline without MLX
+    import sherpa_onnx
+    from backend.core.config import MODEL_DIR
+    from backend.services.transcription.hybrid_service import HybridStream
+    from backend.services.transcription.moonshine_service import MoonshineService
+    from backend.services.transcription.offline_final_pass import OfflineFinalPassService
+    from backend.services.transcription.zipformer import create_online_recognizer
+    from backend.core.runtime_config import get_runtime_config
+
+    config = get_runtime_config()
+    online = create_online_recognizer(num_threads=config.zipformer.num_threads)
+    final_pass = OfflineFinalPassService(MoonshineService(config=config).recognizer, config=config)
+
+    punct = None
+    punct_path = os.path.join(MODEL_DIR, "punctuation", "sherpa-onnx-punct-ct-transformer-zh-en-vocab272727-2024-04-12", "model.onnx")
+    if os.path.exists(punct_path):
+        punct_config = sherpa_onnx.OfflinePunctuationConfig()
+        punct_config.model.ct_transformer = punct_path
+        punct = sherpa_onnx.OfflinePunctuation(punct_config)
+
+    return lambda: HybridStream(final_pass, online, punct)
+
+
+def compare(report: dict, baseline: dict) -> list:
+    """Human-readable regression lines (empty if none)."""
+    regressions = []
+    for service, files in report.items():
+        for name, metrics in files.items():
+            base = baseline.get(service, {}).get(name)
+            if not base:
+                continue
+            for key in ("first_partial_ms", "partial_jitter_ms", "eos_to_final_mean_ms", "eos_to_final_max_ms"):
+                new, old = metrics.get(key), base.get(key)
+                if new is None or old is None:
+                    continue
+                if new > old * (1 + LATENCY_REL_TOLERANCE) and new - old > LATENCY_ABS_TOLERANCE_MS:
+                    regressions.append(f"{service}/{name} {key}: {old} -> {new}")
+            if metrics["rtf"] > base["rtf"] * (1 + RTF_REL_TOLERANCE):
+                regressions.append(f"{service}/{name} rtf: {base['rtf']} -> {metrics['rtf']}")
+            if metrics["wer"] > base["wer"] + WER_ABS_TOLERANCE:
+                regressions.append(f"{service}/{name} wer: {base['wer']} -> {metrics['wer']}")
+    return regressions
+
+
+def format_table(report: dict, baseline: dict) -> str:
+    lines = [f"{'service/file':40s} {'1st partial':>12s} {'jitter':>10s} {'eos->final':>12s} {'max':>8s} {'rtf':>8s} {'wer':>7s}"]
+    for service, files in sorted(report.items()):
+        for name, m in sorted(files.items()):
+            base = baseline.get(service, {}).get(name, {})
+
+            def cell(key, fmt="{}"):
+                value = m.get(key)
+                if value is None:
+                    return "-"
+                old = base.get(key)
+                delta = "" if old is None else f" ({value - old:+.3g})"
+                return fmt.format(value) + delta
+
+            lines.append(f"{service + '/' + name:40s} {cell('first_partial_ms'):>12s} {cell('partial_jitter_ms'):>10s} {cell('eos_to_final_mean_ms'):>12s} "
+                         f"{cell('eos_to_final_max_ms'):>8s} {cell('rtf'):>8s} {cell('wer'):>7s}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--services", default="hybrid,moonshine,hybrid_cpu")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--report", default=DEFAULT_REPORT)
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--chunk-samples", type=int, default=CHUNK_SAMPLES, help="16 kHz samples per incoming message")
+    parser.add_argument("--rechunk", action="store_true", help="Regroup messages into native model frames, as the server does")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        raise SystemExit(f"No WAV files in {args.corpus}")
+
+    report = {}
+    rechunk_config = get_runtime_config().rechunk
+    for service_name, make_stream in build_services(args.services.split(",")).items():
+        # Rechunked runs are reported (and baselined) separately
+        key = service_name + ("+rechunk" if args.rechunk else "")
+        report[key] = {}
+        for name, audio, reference in corpus:
+            rechunker = None
+            if args.rechunk:
+                rechunker = Rechunker(native_frame(service_name), rechunk_config.chunk_seconds, rechunk_config.max_latency)
+            report[key][name] = run_file(make_stream(), audio, reference, args.chunk_samples, rechunker)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(format_table(report, baseline))
+    print(f"\nReport: {args.report}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline updated: {args.baseline}")
+        return
+
+    regressions = compare(report, baseline)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("No regressions against baseline." if baseline else "No baseline yet (run with --update-baseline).")
+
+
+if __name__ == "__main__":
+    main()
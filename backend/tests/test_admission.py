@@ -0,0 +1,91 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services.admission import AdmissionController, AdmissionRejected
+
+
+def make_controller(capacity=4.0):
+    controller = AdmissionController(capacity=capacity, preference=["hybrid", "moonshine", "parakeet"])
+    controller.register("hybrid", 2.0)
+    controller.register("moonshine", 1.0)
+    controller.register("parakeet", 3.0, max_sessions=1)
+    return controller
+
+
+def test_auto_follows_preference_then_downgrades():
+    controller = make_controller()
+    assert controller.admit("auto") == "hybrid"
+    assert controller.admit("auto") == "hybrid"
+    # Hybrid no longer fits (load 4/4); nothing cheaper fits either
+    with pytest.raises(AdmissionRejected):
+        controller.admit("auto")
+    controller.release("hybrid")
+    assert controller.admit("hybrid") == "hybrid"
+
+
+def test_explicit_request_downgrades_to_cheaper_model():
+    controller = make_controller(capacity=4.0)
+    assert controller.admit("parakeet") == "parakeet"
+    # Parakeet is single-session; next cheaper model that fits is moonshine
+    assert controller.admit("parakeet") == "moonshine"
+    assert controller.downgraded == 1
+
+
+def test_unavailable_models_are_skipped():
+    controller = make_controller()
+    assert controller.admit("auto", available=lambda name: name != "hybrid") == "moonshine"
+
+
+def test_high_rtf_blocks_new_sessions():
+    controller = make_controller(capacity=100.0)
+    controller.admit("moonshine")
+    for _ in range(50):
+        controller.observe("moonshine", processing_seconds=0.3, audio_seconds=0.256)
+    with pytest.raises(AdmissionRejected):
+        controller.admit("moonshine")
+
+
+def test_one_slow_final_among_realtime_chunks_is_admitted():
+    now = [0.0]
+    controller = AdmissionController(capacity=100.0, rtf_window=10.0, clock=lambda: now[0])
+    controller.register("hybrid", 2.0)
+    controller.admit("hybrid")
+    # 5 s of speech previewed at RTF 0.1, then a Whisper final taking 2 s on one 320 ms chunk
+    for _ in range(16):
+        now[0] += 0.32
+        controller.observe("hybrid", processing_seconds=0.032, audio_seconds=0.32)
+    controller.observe("hybrid", processing_seconds=2.0, audio_seconds=0.32)
+    assert controller.host_rtf() < controller.max_rtf
+    assert controller.admit("hybrid") == "hybrid"
+
+
+def test_slow_chunks_age_out_of_the_window():
+    now = [0.0]
+    controller = AdmissionController(capacity=100.0, rtf_window=10.0, clock=lambda: now[0])
+    controller.register("moonshine", 1.0)
+    controller.admit("moonshine")
+    for _ in range(20):
+        now[0] += 0.256
+        controller.observe("moonshine", processing_seconds=0.5, audio_seconds=0.256)
+    with pytest.raises(AdmissionRejected):
+        controller.admit("moonshine")
+
+    # The session stays (silent or parked) and nothing more is observed
+    now[0] += 10.0
+    assert controller.host_rtf() == 0.0
+    assert controller.admit("moonshine") == "moonshine"
+
+
+def test_memory_pressure_blocks_new_sessions():
+    controller = make_controller()
+    pressure = [True]
+    controller.memory_pressure = lambda: pressure[0]
+    with pytest.raises(AdmissionRejected, match="memory"):
+        controller.admit("auto")
+    assert controller.rejected == 1
+    pressure[0] = False
+    assert controller.admit("auto") == "hybrid"
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services.audio.tap import AudioTap, AudioTapRegistry, TapWriter
+
+
+def test_ring_keeps_order_across_wraparound(tmp_path):
+    tap = AudioTap(str(tmp_path / "t.pcm"), capacity_seconds=1.0, sample_rate=10)
+    tap.capture(np.arange(6, dtype=np.float32))
+    assert np.array_equal(tap.drain(), np.arange(6))
+    tap.capture(np.arange(6, 14, dtype=np.float32))
+    assert np.array_equal(tap.drain(), np.arange(6, 14))
+    assert tap.dropped_samples == 0
+
+
+def test_ring_drops_oldest_when_full(tmp_path):
+    tap = AudioTap(str(tmp_path / "t.pcm"), capacity_seconds=1.0, sample_rate=10)
+    tap.capture(np.arange(8, dtype=np.float32))
+    tap.capture(np.arange(8, 14, dtype=np.float32))
+    assert tap.dropped_samples == 4
+    assert np.array_equal(tap.drain(), np.arange(4, 14))
+
+
+def test_registry_writes_pcm_on_disable(tmp_path):
+    writer = TapWriter(block_seconds=60.0, max_age_seconds=60.0, poll_interval=60.0)
+    registry = AudioTapRegistry(taps_dir=str(tmp_path), writer=writer)
+    registry.enable("s1", ["ingest"])
+    taps = registry.session("s1")
+    taps.capture("ingest", np.full(1600, 0.5, dtype=np.float32))
+    taps.capture("pre_final", np.ones(1600, dtype=np.float32))  # not enabled, ignored
+
+    registry.release("s1")
+    writer.flush()
+    writer.stop()
+
+    data = np.fromfile(tmp_path / "s1_ingest.pcm", dtype=np.int16)
+    assert len(data) == 1600
+    assert data[0] == int(0.5 * 32767)
+    assert not (tmp_path / "s1_pre_final.pcm").exists()
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services.broadcast import BroadcastHub
+
+
+def drain(subscriber):
+    async def run():
+        return [await subscriber.get() for _ in range(len(subscriber))]
+    return asyncio.run(run())
+
+
+def test_messages_are_serialized_once_for_all_listeners():
+    hub = BroadcastHub()
+    listeners = [hub.subscribe("s") for _ in range(200)]
+    hub.publish("s", {"text": "hello", "is_final": True, "segment": 0})
+    payloads = [drain(listener) for listener in listeners]
+    assert all(p[0] is payloads[0][0] for p in payloads)
+    assert json.loads(payloads[0][0]) == {"text": "hello", "is_final": True, "segment": 0}
+    # Other sessions and sessions without listeners cost nothing
+    hub.publish("other", {"text": "x", "is_final": False}, is_partial=True)
+    assert hub.stats()["published"] == 1 and hub.stats()["delivered"] == 200
+
+
+def test_slow_listener_drops_superseded_partials_first():
+    hub = BroadcastHub(max_queue=4)
+    slow = hub.subscribe("s")
+    hub.publish("s", {"text": "one.", "is_final": True}, is_partial=False)
+    for i in range(10):
+        hub.publish("s", {"text": f"two {i}", "is_final": False}, is_partial=True)
+    hub.publish("s", {"text": "two.", "is_final": True}, is_partial=False)
+    hub.publish("s", {"text": "three", "is_final": False}, is_partial=True)
+
+    texts = [json.loads(p)["text"] for p in drain(slow)]
+    # Finals survive, only the latest partial is kept
+    assert texts == ["one.", "two 9", "two.", "three"]
+    assert slow.dropped == 9
+
+
+def test_listener_behind_on_finals_loses_the_oldest():
+    hub = BroadcastHub(max_queue=2)
+    slow = hub.subscribe("s")
+    for i in range(3):
+        hub.publish("s", {"text": str(i), "is_final": True})
+    assert [json.loads(p)["text"] for p in drain(slow)] == ["1", "2"]
+
+
+def test_late_listener_gets_session_state_first():
+    hub = BroadcastHub()
+    hub.set_meta("s", {"model": "hybrid", "language": "en"})
+    listener = hub.subscribe("s")
+    hub.publish("s", {"text": "hi", "is_final": False}, is_partial=True)
+    messages = [json.loads(p) for p in drain(listener)]
+    assert messages[0] == {"event": "session", "model": "hybrid", "language": "en"}
+    assert messages[1]["text"] == "hi"
+
+    hub.end("s")
+    assert json.loads(drain(listener)[0]) == {"event": "speaker_disconnected"}
+    hub.unsubscribe(listener)
+    assert hub.stats()["subscribers"] == 0
+
+
+def test_subscriber_limit():
+    hub = BroadcastHub(max_subscribers=1)
+    hub.subscribe("s")
+    with pytest.raises(OverflowError):
+        hub.subscribe("s")
@@ -0,0 +1,204 @@
+"""
+Per-chunk CPU overhead of the Python glue around the models (no models needed).
+
+Every stream class is driven with the fakes in tests/fakes.py at the browser's
+4096-sample chunk size, so the timings measure only our own code: buffering,
+RMS/VAD bookkeeping, punctuation plumbing, beautify_text, PCM conversion and
+ingest resampling. test_browser_48k_ingest replays the ~1365-sample messages a
+48 kHz browser produces, fed directly and through the per-session Rechunker.
+
+Run (requires pytest-benchmark):
+    pytest backend/tests/test_chunk_overhead.py --benchmark-autosave
+    # later, fail if any benchmark's mean regressed by more than 25%:
+    pytest backend/tests/test_chunk_overhead.py --benchmark-compare --benchmark-compare-fail=mean:25%
+
+Allocations per chunk (tracemalloc peak) are recorded in each benchmark's
+extra_info and asserted against ALLOC_BUDGET_BYTES on every run.
+"""
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+sys.path.append(os.path.dirname(__file__))
+
+from fakes import (
+    FakeOfflineRecognizer,
+    FakeOnlineRecognizer,
+    FakePunctuation,
+    FakeVad,
+    chunks_of,
+    fake_transcribe,
+    speech_like,
+)
+from backend.services.audio.gate import SilenceGate
+from backend.services.audio.pcm import float_to_pcm16
+from backend.services.audio.rechunk import Rechunker
+from backend.services.audio.resample import StreamingResampler
+from backend.services.transcription.hybrid_service import HybridService, HybridStream
+from backend.services.transcription.mlx_whisper_service import MlxWhisperStream
+from backend.services.transcription.moonshine_service import MoonshineService, MoonshineStream
+from backend.utils.text_processing import beautify_text
+
+CHUNK_SAMPLES = 4096
+
+# Peak transient bytes allocated while processing one chunk, averaged over a
+# 20 s replay. Budgets sit ~25% above the measured values; raise them only with
+# a reason in the commit message.
+ALLOC_BUDGET_BYTES = {
+    "mlx_whisper_stream": 410_000,
+    "hybrid_stream": 420_000,
+    "moonshine_stream": 280_000,
+    "beautify_text": 2_300,
+    "pcm16_conversion": 42_000,
+    "resample_48k": 106_000,
+    "idle_hybrid_stream": 410_000,
+    "idle_gated_hybrid_stream": 2_000,
+    "hybrid_stream_48k": 403_000,
+    "hybrid_stream_48k_rechunked": 110_000,
+    "moonshine_stream_48k": 272_000,
+    "moonshine_stream_48k_rechunked": 92_000,
+}
+
+
+class FakeMlxWhisperService:
+    """Builds real MlxWhisperStreams whose transcription is stubbed out."""
+
+    def create_stream(self, taps=None):
+        stream = MlxWhisperStream("fake", "", max_buffer_duration=10.0, taps=taps)
+        stream._transcribe = fake_transcribe
+        return stream
+
+
+def make_mlx_stream():
+    return FakeMlxWhisperService().create_stream()
+
+
+def make_hybrid_stream():
+    return HybridStream(FakeMlxWhisperService(), FakeOnlineRecognizer(), FakePunctuation())
+
+
+def make_moonshine_stream():
+    return MoonshineStream(FakeOfflineRecognizer(), FakeVad(), max_buffer_duration=7.0)
+
+
+STREAMS = {
+    "mlx_whisper_stream": make_mlx_stream,
+    "hybrid_stream": make_hybrid_stream,
+    "moonshine_stream": make_moonshine_stream,
+}
+
+AUDIO = speech_like(20.0)
+CHUNKS = chunks_of(AUDIO, CHUNK_SAMPLES)
+
+
+def allocations_per_chunk(process, chunks) -> float:
+    """Mean tracemalloc peak (bytes) above the pre-call baseline for each chunk."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for chunk in chunks:
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            process(chunk)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - current)
+    finally:
+        tracemalloc.stop()
+    return float(np.mean(peaks))
+
+
+def run_replay(benchmark, name, make_process, inputs=None):
+    """Benchmark one full replay (fresh state each round) and report per-chunk numbers."""
+    inputs = CHUNKS if inputs is None else inputs
+
+    def replay():
+        process = make_process()
+        for item in inputs:
+            process(item)
+
+    benchmark.pedantic(replay, rounds=5, iterations=1, warmup_rounds=1)
+    alloc = allocations_per_chunk(make_process(), inputs)
+
+    # With --benchmark-disable the replay runs once untimed; only the allocation budget is checked
+    if not benchmark.disabled:
+        benchmark.extra_info["chunks"] = len(inputs)
+        benchmark.extra_info["us_per_chunk"] = benchmark.stats.stats.mean / len(inputs) * 1e6
+        benchmark.extra_info["alloc_bytes_per_chunk"] = alloc
+    assert alloc <= ALLOC_BUDGET_BYTES[name], f"{name}: {alloc:.0f} B/chunk > budget {ALLOC_BUDGET_BYTES[name]}"
+
+
+@pytest.mark.parametrize("name", sorted(STREAMS))
+def test_stream_accept_waveform(benchmark, name):
+    run_replay(benchmark, name, lambda: STREAMS[name]().accept_waveform)
+
+
+def test_beautify_text(benchmark):
+    # The punctuated partial HybridStream would beautify after each chunk
+    recognizer, punct = FakeOnlineRecognizer(), FakePunctuation()
+    stream = recognizer.create_stream()
+    partials = []
+    for chunk in CHUNKS:
+        stream.accept_waveform(16000, chunk)
+        partials.append(punct.add_punctuation(recognizer.get_result(stream).lower()))
+    run_replay(benchmark, "beautify_text", lambda: beautify_text, inputs=partials)
+
+
+def test_pcm16_conversion(benchmark):
+    run_replay(benchmark, "pcm16_conversion", lambda: float_to_pcm16)
+
+
+def test_resample_48k(benchmark):
+    # A 48 kHz browser chunk is 3x the samples of a 16 kHz one
+    chunks = chunks_of(speech_like(60.0), CHUNK_SAMPLES)
+    run_replay(benchmark, "resample_48k", lambda: StreamingResampler(48000).process, inputs=chunks)
+
+
+def make_gated_hybrid_session():
+    process, gate = make_hybrid_stream().accept_waveform, SilenceGate()
+
+    def process_chunk(chunk):
+        samples, _ = gate.process(chunk)
+        if len(samples):
+            process(samples)
+    return process_chunk
+
+
+IDLE_CHUNKS = chunks_of((0.001 * np.random.default_rng(0).standard_normal(20 * 16000)).astype(np.float32), CHUNK_SAMPLES)
+
+
+@pytest.mark.parametrize("name,make_process", [
+    ("idle_hybrid_stream", lambda: make_hybrid_stream().accept_waveform),
+    ("idle_gated_hybrid_stream", make_gated_hybrid_session),
+])
+def test_idle_session(benchmark, name, make_process):
+    # Room noise only: what a connected-but-silent user costs with and without the ingest gate
+    run_replay(benchmark, name, make_process, inputs=IDLE_CHUNKS)
+
+
+# What a 48 kHz browser actually delivers: 4096 device samples -> ~1365 at 16 kHz
+BROWSER_48K_CHUNKS = chunks_of(AUDIO, 1365)
+NATIVE_FRAMES = {"hybrid_stream": HybridService.FRAME_SAMPLES, "moonshine_stream": MoonshineService.FRAME_SAMPLES}
+
+
+def make_rechunked(name):
+    process, rechunker = STREAMS[name]().accept_waveform, Rechunker(NATIVE_FRAMES[name])
+
+    def process_chunk(chunk):
+        for block in rechunker.push(chunk):
+            process(block)
+    return process_chunk
+
+
+@pytest.mark.parametrize("name", sorted(NATIVE_FRAMES))
+@pytest.mark.parametrize("rechunked", [False, True], ids=["direct", "rechunked"])
+def test_browser_48k_ingest(benchmark, name, rechunked):
+    # Same audio, same per-message accounting; rechunked sessions call the model once per native block
+    make_process = (lambda: make_rechunked(name)) if rechunked else (lambda: STREAMS[name]().accept_waveform)
+    label = f"{name}_48k" + ("_rechunked" if rechunked else "")
+    run_replay(benchmark, label, make_process, inputs=BROWSER_48K_CHUNKS)
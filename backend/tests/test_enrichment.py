@@ -0,0 +1,100 @@
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services.recordings.enrichment import RecordingEnricher, align
+from backend.services.recordings.transcript_store import TranscriptStore
+
+TURNS = [(0.0, 2.0, 0), (2.0, 4.0, 1)]
+
+
+def test_align_splits_segments_where_the_speaker_changes():
+    segments = [{
+        "start": 0.5, "end": 3.5, "text": "Hello there. Hi!",
+        "words": [
+            {"start": 0.5, "end": 1.0, "word": " Hello"},
+            {"start": 1.0, "end": 1.8, "word": " there."},
+            {"start": 2.2, "end": 3.5, "word": " Hi!"},
+        ],
+    }]
+    rows = align(segments, TURNS)
+    assert rows == [
+        {"start_sample": 8000, "end_sample": 28800, "text": "Hello there.", "speaker": 0},
+        {"start_sample": 35200, "end_sample": 56000, "text": "Hi!", "speaker": 1},
+    ]
+
+
+def test_align_without_words_or_diarization():
+    segments = [{"start": 1.5, "end": 3.9, "text": " Mostly the second speaker ", "words": []}]
+    assert align(segments, TURNS)[0]["speaker"] == 1
+    # Diarization unavailable: the transcript is still placed on the timeline
+    assert align(segments, None) == [{"start_sample": 24000, "end_sample": 62400, "text": "Mostly the second speaker",
+                                      "speaker": None}]
+
+
+class ScriptedEnricher(RecordingEnricher):
+    """Runs a stand-in worker that takes a while and returns a fixed transcript."""
+
+    def _command(self, job):
+        result = {"model": "fake", "language": job.language, "duration": 1.0, "diarized": True, "speakers": 1,
+                  "segments": [{"start_sample": 0, "end_sample": 16000, "text": "enriched", "speaker": 0}]}
+        script = f"import time; time.sleep(0.6); print({json.dumps(json.dumps(result))})"
+        return [sys.executable, "-c", script]
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = TranscriptStore(str(tmp_path / "transcripts.sqlite3"), flush_interval=0.05)
+    yield s
+    s.close()
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.mark.skipif(not hasattr(os, "kill") or sys.platform == "win32", reason="needs SIGSTOP")
+def test_worker_is_paused_while_live_sessions_are_busy(store, tmp_path):
+    live_busy = threading.Event()
+    enricher = ScriptedEnricher(store, busy=live_busy.is_set, poll_interval=0.02, resume_after=0.1)
+    try:
+        job = enricher.submit("s1", str(tmp_path / "s1.flac"), "de")
+        wait_for(lambda: job.status == "running")
+        live_busy.set()
+        wait_for(lambda: job.status == "paused")
+        time.sleep(0.8)
+        # Stopped, so it can't have finished despite its run time having passed
+        assert job.status == "paused"
+        live_busy.clear()
+        wait_for(lambda: job.finished_at is not None)
+    finally:
+        enricher.shutdown()
+
+    assert job.status == "done", job.error
+    assert job.pauses == 1 and job.paused_seconds >= 0.8
+    rows = store.enriched_segments("s1")
+    assert [(r["text"], r["speaker"], r["language"]) for r in rows] == [("enriched", 0, "de")]
+
+
+def test_jobs_wait_for_live_load_to_drop(store, tmp_path):
+    live_busy = threading.Event()
+    live_busy.set()
+    enricher = ScriptedEnricher(store, busy=live_busy.is_set, poll_interval=0.02)
+    try:
+        job = enricher.submit("s2", str(tmp_path / "s2.flac"))
+        time.sleep(0.2)
+        assert job.status == "queued" and enricher.stats()["queued"] == 1
+        live_busy.clear()
+        wait_for(lambda: job.finished_at is not None)
+    finally:
+        enricher.shutdown()
+    assert job.status == "done" and job.pauses == 0
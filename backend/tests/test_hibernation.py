@@ -0,0 +1,71 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services.hibernation import HibernationManager, SessionSnapshot, StreamPool, spill_recording
+
+
+class CountingService:
+    def __init__(self):
+        self.created = 0
+
+    def create_stream(self, taps=None):
+        self.created += 1
+        return {"id": self.created, "taps": taps}
+
+
+class SharedStreamService(CountingService):
+    POOL_STREAMS = False
+
+
+def test_pool_serves_warm_streams_then_falls_back():
+    service = CountingService()
+    pool = StreamPool(service, size=2)
+    pool.refill()
+    assert service.created == 2
+
+    assert pool.acquire()["id"] == 1
+    assert pool.acquire()["id"] == 2
+    assert pool.acquire()["id"] == 3  # Pool empty: created on demand
+    assert pool.stats() == {"idle_streams": 0, "hits": 2, "misses": 1}
+
+
+def test_pool_never_hands_out_untapped_streams_to_tapped_sessions():
+    pool = StreamPool(CountingService(), size=1)
+    pool.refill()
+    assert pool.acquire(taps="taps")["taps"] == "taps"
+    assert pool.stats()["idle_streams"] == 1
+
+
+def test_pool_disabled_for_services_with_a_shared_stream():
+    service = SharedStreamService()
+    pool = StreamPool(service, size=2)
+    pool.refill()
+    assert service.created == 0
+
+
+def test_spill_recording_appends_and_clears(tmp_path):
+    path = str(tmp_path / "s.pcm.part")
+    buffer = bytearray(b"\x01\x00" * 10)
+    assert spill_recording(buffer, path) == 20
+    assert len(buffer) == 0
+
+    buffer.extend(b"\x02\x00" * 5)
+    assert spill_recording(buffer, path) == 30
+    assert open(path, "rb").read() == b"\x01\x00" * 10 + b"\x02\x00" * 5
+
+
+def test_manager_tracks_hibernated_sessions_and_rehydration_latency():
+    manager = HibernationManager(pool_size=1)
+    snapshot = SessionSnapshot("s1", "moonshine", last_final_text="hello", finals=1)
+
+    manager.hibernate("k", snapshot)
+    assert manager.stats()["hibernated_sessions"] == 1
+    assert snapshot.hibernations == 1
+
+    manager.woke("k", 0.004)
+    stats = manager.stats()
+    assert stats["hibernated_sessions"] == 0
+    assert stats["rehydrations"] == 1
+    assert stats["rehydration_ms"]["max"] == 4.0
@@ -0,0 +1,94 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+sys.path.append(os.path.dirname(__file__))
+
+from backend.services.language_id import LanguageDetector
+from fakes import FakeLanguageIdentifier, chunks_of, speech_like
+
+SAMPLE_RATE = 16000
+
+
+def test_speech_is_held_until_identified_then_replayed_in_order():
+    identifier = FakeLanguageIdentifier(["fr"])
+    detector = LanguageDetector(identifier, detect_seconds=1.0)
+    chunks = list(chunks_of(speech_like(1.5), 4000))
+
+    ready = [detector.add(chunk) for chunk in chunks[:4]]
+    assert ready == [False, False, False, True]
+    assert detector.pending and not detector.decided
+
+    assert detector.identify() == "fr"
+    assert identifier.heard == [SAMPLE_RATE]
+    replay = detector.take_buffered()
+    # Nothing heard before the decision is lost, and chunking is preserved
+    assert len(replay) == 4 and all(a is b for a, b in zip(replay, chunks))
+    assert detector.decided and not detector.pending
+
+
+def test_short_utterance_is_identified_on_silence():
+    detector = LanguageDetector(FakeLanguageIdentifier(["ko"]), detect_seconds=3.0)
+    assert not detector.add(speech_like(0.5))
+    # The server identifies whatever is held once the gate closes
+    assert detector.pending
+    assert detector.identify() == "ko"
+    assert sum(len(c) for c in detector.take_buffered()) == SAMPLE_RATE // 2
+
+
+def test_failed_identification_leaves_language_unset():
+    class Broken:
+        def identify(self, samples):
+            raise RuntimeError("onnx error")
+
+    detector = LanguageDetector(Broken(), detect_seconds=0.5)
+    detector.add(speech_like(0.5))
+    assert detector.identify() is None
+    assert detector.decided
+
+
+def test_recheck_switches_only_after_confirmations():
+    identifier = FakeLanguageIdentifier(["en", "de", "en", "de", "de"])
+    detector = LanguageDetector(identifier, detect_seconds=1.0, recheck_seconds=0.5, confirmations=2)
+    for chunk in chunks_of(speech_like(1.0), 4000):
+        detector.add(chunk)
+    assert detector.identify() == "en"
+    detector.take_buffered()
+
+    switches = []
+    for chunk in chunks_of(speech_like(2.5), 4000):
+        if detector.observe(chunk):
+            switches.append(detector.recheck(detector.recheck_audio()))
+            if switches[-1]:
+                detector.switched(switches[-1])
+    # "de", back to "en" (resets the vote), then "de" twice in a row; after the switch "de" is no news
+    assert switches == [None, None, None, "de", None]
+    assert detector.language == "de"
+    # Rechecks look at the latest detect_seconds of speech only
+    assert all(n == SAMPLE_RATE for n in identifier.heard[1:])
+
+
+def test_rechecks_disabled_by_default():
+    detector = LanguageDetector(FakeLanguageIdentifier(), detect_seconds=0.5)
+    detector.add(speech_like(0.5))
+    detector.identify()
+    assert not any(detector.observe(np.zeros(4000, dtype=np.float32)) for _ in range(20))
+
+
+def test_recheck_audio_is_unaffected_by_later_speech():
+    detector = LanguageDetector(FakeLanguageIdentifier(), detect_seconds=0.5, recheck_seconds=0.5)
+    detector.add(speech_like(0.5))
+    detector.identify()
+    detector.take_buffered()
+    chunks = list(chunks_of(speech_like(1.0), 4000))
+    due = [detector.observe(chunk) for chunk in chunks[:2]]
+    assert due[-1]
+    audio = detector.recheck_audio()
+    expected = audio.copy()
+    # More speech arrives while the recheck would be running in a worker thread
+    for chunk in chunks[2:]:
+        detector.observe(chunk)
+    assert np.array_equal(audio, expected)
+    assert np.array_equal(audio, np.concatenate(chunks[:2]))
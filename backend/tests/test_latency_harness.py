@@ -0,0 +1,72 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+sys.path.append(os.path.dirname(__file__))
+
+from fakes import FakeOfflineRecognizer, FakeOnlineRecognizer, FakePunctuation, speech_like
+from latency.harness import compare, run_file, speech_regions, word_error_rate
+from backend.services.audio.rechunk import Rechunker
+from backend.services.transcription.hybrid_service import HybridService, HybridStream
+from backend.services.transcription.offline_final_pass import OfflineFinalPassService
+
+
+def test_word_error_rate():
+    assert word_error_rate("Hello, world.", "hello world") == 0.0
+    assert word_error_rate("hello there world", "hello world") == 0.5
+    assert word_error_rate("", "hello world") == 1.0
+
+
+def test_speech_regions_merge_short_gaps():
+    audio = np.concatenate((
+        speech_like(1.0), np.zeros(1600, dtype=np.float32),    # 0.1 s gap: merged
+        speech_like(1.0), np.zeros(16000, dtype=np.float32),   # 1.0 s gap: split
+        speech_like(0.5),
+    ))
+    regions = speech_regions(audio)
+    assert len(regions) == 2
+    assert regions[0][1] == pytest.approx(2.1, abs=0.03)
+
+
+def test_run_file_hybrid_cpu_with_fakes():
+    final_pass = OfflineFinalPassService(FakeOfflineRecognizer())
+    stream = HybridStream(final_pass, FakeOnlineRecognizer(), FakePunctuation())
+    audio = np.concatenate((speech_like(3.0), np.zeros(16000, dtype=np.float32), speech_like(2.0)))
+
+    metrics = run_file(stream, audio, reference="so i think the latency is fine")
+    assert metrics["finals"] >= 2
+    assert metrics["first_partial_ms"] is not None and metrics["first_partial_ms"] >= 0
+    # Silence trigger is 0.6 s; a final can't arrive before it, nor absurdly later
+    assert 500 <= metrics["eos_to_final_mean_ms"] <= 1500
+    assert 0 < metrics["rtf"] < 1
+
+
+def test_compare_flags_only_real_regressions():
+    base = {"svc": {"a": {"first_partial_ms": 300, "eos_to_final_mean_ms": 700, "eos_to_final_max_ms": 900,
+                          "rtf": 0.1, "wer": 0.1}}}
+    noise = {"svc": {"a": {"first_partial_ms": 340, "eos_to_final_mean_ms": 720, "eos_to_final_max_ms": 900,
+                           "rtf": 0.11, "wer": 0.11}}}
+    worse = {"svc": {"a": {"first_partial_ms": 300, "eos_to_final_mean_ms": 1000, "eos_to_final_max_ms": 900,
+                           "rtf": 0.1, "wer": 0.2}}}
+    assert compare(noise, base) == []
+    assert len(compare(worse, base)) == 2
+
+
+def test_run_file_rechunked_keeps_preview_cadence():
+    # 48 kHz browser messages; the fake Zipformer only decodes whole 320 ms chunks, like the real one
+    audio = np.concatenate((speech_like(3.0), np.zeros(16000, dtype=np.float32), speech_like(2.0)))
+
+    def run(rechunker):
+        online = FakeOnlineRecognizer(chunk_samples=HybridService.FRAME_SAMPLES, words_per_second=8.0)
+        stream = HybridStream(OfflineFinalPassService(FakeOfflineRecognizer()), online, FakePunctuation())
+        return run_file(stream, audio, reference="", chunk_samples=1365, rechunker=rechunker)
+
+    direct, rechunked = run(None), run(Rechunker(HybridService.FRAME_SAMPLES))
+    # Latencies include measured processing time, so allow a few milliseconds either way
+    assert abs(rechunked["first_partial_ms"] - direct["first_partial_ms"]) <= 5
+    assert rechunked["finals"] == direct["finals"]
+    assert rechunked["partial_jitter_ms"] is not None
+    assert rechunked["partial_jitter_ms"] <= direct["partial_jitter_ms"] + 10
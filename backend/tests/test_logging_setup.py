@@ -0,0 +1,90 @@
+import asyncio
+import json
+import logging
+import os
+import queue
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.core.logging_setup import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    SessionContextFilter,
+    SessionRateLimiter,
+    session_id_var,
+)
+
+
+def make_record(msg="x", level=logging.INFO, **extra):
+    record = logging.LogRecord("server", level, __file__, 1, msg, None, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_partials_are_rate_limited_per_session_but_finals_and_errors_kept():
+    limiter = SessionRateLimiter(rate=0.0, burst=2)
+    kept = [limiter.filter(make_record(session_id="a", event="partial")) for _ in range(5)]
+    assert kept == [True, True, False, False, False]
+
+    # Another session has its own budget
+    assert limiter.filter(make_record(session_id="b", event="partial"))
+    # Finals, untagged records and errors are never sampled
+    assert limiter.filter(make_record(session_id="a", event="final"))
+    assert limiter.filter(make_record(session_id="a"))
+    assert limiter.filter(make_record(session_id="a", event="partial", level=logging.ERROR))
+    assert limiter.suppressed_total == 3
+
+
+def test_next_kept_partial_reports_suppressed_count():
+    limiter = SessionRateLimiter(rate=0.0, burst=1)
+    limiter.filter(make_record(session_id="a", event="partial"))
+    for _ in range(4):
+        limiter.filter(make_record(session_id="a", event="partial"))
+
+    limiter.rate = 1e9  # Refill instantly
+    record = make_record(session_id="a", event="partial")
+    assert limiter.filter(record)
+    assert record.suppressed == 4
+
+
+def test_session_id_follows_into_worker_threads():
+    records = []
+
+    class Collect(logging.Handler):
+        def emit(self, record):
+            records.append(record)
+
+    logger = logging.getLogger("test_logging_setup")
+    handler = Collect()
+    handler.addFilter(SessionContextFilter())
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+    async def session():
+        session_id_var.set("s42")
+        await asyncio.to_thread(logger.info, "from inference thread")
+
+    try:
+        asyncio.run(session())
+    finally:
+        logger.removeHandler(handler)
+    assert records[0].session_id == "s42"
+
+
+def test_json_formatter_includes_extra_fields():
+    record = make_record("Sending text: hi", session_id="s1", event="final", text="hi")
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["session_id"] == "s1"
+    assert entry["event"] == "final"
+    assert entry["text"] == "hi"
+    assert entry["msg"] == "Sending text: hi"
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(make_record())
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
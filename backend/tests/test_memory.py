@@ -0,0 +1,88 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+sys.path.append(os.path.dirname(__file__))
+
+from fakes import FakeOfflineRecognizer, FakeOnlineRecognizer, FakePunctuation, chunks_of, speech_like
+from backend.services.memory import MemoryAccountant, process_rss_bytes
+from backend.services.transcription.hybrid_service import HybridStream
+from backend.services.transcription.offline_final_pass import OfflineFinalPassService
+
+MB = 1024 * 1024
+
+
+class FakeRss:
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self):
+        return self.value
+
+
+def test_usage_is_sorted_by_total_and_skips_failing_probes():
+    memory = MemoryAccountant()
+    memory.register("a", "small", lambda: {"recording": 100, "send_queue": 0})
+    memory.register("b", "large", lambda: {"recording": 5000, "audio_buffer": 2000})
+    memory.register("c", "broken", lambda: 1 / 0)
+
+    usage = memory.usage()
+    assert [entry["session_id"] for entry in usage] == ["large", "small"]
+    assert usage[0]["bytes"] == 7000
+    assert usage[1]["components"] == {"recording": 100}  # Empty components are left out
+
+    stats = memory.stats(limit=1)
+    assert stats["accounted"] == 7100
+    assert [entry["session_id"] for entry in stats["top"]] == ["large"]
+
+    memory.unregister("b")
+    assert [entry["session_id"] for entry in memory.usage()] == ["small"]
+
+
+def test_watermark_sheds_largest_sessions_first_with_hysteresis():
+    rss = FakeRss(90 * MB)
+    memory = MemoryAccountant(watermark_bytes=100 * MB, resume_fraction=0.9, rss=rss)
+    shed = []
+    for name, size in (("a", 3 * MB), ("b", 20 * MB), ("c", 8 * MB)):
+        memory.register(name, name, lambda size=size: {"recording": size}, lambda name=name: shed.append(name))
+
+    assert memory.check() == 0 and not memory.over_watermark()
+
+    # 105 MB: shed until RSS should be under 90 MB; the largest session alone covers it
+    rss.value = 105 * MB
+    assert memory.check() == 1
+    assert shed == ["b"] and memory.over_watermark()
+
+    # Still above the resume level: keeps refusing and shedding
+    rss.value = 95 * MB
+    memory.check()
+    assert memory.over_watermark()
+    rss.value = 85 * MB
+    assert memory.check() == 0
+    assert not memory.over_watermark()
+
+
+def test_no_watermark_without_rss():
+    memory = MemoryAccountant(watermark_bytes=1, rss=lambda: None)
+    memory.register("a", "a", lambda: {"recording": 10}, lambda: None)
+    assert memory.check() == 0
+    assert not memory.over_watermark()
+    assert process_rss_bytes() is None or process_rss_bytes() > 0
+
+
+def test_hybrid_stream_reports_buffers_until_final():
+    final_pass = OfflineFinalPassService(FakeOfflineRecognizer())
+    stream = HybridStream(final_pass, FakeOnlineRecognizer(), FakePunctuation())
+    for chunk in chunks_of(speech_like(2.0)):
+        stream.accept_waveform(chunk)
+    usage = stream.memory_usage()
+    assert usage["audio_buffer"] == len(chunks_of(speech_like(2.0))) * 4096 * 4
+    assert usage["zipformer_features"] > 0
+
+    results = []
+    for chunk in chunks_of(np.zeros(16000, dtype=np.float32)):
+        results.extend(stream.accept_waveform(chunk))
+    assert any(res["is_final"] for res in results)
+    assert stream.memory_usage()["zipformer_features"] < usage["zipformer_features"]
@@ -0,0 +1,41 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+sys.path.append(os.path.dirname(__file__))
+
+from backend.services.audio.gate import SilenceGate
+from backend.services.transcription.mlx_whisper_service import MlxWhisperStream
+from fakes import chunks_of, fake_transcribe, speech_like
+
+
+def gated_stream(silence_trigger: float, hangover: float = 1.0):
+    stream = MlxWhisperStream("unused", "", max_buffer_duration=30.0, silence_trigger=silence_trigger,
+                              max_silence_trigger=hangover)
+    stream._transcribe = fake_transcribe
+    return stream
+
+
+def test_silence_trigger_shorter_than_the_gate_hangover_fires_a_final():
+    gate = SilenceGate(hangover=1.0)
+    stream = gated_stream(silence_trigger=0.6)
+    audio = np.concatenate((speech_like(2.0), np.zeros(3 * 16000, dtype=np.float32)))
+    results = []
+    for chunk in chunks_of(audio, 1365):
+        forwarded, _ = gate.process(chunk)
+        if len(forwarded):
+            results.extend(stream.accept_waveform(forwarded))
+    assert [r["is_final"] for r in results] == [True]
+
+
+def test_configure_rejects_a_silence_trigger_the_gate_never_forwards():
+    stream = gated_stream(silence_trigger=0.6, hangover=1.0)
+    with pytest.raises(ValueError):
+        stream.configure(silence_trigger=1.2)
+    assert stream.configure(silence_trigger=0.8)["silence_trigger"] == 0.8
+    # Without a gate any positive trigger is reachable
+    ungated = MlxWhisperStream("unused", "", max_buffer_duration=30.0)
+    assert ungated.configure(silence_trigger=1.2)["silence_trigger"] == 1.2
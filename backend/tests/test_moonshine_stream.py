@@ -0,0 +1,150 @@
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services.transcription.moonshine_batch import MoonshineBatchScheduler
+from backend.services.transcription.moonshine_service import MoonshineStream
+
+
+class FakeStream:
+    def __init__(self):
+        self.samples = np.array([], dtype=np.float32)
+        self.result = SimpleNamespace(text="")
+
+    def accept_waveform(self, sample_rate, samples):
+        self.samples = samples
+
+
+class FakeRecognizer:
+    """Each run of constant non-zero amplitude decodes to one word, e.g. 0.3 -> 'w3'."""
+
+    def __init__(self):
+        self.decoded_samples = []
+
+    def create_stream(self):
+        return FakeStream()
+
+    def decode_stream(self, stream):
+        self.decoded_samples.append(len(stream.samples))
+        words = []
+        prev = 0.0
+        for v in np.round(stream.samples, 2):
+            if v != prev and v != 0.0:
+                words.append(f"w{int(round(v * 10))}")
+            prev = v
+        stream.result.text = " ".join(words)
+
+
+class FakeVad:
+    def accept_waveform(self, samples):
+        pass
+
+    def empty(self):
+        return True
+
+    def is_speech_detected(self):
+        return True
+
+    def reset(self):
+        pass
+
+
+def make_speech(n_words, word_seconds=0.4, gap_seconds=0.1):
+    parts = []
+    for i in range(n_words):
+        parts.append(np.full(int(word_seconds * 16000), (i + 1) / 10, dtype=np.float32))
+        parts.append(np.zeros(int(gap_seconds * 16000), dtype=np.float32))
+    return np.concatenate(parts)
+
+
+def feed(stream, audio, chunk=4000):
+    results = []
+    for i in range(0, len(audio), chunk):
+        results.extend(stream.accept_waveform(audio[i:i + chunk]))
+    return results
+
+
+def test_interim_window_shrinks_and_text_is_complete():
+    recognizer = FakeRecognizer()
+    stream = MoonshineStream(recognizer, FakeVad(), max_buffer_duration=30.0)
+    results = feed(stream, make_speech(9))
+
+    interims = [r["text"] for r in results if not r["is_final"]]
+    assert interims[-1] == " ".join(f"w{i}" for i in range(1, 10))
+    assert stream.locked_words
+    assert stream.window_start > 0
+    # Later interims decode far less than the whole buffer
+    assert recognizer.decoded_samples[-1] < len(stream.buffer)
+
+
+def test_final_decodes_whole_buffer_and_resets():
+    recognizer = FakeRecognizer()
+    stream = MoonshineStream(recognizer, FakeVad(), max_buffer_duration=4.0)
+    results = feed(stream, make_speech(9))
+
+    finals = [r["text"] for r in results if r["is_final"]]
+    assert finals[0] == " ".join(f"w{i}" for i in range(1, 9))
+    assert stream.stats()["interim_decodes"] > 0
+    assert stream.window_start <= len(stream.buffer)
+
+
+def test_finalize_flushes_buffer_without_waiting_for_vad():
+    recognizer = FakeRecognizer()
+    stream = MoonshineStream(recognizer, FakeVad(), max_buffer_duration=30.0)
+    feed(stream, make_speech(3))
+    assert stream.finalize() == [{"text": "w1 w2 w3", "is_final": True}]
+    assert len(stream.buffer) == 0 and not stream.locked_words
+    # Nothing buffered, nothing to finalize
+    assert stream.finalize() == []
+
+
+def test_configure_changes_interim_rate():
+    recognizer = FakeRecognizer()
+    stream = MoonshineStream(recognizer, FakeVad(), max_buffer_duration=30.0)
+    assert stream.configure(interim_interval=1.5)["interim_interval"] == 1.5
+    assert stream.max_interim_interval == 2.0
+    interims = [r for r in feed(stream, make_speech(6)) if not r["is_final"]]
+    # 3 seconds of audio: an interim every 1.5s instead of every 0.5s
+    assert len(interims) == 2
+
+    with pytest.raises(ValueError):
+        stream.configure(interim_interval=0)
+
+
+def test_batch_scheduler_prioritises_finals_and_batches_sessions():
+    class BatchRecognizer(FakeRecognizer):
+        def __init__(self):
+            super().__init__()
+            self.batches = []
+
+        def decode_streams(self, streams):
+            self.batches.append([len(s.samples) for s in streams])
+            for s in streams:
+                self.decode_stream(s)
+
+    recognizer = BatchRecognizer()
+    scheduler = MoonshineBatchScheduler(recognizer, max_batch_size=4, max_wait=0.2)
+    texts = {}
+
+    def worker(i):
+        audio = np.full(1600 * (i + 1), (i + 1) / 10, dtype=np.float32)
+        texts[i] = scheduler.decode(audio, final=(i == 3)).text
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    scheduler.stop()
+
+    assert texts == {i: f"w{i + 1}" for i in range(4)}
+    assert scheduler.requests == 4
+    assert scheduler.batches < 4
+    # Each group is sorted by length to limit padding
+    assert all(group == sorted(group) for group in recognizer.batches)
@@ -0,0 +1,72 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+sys.path.append(os.path.dirname(__file__))
+
+from backend.core.profiler import ProfilerBusy, SamplingProfiler
+from backend.services.transcription.hybrid_service import HybridStream
+from backend.services.transcription.mlx_whisper_service import MlxWhisperStream
+from fakes import FakeOnlineRecognizer, FakePunctuation, fake_transcribe, speech_like
+
+
+class FakeMlxWhisperService:
+    def create_stream(self, taps=None):
+        stream = MlxWhisperStream("unused", "", max_buffer_duration=1000.0, taps=taps)
+        stream._transcribe = fake_transcribe
+        return stream
+
+
+def test_samples_worker_threads_tagged_by_stage():
+    stop = threading.Event()
+
+    def worker():
+        # A partial session that never finalizes: Zipformer, punctuation and beautify every chunk
+        while not stop.is_set():
+            stream = HybridStream(FakeMlxWhisperService(), FakeOnlineRecognizer(), FakePunctuation())
+            chunk = speech_like(0.25)
+            for _ in range(40):
+                stream.accept_waveform(chunk)
+
+    thread = threading.Thread(target=worker, name="asyncio_3")
+    thread.start()
+    try:
+        result = SamplingProfiler(interval=0.002).profile(0.5)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert result["samples"] > 10
+    assert {"hybrid_stream", "beautify"} & set(result["stages"])
+
+    lines = result["collapsed"].splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    # Worker thread names fold into one root; the stage comes first
+    hybrid = [line for line in lines if "HybridStream.accept_waveform" in line]
+    assert hybrid and all(";asyncio;" in line for line in hybrid)
+    assert all(line.split(";", 1)[0] in ("hybrid_stream", "punctuation", "beautify") for line in hybrid)
+
+
+def test_only_one_profile_at_a_time():
+    profiler = SamplingProfiler(interval=0.01)
+    started = threading.Event()
+    results = []
+
+    def long_profile():
+        started.set()
+        results.append(profiler.profile(0.3))
+
+    thread = threading.Thread(target=long_profile)
+    thread.start()
+    started.wait()
+    while not profiler.running:
+        time.sleep(0.001)
+    with pytest.raises(ProfilerBusy):
+        profiler.profile(0.1)
+    thread.join()
+    assert not profiler.running and results[0]["samples"] > 0
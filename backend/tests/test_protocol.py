@@ -0,0 +1,82 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.core.protocol import PartialEncoder, common_prefix_length, parse_control
+
+
+class Client:
+    """What the frontend does with protocol 2 messages (offsets in UTF-16 units, like JS strings)."""
+
+    def __init__(self):
+        self.partial = ""
+        self.finals = []
+        self.seq = 0
+        self.stale = False
+
+    def receive(self, message):
+        if message["seq"] != self.seq + 1:
+            self.stale = True
+        self.seq = message["seq"]
+        if message["is_final"]:
+            self.finals.append((message["segment"], message["text"]))
+            self.partial, self.stale = "", False
+        elif "text" in message:
+            self.partial, self.stale = message["text"], False
+        elif not self.stale:
+            units = self.partial.encode("utf-16-le")[:2 * message["offset"]].decode("utf-16-le")
+            self.partial = units + message["suffix"]
+
+
+def test_common_prefix_length():
+    assert common_prefix_length("hello world", "hello there") == 6
+    assert common_prefix_length("abc", "abc") == 3
+    assert common_prefix_length("abc", "abcdef") == 3
+    assert common_prefix_length("", "abc") == 0
+    assert common_prefix_length("xbc", "abc") == 0
+
+
+def test_deltas_reconstruct_every_partial():
+    encoder = PartialEncoder(snapshot_every=1000, snapshot_interval=1000)
+    client = Client()
+    partials = ["so", "so i", "so i think", "So, I think we", "So, I think we should 🚀 ship", "So, I think we should 🚀 ship it"]
+    for text in partials:
+        message = encoder.encode(text, is_final=False)
+        assert "text" not in message
+        client.receive(message)
+        assert client.partial == text
+    # The growing tail is all that's resent
+    assert message["suffix"] == " it"
+
+    client.receive(encoder.encode("So, I think we should ship it.", is_final=True, segment=0))
+    assert client.finals == [(0, "So, I think we should ship it.")] and client.partial == ""
+    # Next utterance starts from scratch
+    client.receive(encoder.encode("next", is_final=False))
+    assert client.partial == "next"
+
+
+def test_periodic_snapshots_resynchronize_a_client_that_missed_messages():
+    encoder = PartialEncoder(snapshot_every=4, snapshot_interval=1000)
+    client = Client()
+    texts = [" ".join(["word"] * n) for n in range(1, 10)]
+    messages = [encoder.encode(t, is_final=False) for t in texts]
+    assert [m.get("snapshot", False) for m in messages] == [False, False, False, True, False, False, False, True, False]
+
+    for i, message in enumerate(messages):
+        if i == 1:
+            continue  # Lost
+        client.receive(message)
+        if i == 2:
+            assert client.stale
+    assert not client.stale and client.partial == texts[-1]
+
+
+def test_parse_control_frames():
+    assert parse_control('{"type": "flush"}') == {"type": "flush"}
+    assert parse_control('{"type": "configure", "params": {"interim_interval": 1.0}}')["params"] == {"interim_interval": 1.0}
+    for bad in ("flush", '{"type": "restart"}', '{"type": "configure"}', "[]"):
+        with pytest.raises(ValueError):
+            parse_control(bad)
@@ -0,0 +1,60 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+sys.path.append(os.path.dirname(__file__))
+
+from fakes import chunks_of, speech_like
+from backend.services.audio.rechunk import Rechunker
+
+AUDIO = speech_like(5.0)
+
+
+def replay(rechunker, chunk_samples):
+    blocks = []
+    for chunk in chunks_of(AUDIO, chunk_samples):
+        blocks.extend(rechunker.push(chunk))
+    return blocks
+
+
+def test_blocks_are_whole_frames_in_order():
+    rechunker = Rechunker(512, chunk_seconds=0.25)
+    assert rechunker.block_samples == 8 * 512
+
+    blocks = replay(rechunker, 1365)
+    assert {len(b) for b in blocks} == {4096}
+    assert rechunker.pending < 4096
+    # Nothing lost or reordered, flush included
+    blocks += rechunker.take(flush=True)
+    assert np.array_equal(np.concatenate(blocks), np.concatenate(chunks_of(AUDIO, 1365)))
+    assert rechunker.pending == 0
+
+
+def test_block_is_at_least_one_frame():
+    rechunker = Rechunker(5120, chunk_seconds=0.1)
+    assert rechunker.block_samples == 5120
+    assert {len(b) for b in replay(rechunker, 1365)} == {5120}
+
+
+def test_latency_cap_releases_whole_frames_early():
+    # 1 s blocks, but nothing may wait longer than 0.2 s
+    rechunker = Rechunker(512, chunk_seconds=1.0, max_latency=0.2)
+    blocks = replay(rechunker, 1365)
+    assert all(len(b) % 512 == 0 for b in blocks)
+    assert rechunker.pending < 0.2 * 16000
+    assert rechunker.early > 0
+
+
+def test_retarget_keeps_pending_audio():
+    rechunker = Rechunker(5120)
+    assert rechunker.push(AUDIO[:3000]) == []
+    rechunker.set_frame(512)
+    blocks = rechunker.push(AUDIO[3000:4096])
+    assert [len(b) for b in blocks] == [4096]
+    assert np.array_equal(blocks[0], AUDIO[:4096])
+
+    with pytest.raises(ValueError):
+        rechunker.set_frame(0)
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services.audio.resample import StreamingResampler
+
+
+def tone(freq, rate, seconds=1.0, amplitude=0.5):
+    t = np.arange(int(rate * seconds)) / rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+@pytest.mark.parametrize("rate", [8000, 22050, 44100, 48000])
+def test_chunked_output_matches_one_shot(rate):
+    audio = tone(440, rate, seconds=2.0)
+    whole = StreamingResampler(rate).process(audio)
+
+    resampler = StreamingResampler(rate)
+    # Uneven chunk sizes, including ones smaller than the filter
+    sizes = [4096, 17, 1, 3000, 512]
+    pieces, i, k = [], 0, 0
+    while i < len(audio):
+        pieces.append(resampler.process(audio[i:i + sizes[k % len(sizes)]]))
+        i += sizes[k % len(sizes)]
+        k += 1
+
+    assert len(whole) == 32000
+    np.testing.assert_allclose(np.concatenate(pieces), whole, atol=1e-6)
+
+
+@pytest.mark.parametrize("rate", [44100, 48000])
+def test_passband_kept_and_aliases_rejected(rate):
+    passed = StreamingResampler(rate).process(tone(1000, rate))[2000:-2000]
+    # 11 kHz is above the 8 kHz output Nyquist; naive decimation would fold it to 5 kHz
+    aliased = StreamingResampler(rate).process(tone(11000, rate))[2000:-2000]
+
+    assert np.abs(passed).max() == pytest.approx(0.5, abs=0.01)
+    assert np.abs(aliased).max() < 0.005
+
+
+def test_stereo_downmix_across_chunk_boundaries():
+    left, right = tone(440, 48000), -0.5 * tone(440, 48000)
+    interleaved = np.stack((left, right), axis=1).ravel()
+
+    resampler = StreamingResampler(48000, channels=2)
+    # Odd chunk length splits a stereo frame between calls
+    out = np.concatenate([resampler.process(interleaved[i:i + 1001]) for i in range(0, len(interleaved), 1001)])
+    expected = StreamingResampler(48000).process((left + right) / 2)
+
+    np.testing.assert_allclose(out, expected, atol=1e-6)
+
+
+def test_native_rate_is_passthrough():
+    audio = tone(440, 16000)
+    assert StreamingResampler(16000).process(audio) is audio
+
+
+def test_rejects_unsupported_formats():
+    with pytest.raises(ValueError):
+        StreamingResampler(1000)
+    with pytest.raises(ValueError):
+        StreamingResampler(48000, channels=0)
@@ -0,0 +1,53 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services.resume import ParkedSession, ReplayLog, SessionParking, new_resume_token
+
+
+def parked(session_id, token, parked_at=0.0, segment_index=0):
+    return ParkedSession(session_id, token, "moonshine", "en", service=None, pool=None, stream=None, rechunker=None,
+                         detector=None, gate=None, snapshot=None, recorded_samples=0, segment_start=None,
+                         segment_index=segment_index, stream_params={}, replay=ReplayLog(), parked_at=parked_at)
+
+
+def test_replay_sends_only_segments_after_the_last_seen():
+    replay = ReplayLog(size=3)
+    for segment in range(4):
+        replay.record({"text": f"final {segment}", "is_final": True, "segment": segment})
+    replay.record({"translation": "traduction 3", "is_final": True, "segment": 3})
+
+    # Oldest messages fall out of the ring
+    assert len(replay) == 3
+    assert [m.get("text", m.get("translation")) for m in replay.since(1)] == ["final 2", "final 3", "traduction 3"]
+    assert replay.since(3) == []
+
+
+def test_claim_needs_the_token():
+    parking = SessionParking(ttl=30.0)
+    token = new_resume_token()
+    parking.park(parked("s1", token, segment_index=4))
+
+    assert parking.claim("s1", None) is None
+    assert parking.claim("s1", "wrong") is None
+    assert "s1" in parking  # A wrong token leaves it parked
+
+    session = parking.claim("s1", token)
+    assert session.segment_index == 4
+    assert "s1" not in parking
+    assert parking.claim("s1", token) is None
+    assert parking.stats()["resumed"] == 1
+
+
+def test_sessions_expire_after_ttl():
+    parking = SessionParking(ttl=10.0)
+    parking.park(parked("old", "a", parked_at=100.0))
+    parking.park(parked("new", "b", parked_at=105.0))
+
+    assert parking.expired(now=109.0) == []
+    assert [s.session_id for s in parking.expired(now=110.0)] == ["old"]
+    assert len(parking) == 1
+    assert parking.take("new").token == "b"
+    assert parking.take("new") is None
+    assert parking.stats()["expired"] == 1
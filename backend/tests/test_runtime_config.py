@@ -0,0 +1,49 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.core.runtime_config import RuntimeConfig, load_runtime_config
+
+
+def test_defaults_match_previous_hard_coded_values():
+    config = load_runtime_config(environ={})
+    assert config.zipformer.num_threads == 1
+    assert config.moonshine.num_threads == 2
+    assert config.moonshine.max_buffer_duration == 7.0
+    assert config.moonshine.interim_interval == 0.5
+    assert config.mlx_whisper.max_buffer_duration == 10.0
+    assert config.mlx_whisper.silence_trigger == 0.6
+
+
+def test_file_then_environment_overrides(tmp_path):
+    path = tmp_path / "runtime.json"
+    path.write_text(json.dumps({"moonshine": {"num_threads": 4, "batch_decoding": False}}))
+    environ = {"RT_MOONSHINE__NUM_THREADS": "3", "RT_ADMISSION__CAPACITY": "12.5"}
+    config = load_runtime_config(str(path), environ=environ)
+    assert config.moonshine.num_threads == 3
+    assert config.moonshine.batch_decoding is False
+    assert config.admission.capacity == 12.5
+
+
+def test_unknown_keys_are_rejected(tmp_path):
+    path = tmp_path / "runtime.json"
+    path.write_text(json.dumps({"moonshine": {"num_thread": 4}}))
+    with pytest.raises(ValueError):
+        load_runtime_config(str(path), environ={})
+
+
+def test_environment_variables_for_unknown_sections_are_ignored():
+    environ = {"RT_OTHERTOOL__LEVEL": "3", "RT_MOONSHINE__NUM_THREADS": "3"}
+    config = load_runtime_config(environ=environ)
+    assert config.moonshine.num_threads == 3
+
+
+def test_save_round_trip(tmp_path):
+    config = RuntimeConfig()
+    config.zipformer.num_threads = 2
+    config.save(str(tmp_path / "out.json"))
+    assert load_runtime_config(str(tmp_path / "out.json"), environ={}).zipformer.num_threads == 2
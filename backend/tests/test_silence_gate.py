@@ -0,0 +1,63 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+sys.path.append(os.path.dirname(__file__))
+
+from fakes import chunks_of, speech_like
+from backend.services.audio.gate import SilenceGate
+
+SILENCE = np.zeros(16000 * 3, dtype=np.float32)
+
+
+def run(gate, audio):
+    forwarded, dropped = [], 0
+    for chunk in chunks_of(audio, 4096):
+        out, d = gate.process(chunk)
+        forwarded.append(out)
+        dropped += d
+    return np.concatenate(forwarded), dropped
+
+
+def test_idle_session_forwards_nothing():
+    gate = SilenceGate()
+    forwarded, dropped = run(gate, SILENCE)
+    assert len(forwarded) == 0
+    assert not gate.open
+    # Everything beyond the pre-roll has been dropped
+    assert dropped == len(chunks_of(SILENCE, 4096)) * 4096 - gate._preroll_len
+    assert gate._preroll_len <= gate.preroll_samples
+
+
+def test_onset_is_preceded_by_preroll():
+    gate = SilenceGate(preroll=0.5)
+    quiet = np.full(8 * 4096, 0.001, dtype=np.float32)  # Below threshold but distinguishable from zeros
+    forwarded, _ = run(gate, np.concatenate((quiet, speech_like(1.0))))
+
+    # The first forwarded samples are pre-roll (quiet audio), then speech
+    leading_quiet = np.argmax(np.abs(forwarded) > 0.01)
+    assert 8000 <= leading_quiet <= 8100
+
+
+def test_hangover_keeps_trailing_silence_for_the_models():
+    gate = SilenceGate(hangover=1.0)
+    audio = np.concatenate((speech_like(1.0), SILENCE))
+    forwarded, _ = run(gate, audio)
+
+    trailing = len(forwarded) - np.flatnonzero(np.abs(forwarded) > 0.01)[-1]
+    # At least the hangover is forwarded (so end-of-speech triggers fire), quantized to one chunk
+    assert 16000 <= trailing <= 16000 + 4096
+    assert not gate.open
+
+
+def test_every_sample_is_forwarded_or_dropped_in_order():
+    gate = SilenceGate()
+    audio = np.concatenate((SILENCE, speech_like(1.0), SILENCE, speech_like(0.5), SILENCE))
+    chunks = chunks_of(audio, 4096)
+    accounted = 0
+    for chunk in chunks:
+        out, dropped = gate.process(chunk)
+        accounted += len(out) + dropped
+    assert accounted + gate._preroll_len == len(chunks) * 4096
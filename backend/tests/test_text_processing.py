@@ -0,0 +1,71 @@
+import os
+import random
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+sys.path.append(os.path.dirname(__file__))
+
+from backend.utils.text_processing import (
+    DEFAULT_PIPELINE,
+    IncrementalBeautifier,
+    TextPipeline,
+    VocabularyCasingStep,
+    beautify_text,
+)
+from text_reference import SAMPLE, growing_partials, legacy_beautify_text
+
+CASES = [
+    "",
+    "hello world",
+    "i think i'm right. i'll go",
+    "this is a pen。this is an apple？yes！",
+    "word.word and i.e. stuff",
+    "“quoted”：done；ok",
+    SAMPLE,
+]
+
+# Characters that exercise sentence boundaries: ASCII and full-width punctuation, whitespace runs
+FUZZ_ALPHABET = "ab i.?!？。 \n,"
+
+
+def random_texts(count, max_length, alphabet=FUZZ_ALPHABET, seed=0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length))) for _ in range(count)]
+
+
+def test_matches_previous_implementation():
+    for text in CASES:
+        assert beautify_text(text) == legacy_beautify_text(text)
+
+
+def test_batch_matches_single():
+    assert DEFAULT_PIPELINE.process_batch(CASES) == [legacy_beautify_text(t) for t in CASES]
+
+
+def test_incremental_matches_full_pass():
+    beautifier = IncrementalBeautifier()
+    for partial in growing_partials(SAMPLE):
+        assert beautifier.process(partial) == legacy_beautify_text(partial)
+    assert beautifier.hits > 0
+    # A rewritten prefix falls back to a full pass
+    assert beautifier.process("completely different. text") == "Completely different. Text"
+
+
+def test_incremental_matches_previous_implementation_on_random_partials():
+    # Includes a whitespace run growing after the cached sentence end: "？？ " then "？？  a"
+    for text in ["？？  a", "\n\nb"] + random_texts(3000, 12):
+        beautifier = IncrementalBeautifier()
+        for end in range(1, len(text) + 1):
+            assert beautifier.process(text[:end]) == legacy_beautify_text(text[:end]), repr(text[:end])
+
+
+def test_batch_matches_single_on_random_strings():
+    texts = ["a !!b!", "bia..!", " a..b."] + random_texts(3000, 8, FUZZ_ALPHABET.replace("\n", ""), seed=1)
+    for i in range(0, len(texts), 3):
+        batch = texts[i:i + 3]
+        assert DEFAULT_PIPELINE.process_batch(batch) == [DEFAULT_PIPELINE.process(t) for t in batch], batch
+
+
+def test_vocabulary_casing_step():
+    pipeline = TextPipeline([VocabularyCasingStep(["PyTorch", "LLM"])])
+    assert pipeline.process("we use pytorch for the llm.") == "We use PyTorch for the LLM."
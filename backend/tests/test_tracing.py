@@ -0,0 +1,99 @@
+import asyncio
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+sys.path.append(os.path.dirname(__file__))
+
+from backend.core.tracing import Tracer, current_trace, instant, span, traced_call
+from backend.services.transcription.hybrid_service import HybridStream
+from backend.services.transcription.mlx_whisper_service import MlxWhisperStream
+from fakes import FakeOnlineRecognizer, FakePunctuation, chunks_of, fake_transcribe, speech_like
+
+
+class FakeMlxWhisperService:
+    def create_stream(self, taps=None):
+        stream = MlxWhisperStream("unused", "", max_buffer_duration=10.0, taps=taps)
+        stream._transcribe = fake_transcribe
+        return stream
+
+
+def span_names(trace):
+    return [s[0] for s in trace.spans]
+
+
+def test_spans_from_worker_threads_land_in_the_utterance():
+    tracer = Tracer(sample_rate=1.0)
+    stream = HybridStream(FakeMlxWhisperService(), FakeOnlineRecognizer(), FakePunctuation())
+    audio = np.concatenate([speech_like(2.0), np.zeros(16000, dtype=np.float32)])
+
+    async def session():
+        trace = tracer.start("s1", "hybrid")
+        current_trace.set(trace)
+        for chunk in chunks_of(audio):
+            results = await asyncio.to_thread(traced_call, "process", 0, stream.accept_waveform, chunk)
+            if any(r["is_final"] for r in results):
+                break
+        tracer.finish(trace, 12.0)
+        return trace
+
+    trace = asyncio.run(session())
+    names = span_names(trace)
+    for expected in ("queue", "process", "zipformer_decode", "punctuation", "rms_trigger", "final_transcribe"):
+        assert expected in names
+    # Inference ran off the event loop thread
+    assert len(trace.threads) >= 1
+    assert tracer.session_traces("s1") == [trace]
+
+
+def test_untraced_code_records_nothing():
+    with span("decode"):
+        pass
+    instant("trigger")
+    assert current_trace.get() is None
+
+
+def test_retention_keeps_sampled_and_slow_utterances():
+    tracer = Tracer(sample_rate=0.0, slow_final_ms=1000.0, capacity=2)
+    assert not tracer.finish(tracer.start("s", "m"), 50.0)
+    assert tracer.finish(tracer.start("s", "m"), 4000.0)
+    assert tracer.stats()["retained_slow"] == 1
+
+    for latency in (2000.0, 3000.0):
+        tracer.finish(tracer.start("s", "m"), latency)
+    # Bounded ring: only the newest two survive
+    assert [t.meta["final_latency_ms"] for t in tracer.session_traces("s")] == [2000.0, 3000.0]
+
+
+def test_disabled_tracer_starts_nothing():
+    assert Tracer(enabled=False).start("s", "m") is None
+
+
+def test_chrome_export_is_trace_event_json():
+    tracer = Tracer(sample_rate=1.0, max_spans=2)
+    trace = tracer.start("s1", "hybrid")
+    token = current_trace.set(trace)
+    try:
+        with span("zipformer_decode"):
+            pass
+        instant("rms_trigger", buffer_seconds=1.2)
+        with span("send"):  # Over max_spans
+            pass
+    finally:
+        current_trace.reset(token)
+    tracer.finish(trace, 30.0, text="hello")
+
+    exported = json.loads(json.dumps(tracer.export("s1")))
+    events = exported["traceEvents"]
+    utterance = next(e for e in events if e.get("cat") == "utterance")
+    assert utterance["ph"] == "X" and utterance["dur"] >= 0
+    assert utterance["args"]["text"] == "hello" and utterance["args"]["dropped_spans"] == 1
+
+    decode = next(e for e in events if e["name"] == "zipformer_decode")
+    assert decode["ph"] == "X" and decode["ts"] >= utterance["ts"]
+    assert next(e for e in events if e["name"] == "rms_trigger")["ph"] == "i"
+    assert any(e["ph"] == "M" and e["name"] == "thread_name" and e["tid"] == decode["tid"] for e in events)
+    assert tracer.export("other") is None
@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+soundfile = pytest.importorskip("soundfile")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services.recordings.transcoder import RecordingTranscoder
+
+
+def pcm(seconds: float, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * 16000)) * 3000).astype(np.int16).tobytes()
+
+
+def wait_for(transcoder, session_id, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = transcoder.status(session_id)
+        if status["status"] in ("done", "failed"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"job {session_id} did not finish: {transcoder.status(session_id)}")
+
+
+@pytest.fixture
+def transcoder(tmp_path):
+    t = RecordingTranscoder(str(tmp_path), fmt="flac")
+    yield t
+    t.shutdown()
+
+
+def test_flac_is_lossless_and_wav_removed(transcoder, tmp_path):
+    prefix = tmp_path / "s1.pcm.part"
+    prefix.write_bytes(pcm(0.5, seed=1))
+    audio = pcm(1.0, seed=2)
+
+    job = transcoder.submit("s1", audio, prefix_path=str(prefix))
+    assert job.status in ("queued", "writing", "transcoding")
+
+    status = wait_for(transcoder, "s1")
+    assert status["status"] == "done", status
+    assert not os.path.exists(tmp_path / "s1.wav")
+    assert not prefix.exists()
+    assert status["output_bytes"] > 0
+
+    decoded, rate = soundfile.read(status["output_path"], dtype="int16")
+    assert rate == 16000
+    np.testing.assert_array_equal(decoded, np.frombuffer(pcm(0.5, seed=1) + audio, dtype=np.int16))
+
+
+def test_failed_transcode_keeps_wav(transcoder, tmp_path):
+    broken = tmp_path / "s2.wav"
+    broken.write_bytes(b"not a wav")
+
+    transcoder.recover()
+    status = wait_for(transcoder, "s2")
+    assert status["status"] == "failed"
+    assert broken.exists()
+
+    # Not retried on the next startup
+    restarted = RecordingTranscoder(str(tmp_path), fmt="flac")
+    restarted.recover()
+    assert restarted.status("s2") is None
+    restarted.shutdown()
+
+
+def test_retention_deletes_oldest_first(tmp_path):
+    transcoder = RecordingTranscoder(str(tmp_path), fmt="flac", max_archive_bytes=2500)
+    try:
+        for i, name in enumerate(("old", "mid", "new")):
+            path = tmp_path / f"{name}.flac"
+            path.write_bytes(b"x" * 1000)
+            os.utime(path, (1000 + i, 1000 + i))
+
+        removed = transcoder.enforce_retention()
+        assert [os.path.basename(p) for p in removed] == ["old.flac"]
+        assert sorted(os.listdir(tmp_path)) == ["mid.flac", "new.flac"]
+    finally:
+        transcoder.shutdown()
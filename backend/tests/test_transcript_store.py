@@ -0,0 +1,73 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.services.recordings.transcript_store import Segment, TranscriptStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = TranscriptStore(str(tmp_path / "transcripts.sqlite3"), flush_interval=0.05)
+    yield s
+    s.close()
+
+
+def test_search_returns_segments_with_ms_offsets(store):
+    store.append(Segment("a", 0, 32000, "We should measure the latency again.", "hybrid", "en"))
+    store.append(Segment("a", 40000, 72000, "Kubernetes rollout is done.", "hybrid", "en"))
+    store.append(Segment("b", 16000, 48000, "Latency looks fine today.", "moonshine", "en"))
+    assert store.flush()
+
+    results = store.search("latency")
+    assert {(r["session_id"], r["start_ms"], r["end_ms"]) for r in results} == {("a", 0, 2000), ("b", 1000, 3000)}
+    assert "[latency]" in results[0]["snippet"].lower()
+
+    only_b = store.search("latency", session_id="b")
+    assert [r["session_id"] for r in only_b] == ["b"]
+
+    assert [r["text"] for r in store.search("kube*")] == ["Kubernetes rollout is done."]
+
+
+def test_session_segments_are_ordered_by_offset(store):
+    store.append(Segment("a", 40000, 72000, "second"))
+    store.append(Segment("a", 0, 32000, "first"))
+    assert store.flush()
+    assert [s["text"] for s in store.session_segments("a")] == ["first", "second"]
+
+
+def test_malformed_query_raises_value_error(store):
+    with pytest.raises(ValueError):
+        store.search('"unterminated')
+
+
+def test_segments_survive_reopen(tmp_path):
+    path = str(tmp_path / "t.sqlite3")
+    store = TranscriptStore(path)
+    store.append(Segment("a", 0, 16000, "persisted"))
+    store.close()
+
+    reopened = TranscriptStore(path)
+    try:
+        assert [s["text"] for s in reopened.search("persisted")] == ["persisted"]
+    finally:
+        reopened.close()
+
+
+def test_enriched_transcript_replaces_previous_run(store):
+    store.append(Segment("a", 0, 32000, "live text", "hybrid", "fr"))
+    assert store.flush()
+    assert store.session_language("a") == "fr"
+
+    store.replace_enriched("a", [{"start_sample": 0, "end_sample": 16000, "text": "old", "speaker": 0}], "moonshine")
+    store.replace_enriched("a", [
+        {"start_sample": 16000, "end_sample": 32000, "text": "second", "speaker": 1},
+        {"start_sample": 0, "end_sample": 16000, "text": "first", "speaker": 0},
+    ], "whisper", "fr")
+    rows = store.enriched_segments("a")
+    assert [(r["text"], r["speaker"], r["start_ms"]) for r in rows] == [("first", 0, 0), ("second", 1, 1000)]
+    assert rows[0]["model"] == "whisper" and rows[0]["language"] == "fr"
+    # The live transcript is untouched
+    assert [s["text"] for s in store.session_segments("a")] == ["live text"]
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+sys.path.append(os.path.dirname(__file__))
+
+from backend.services.translation.batcher import TranslationBatcher
+from backend.services.translation.session import SessionTranslator, split_sentences
+from fakes import FakeTranslator
+
+
+@pytest.fixture
+def batcher():
+    b = TranslationBatcher(FakeTranslator(), max_batch_size=16, max_wait=0.05)
+    yield b
+    b.stop()
+
+
+def test_requests_from_many_sessions_share_batches_per_language(batcher):
+    futures = []
+    lock = threading.Lock()
+
+    def session(i):
+        target = "de" if i % 2 else "fr"
+        future = batcher.submit([f"Sentence number {i}."], "en", target, final=True)
+        with lock:
+            futures.append((i, target, future))
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for i, target, future in futures:
+        assert future.result(timeout=5) == [f"[{target}] Sentence number {i}."]
+    batches = batcher.translator.batches
+    assert len(batches) < 8
+    # A model call never mixes target languages
+    assert all(text.startswith("Sentence") for _, texts in batches for text in texts)
+    assert sorted(len(texts) for _, texts in batches) == [4, 4]
+
+
+def test_cache_is_keyed_by_normalized_text(batcher):
+    assert batcher.submit(["Hello  world. "], "en", "de").result(timeout=5) == ["[de] Hello  world. "]
+    # Whitespace differences hit the cache; no second model call
+    assert batcher.submit(["Hello world."], "en", "de").result(timeout=5) == ["[de] Hello  world. "]
+    assert len(batcher.translator.batches) == 1
+    stats = batcher.stats()
+    assert stats["cache"]["hits"] == 1 and stats["cache"]["hit_rate"] == 0.5
+    assert stats["latency_ms"]["p50"] is not None
+
+    # Uncached requests (partial tails) are translated every time
+    batcher.submit(["Still talking"], "en", "de", cache=False).result(timeout=5)
+    batcher.submit(["Still talking"], "en", "de", cache=False).result(timeout=5)
+    assert len(batcher.translator.batches) == 3
+
+
+def test_split_sentences_keeps_unfinished_tail():
+    text = "First one. Second one? And the third"
+    sentences, end = split_sentences(text)
+    assert sentences == ["First one.", "Second one?"]
+    assert text[end:] == "And the third"
+
+
+def test_partials_only_translate_past_the_stable_prefix(batcher):
+    translator = SessionTranslator(batcher, "en", "de")
+
+    async def run():
+        partials = ["Hello there", "Hello there. How are", "Hello there. How are you? I am"]
+        outputs = [await translator.translate(p, is_final=False) for p in partials]
+        final = await translator.translate("Hello there. How are you? I am fine.", is_final=True)
+        return outputs, final
+
+    outputs, final = asyncio.run(run())
+    assert outputs == [
+        "[de] Hello there",
+        "[de] Hello there. [de] How are",
+        "[de] Hello there. [de] How are you? [de] I am",
+    ]
+    translated = [text for _, texts in batcher.translator.batches for text in texts]
+    # Each completed sentence went to the model once; the final reuses them from the cache
+    assert translated.count("Hello there.") == 1
+    assert translated.count("How are you?") == 1
+    assert final == "[de] Hello there. [de] How are you? [de] I am fine."
+
+
+def test_partial_superseded_by_final_is_dropped(batcher):
+    translator = SessionTranslator(batcher, "en", "ja")
+
+    async def run():
+        partial = asyncio.create_task(translator.translate("Good morning", is_final=False))
+        await asyncio.sleep(0)  # Partial is submitted and waiting on its batch
+        final = await translator.translate("Good morning everyone.", is_final=True)
+        return await partial, final
+
+    partial, final = asyncio.run(run())
+    assert partial is None
+    assert final == "[ja] Good morning everyone."
+
+
+def test_cancelled_request_does_not_stop_the_batcher(batcher):
+    cancelled = batcher.submit(["Gone."], "en", "de")
+    assert cancelled.cancel()
+    assert batcher.submit(["Still here."], "en", "de").result(timeout=5) == ["[de] Still here."]
@@ -0,0 +1,36 @@
+"""
+Reference for the text pipeline tests (and the text processing benchmark):
+the pre-pipeline beautify_text, kept verbatim, and a sample transcript.
+"""
+import re
+
+
+def legacy_beautify_text(text: str) -> str:
+    if not text:
+        return ""
+    text = text.replace("。", ".").replace("，", ",").replace("？", "?").replace("！", "!")
+    text = text.replace("：", ":").replace("；", ";").replace("“", '"').replace("”", '"')
+    text = re.sub(r'\.(?=[a-zA-Z])', '. ', text)
+
+    def capitalize_match(match):
+        return match.group().upper()
+
+    p = re.compile(r'(^|[.?!]\s+)([a-z])')
+    text = p.sub(capitalize_match, text)
+    p_i = re.compile(r'(?<!\w)i(?!\w)')
+    text = p_i.sub("I", text)
+    p_im = re.compile(r'(?<!\w)i(?=\'[a-z])')
+    text = p_im.sub("I", text)
+    return text
+
+
+SAMPLE = (
+    "so i think the main issue is latency。 we measured it yesterday，and i'm "
+    "fairly sure the zipformer partials are fine? the whisper pass is slower！ "
+    "next we try quantization.then we compare the results and i'll write it up"
+)
+
+
+def growing_partials(text: str) -> list:
+    words = text.split()
+    return [" ".join(words[:i]) for i in range(1, len(words) + 1)]
@@ -20,7 +20,7 @@ except Exception as e:
 # Try initializing service
 print("Initializing Service via Manager...")
 try:
-    service = manager.get_service("en")
+    service = manager.get_service("hybrid")
     print("PASS: Service initialized.")
 except Exception as e:
     print(f"FATAL: Failed to get service: {e}")
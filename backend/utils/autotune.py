@@ -0,0 +1,263 @@
+"""
+Autotune runtime settings for this machine.
+
+Replays a calibration WAV (16 kHz mono) through N simulated concurrent sessions
+at real time, sweeping thread counts, interim settings and ingest rechunking
+(off, or blocks of whole native model frames no longer than rechunk.max_latency).
+For each candidate it finds the largest N whose p95 per-chunk latency stays
+within the target, then writes the candidate with the most concurrent sessions
+per core to the runtime config file (plus a matching admission capacity).
+
+Usage:
+    python backend/utils/autotune.py --wav calibration.wav --target moonshine \
+        [--latency-target 0.3] [--duration 10] [--output backend/runtime_config.json]
+    # Messages as a 48 kHz browser sends them (4096 device samples -> ~1365 at 16 kHz):
+    python backend/utils/autotune.py --wav calibration.wav --chunk-samples 1365
+"""
+import argparse
+import itertools
+import os
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.core.runtime_config import DEFAULT_CONFIG_FILE, load_runtime_config
+from backend.services.audio.rechunk import Rechunker
+
+CHUNK_SAMPLES = 4096  # Matches the browser's ScriptProcessorNode(4096) frames (at 16 kHz)
+
+
+def load_wav(path: str, duration: float) -> np.ndarray:
+    with wave.open(path, "rb") as wf:
+        if wf.getframerate() != 16000 or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise SystemExit("Calibration WAV must be 16 kHz, mono, 16-bit")
+        data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    audio = data.astype(np.float32) / 32768.0
+    return audio[:int(duration * 16000)]
+
+
+class ZipformerTarget:
+    """Streaming preview path of HybridStream (accept, decode if ready, get_result)."""
+
+    name = "zipformer"
+
+    def session_cost(self):
+        # Only the preview half of a hybrid session; the Whisper final pass isn't measured here
+        return None
+
+    def frame_samples(self):
+        from backend.services.transcription.hybrid_service import HybridService
+        return HybridService.FRAME_SAMPLES
+
+    def candidates(self, max_threads: int, max_latency: float):
+        for num_threads, rechunk in itertools.product((1, 2, 4), rechunk_candidates(self.frame_samples(), max_latency)):
+            if num_threads <= max_threads:
+                yield {"zipformer.num_threads": num_threads, **rechunk}
+
+    def build(self, config):
+        from backend.services.transcription.zipformer import create_online_recognizer
+        recognizer = create_online_recognizer(num_threads=config.zipformer.num_threads)
+
+        def make_session():
+            stream = recognizer.create_stream()
+
+            def process(chunk):
+                stream.accept_waveform(16000, chunk)
+                if recognizer.is_ready(stream):
+                    recognizer.decode_stream(stream)
+                recognizer.get_result(stream)
+            return process
+        return make_session, lambda: None
+
+
+class MoonshineTarget:
+    name = "moonshine"
+
+    def session_cost(self):
+        from backend.services.transcription.moonshine_service import MoonshineService
+        return MoonshineService.SESSION_COST
+
+    def frame_samples(self):
+        from backend.services.transcription.moonshine_service import MoonshineService
+        return MoonshineService.FRAME_SAMPLES
+
+    def candidates(self, max_threads: int, max_latency: float):
+        rechunks = rechunk_candidates(self.frame_samples(), max_latency)
+        for num_threads, interval, rechunk in itertools.product((1, 2, 4), (0.5, 1.0), rechunks):
+            if num_threads <= max_threads:
+                yield {"moonshine.num_threads": num_threads, "moonshine.interim_interval": interval, **rechunk}
+
+    def build(self, config):
+        from backend.services.transcription.moonshine_service import MoonshineService
+        service = MoonshineService(config=config)
+
+        def make_session():
+            return service.create_stream().accept_waveform
+
+        def close():
+            if service.scheduler is not None:
+                service.scheduler.stop()
+        return make_session, close
+
+
+TARGETS = {"zipformer": ZipformerTarget(), "moonshine": MoonshineTarget()}
+
+
+def rechunk_candidates(frame_samples: int, max_latency: float) -> list:
+    """Rechunking off, then blocks of 1, 2, 4, ... native frames that fit within max_latency."""
+    candidates = [{"rechunk.enabled": False}]
+    multiple = 1
+    while multiple == 1 or frame_samples * multiple / 16000.0 <= max_latency:
+        candidates.append({"rechunk.enabled": True, "rechunk.chunk_seconds": frame_samples * multiple / 16000.0})
+        multiple *= 2
+    return candidates
+
+
+def rechunked(make_session, frame_samples: int, config):
+    """Sessions that regroup incoming messages into native model frames first, as the server does."""
+    def make():
+        process = make_session()
+        rechunker = Rechunker(frame_samples, config.rechunk.chunk_seconds, config.rechunk.max_latency)
+
+        def push(chunk):
+            for block in rechunker.push(chunk):
+                process(block)
+        return push
+    return make
+
+
+def apply_overrides(config, overrides: dict):
+    for key, value in overrides.items():
+        section, field_name = key.split(".")
+        setattr(getattr(config, section), field_name, value)
+    return config
+
+
+def simulate(make_session, audio: np.ndarray, sessions: int, chunk_samples: int = CHUNK_SAMPLES) -> dict:
+    """Run `sessions` paced sessions concurrently; return latency stats in seconds."""
+    chunk_duration = chunk_samples / 16000.0
+    chunks = [audio[i:i + chunk_samples] for i in range(0, len(audio), chunk_samples)]
+    latencies = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(sessions)
+
+    def worker(index):
+        process = make_session()
+        local = []
+        start_barrier.wait()
+        # Stagger sessions across one chunk period, like real clients
+        t0 = time.perf_counter() + chunk_duration * index / sessions
+        for i, chunk in enumerate(chunks):
+            due = t0 + (i + 1) * chunk_duration  # Chunk is complete at the client
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            process(chunk)
+            local.append(time.perf_counter() - due)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(sessions)]
+    cpu_start = time.process_time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    cpu = time.process_time() - cpu_start
+
+    lat = np.array(latencies)
+    return {
+        "p50": float(np.percentile(lat, 50)),
+        "p95": float(np.percentile(lat, 95)),
+        "max": float(lat.max()),
+        # Process CPU seconds per session per second of audio (includes model thread pools)
+        "cpu_per_session": cpu / sessions / (len(audio) / 16000.0),
+    }
+
+
+def max_sessions(make_session, audio, latency_target: float, limit: int, chunk_samples: int = CHUNK_SAMPLES) -> tuple:
+    """Largest session count within the latency target (doubling, then bisection)."""
+    def ok(n):
+        stats = simulate(make_session, audio, n, chunk_samples)
+        print(f"    {n:3d} sessions: p50={stats['p50'] * 1000:7.1f}ms p95={stats['p95'] * 1000:7.1f}ms")
+        return stats["p95"] <= latency_target, stats
+
+    good, good_stats = 0, None
+    n = 1
+    while n <= limit:
+        passed, stats = ok(n)
+        if not passed:
+            break
+        good, good_stats = n, stats
+        n *= 2
+    lo, hi = good, min(n, limit + 1)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        passed, stats = ok(mid)
+        if passed:
+            lo, good_stats = mid, stats
+        else:
+            hi = mid
+    return lo, good_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wav", required=True, help="Calibration WAV (16 kHz mono 16-bit)")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="moonshine")
+    parser.add_argument("--latency-target", type=float, default=0.3, help="p95 per-chunk latency budget (seconds)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of calibration audio to replay")
+    parser.add_argument("--max-sessions", type=int, default=64)
+    parser.add_argument("--chunk-samples", type=int, default=CHUNK_SAMPLES, help="16 kHz samples per client message")
+    parser.add_argument("--output", default=DEFAULT_CONFIG_FILE)
+    parser.add_argument("--dry-run", action="store_true", help="Print the result without writing it")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    audio = load_wav(args.wav, args.duration)
+    target = TARGETS[args.target]
+    existing = args.output if os.path.exists(args.output) else None
+    base = load_runtime_config(existing)
+
+    results = []
+    for overrides in target.candidates(cores, base.rechunk.max_latency):
+        print(f"Candidate {overrides}")
+        config = apply_overrides(load_runtime_config(existing), overrides)
+        make_session, close = target.build(config)
+        if config.rechunk.enabled:
+            make_session = rechunked(make_session, target.frame_samples(), config)
+        try:
+            sessions, stats = max_sessions(make_session, audio, args.latency_target, args.max_sessions, args.chunk_samples)
+        finally:
+            close()
+        results.append((sessions / cores, -sum(v for k, v in overrides.items() if k.endswith("num_threads")), overrides, sessions, stats))
+        print(f"  -> {sessions} sessions ({sessions / cores:.2f} per core)")
+
+    # Most sessions per core; fewer threads breaks ties
+    results.sort(key=lambda r: (r[0], r[1]), reverse=True)
+    per_core, _, best, sessions, stats = results[0]
+    if sessions == 0:
+        raise SystemExit("No candidate met the latency target; nothing written")
+
+    apply_overrides(base, best)
+    print(f"\nBest: {best} -> {sessions} sessions ({per_core:.2f}/core), p95 {stats['p95'] * 1000:.1f}ms")
+
+    # Translate the measured limit into admission capacity units for this model
+    cost = target.session_cost()
+    if cost is not None:
+        base.admission.capacity = sessions * cost
+        print(f"Admission capacity: {base.admission.capacity}")
+    if args.dry_run:
+        print(base.to_dict())
+    else:
+        base.save(args.output)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
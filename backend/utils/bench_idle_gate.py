@@ -0,0 +1,72 @@
+"""
+Load benchmark: CPU cost of mostly-idle sessions with and without the silence gate.
+
+Each simulated session plays `--speech` seconds of the calibration WAV followed
+by `--idle` seconds of room noise, at real time, through the autotune target's
+per-chunk pipeline. The run is repeated with a SilenceGate in front of the
+pipeline (as the server does at ingest), and process CPU per session per audio
+second is reported for both, alongside per-chunk latency.
+
+Usage:
+    python backend/utils/bench_idle_gate.py --wav calibration.wav [--target zipformer] \
+        [--sessions 8] [--speech 5] [--idle 20] [--noise 0.001]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.core.runtime_config import load_runtime_config
+from backend.services.audio.gate import SilenceGate
+from backend.utils.autotune import TARGETS, load_wav, simulate
+
+
+def gated(make_session, gate_config):
+    """Wrap a session factory so every chunk passes through a fresh SilenceGate first."""
+    def make_gated_session():
+        process = make_session()
+        gate = SilenceGate(gate_config.threshold, gate_config.hangover, gate_config.preroll)
+
+        def process_chunk(chunk):
+            samples, _ = gate.process(chunk)
+            if len(samples):
+                process(samples)
+        return process_chunk
+    return make_gated_session
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wav", required=True, help="Speech WAV (16 kHz mono 16-bit)")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="zipformer")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--speech", type=float, default=5.0, help="Seconds of speech per session")
+    parser.add_argument("--idle", type=float, default=20.0, help="Seconds of idle noise per session")
+    parser.add_argument("--noise", type=float, default=0.001, help="RMS of the idle room noise")
+    args = parser.parse_args()
+
+    config = load_runtime_config()
+    rng = np.random.default_rng(0)
+    idle = (args.noise * rng.standard_normal(int(args.idle * 16000))).astype(np.float32)
+    audio = np.concatenate((load_wav(args.wav, args.speech), idle))
+
+    make_session, close = TARGETS[args.target].build(config)
+    try:
+        results = {}
+        for label, factory in (("ungated", make_session), ("gated", gated(make_session, config.gate))):
+            stats = simulate(factory, audio, args.sessions)
+            results[label] = stats
+            print(f"{label:8s}: cpu/session={stats['cpu_per_session'] * 100:6.2f}% of a core  "
+                  f"p50={stats['p50'] * 1000:7.1f}ms p95={stats['p95'] * 1000:7.1f}ms")
+    finally:
+        close()
+
+    saved = 1 - results["gated"]["cpu_per_session"] / results["ungated"]["cpu_per_session"]
+    print(f"\nIdle fraction {args.idle / (args.idle + args.speech):.0%}: gate saves {saved:.0%} CPU per session")
+
+
+if __name__ == "__main__":
+    main()
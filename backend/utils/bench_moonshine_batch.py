@@ -0,0 +1,102 @@
+"""
+Throughput benchmark: per-session decode_stream vs cross-session batched decode_streams.
+
+Simulates N concurrent Moonshine sessions, each issuing the same mix of interim
+and final decode requests (growing windows up to the 7s cap), and reports
+audio-seconds decoded per CPU-second for both paths.
+
+Usage:
+    python backend/utils/bench_moonshine_batch.py --sessions 8 [--wav speech.wav]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.core.runtime_config import load_runtime_config
+from backend.services.transcription.moonshine_batch import MoonshineBatchScheduler
+from backend.services.transcription.moonshine_service import MoonshineService
+
+
+def load_audio(path: str, seconds: float) -> np.ndarray:
+    if path:
+        with wave.open(path, "rb") as wf:
+            assert wf.getframerate() == 16000 and wf.getnchannels() == 1, "expects 16 kHz mono WAV"
+            data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        audio = data.astype(np.float32) / 32768.0
+        return np.resize(audio, int(seconds * 16000))
+    # Fallback: amplitude-modulated noise, enough to exercise the encoder/decoder
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * 16000)) / 16000.0
+    return (0.1 * rng.standard_normal(len(t)) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))).astype(np.float32)
+
+
+def session_requests(audio: np.ndarray, interim_interval: float = 0.5, max_duration: float = 7.0) -> list:
+    # Interims over growing windows, then one final over the full utterance
+    requests = []
+    step = int(interim_interval * 16000)
+    end = int(max_duration * 16000)
+    for n in range(step, end, step):
+        requests.append((audio[:n], False))
+    requests.append((audio[:end], True))
+    return requests
+
+
+def run(decode, sessions: int, audio: np.ndarray) -> tuple:
+    requests = session_requests(audio)
+    audio_seconds = sessions * sum(len(a) for a, _ in requests) / 16000.0
+
+    def worker():
+        for a, final in requests:
+            decode(a, final)
+
+    threads = [threading.Thread(target=worker) for _ in range(sessions)]
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return audio_seconds, time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--wav", default=None, help="16 kHz mono WAV to use as session audio")
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait", type=float, default=0.01)
+    args = parser.parse_args()
+
+    config = load_runtime_config()
+    config.moonshine.batch_decoding = False
+    service = MoonshineService(config=config)
+    recognizer = service.recognizer
+    audio = load_audio(args.wav, 7.0)
+
+    def direct(a, final):
+        stream = recognizer.create_stream()
+        stream.accept_waveform(16000, a)
+        recognizer.decode_stream(stream)
+
+    scheduler = MoonshineBatchScheduler(recognizer, max_batch_size=args.max_batch_size, max_wait=args.max_wait)
+
+    def batched(a, final):
+        scheduler.decode(a, final=final)
+
+    print(f"Sessions: {args.sessions}")
+    for name, decode in (("decode_stream (current)", direct), ("decode_streams (batched)", batched)):
+        audio_s, cpu_s, wall_s = run(decode, args.sessions, audio)
+        print(f"{name:28s} audio={audio_s:8.1f}s cpu={cpu_s:7.2f}s wall={wall_s:7.2f}s "
+              f"audio-s/cpu-s={audio_s / cpu_s:7.2f}")
+    print(f"Scheduler: {scheduler.stats()}")
+    scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Microbenchmark: compiled TextPipeline vs the previous beautify_text implementation.
+
+Measures per-call cost for single strings, batches of partials from many
+sessions, and a growing partial processed incrementally.
+
+Usage:
+    python backend/utils/bench_text_processing.py [--number 2000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../tests")))
+
+from backend.utils.text_processing import DEFAULT_PIPELINE, IncrementalBeautifier
+from text_reference import SAMPLE, growing_partials, legacy_beautify_text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=32, help="partials per batch (one per session)")
+    args = parser.parse_args()
+    n = args.number
+
+    def report(name, seconds, calls):
+        print(f"{name:40s} {seconds / calls * 1e6:8.2f} us/string")
+
+    report("legacy beautify_text", timeit.timeit(lambda: legacy_beautify_text(SAMPLE), number=n), n)
+    report("TextPipeline.process", timeit.timeit(lambda: DEFAULT_PIPELINE.process(SAMPLE), number=n), n)
+
+    batch = [SAMPLE] * args.batch
+    batch_runs = max(1, n // args.batch)
+    report(f"legacy x{args.batch}", timeit.timeit(lambda: [legacy_beautify_text(t) for t in batch], number=batch_runs), batch_runs * args.batch)
+    report(f"TextPipeline.process_batch({args.batch})", timeit.timeit(lambda: DEFAULT_PIPELINE.process_batch(batch), number=batch_runs), batch_runs * args.batch)
+
+    partials = growing_partials(SAMPLE)
+    partial_runs = max(1, n // len(partials))
+
+    def incremental():
+        beautifier = IncrementalBeautifier()
+        for t in partials:
+            beautifier.process(t)
+
+    report("legacy growing partial", timeit.timeit(lambda: [legacy_beautify_text(t) for t in partials], number=partial_runs), partial_runs * len(partials))
+    report("IncrementalBeautifier growing partial", timeit.timeit(incremental, number=partial_runs), partial_runs * len(partials))
+
+
+if __name__ == "__main__":
+    main()
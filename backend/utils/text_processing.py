@@ -1,50 +1,191 @@
 import re
 
+# All patterns are compiled once at import; the pipeline runs for every partial of every session.
+
+# Chinese/full-width -> English punctuation. Skipped entirely for ASCII input
+# (str.isascii is O(1)); chained str.replace beats str.translate for non-ASCII text.
+PUNCT_MAP = (
+    ("。", "."),
+    ("，", ","),
+    ("？", "?"),
+    ("！", "!"),
+    ("：", ":"),
+    ("；", ";"),
+    ("“", '"'),
+    ("”", '"'),
+)
+
+# Periods followed immediately by a letter (e.g., "word.word" -> "word. word")
+RE_PERIOD_SPACING = re.compile(r'\.(?=[a-zA-Z])')
+
+# Punctuation+Space followed by a letter. The start of the string is handled
+# separately: a leading "^|" alternative defeats the regex engine's fast scan.
+RE_SENTENCE_START = re.compile(r'[.?!]\s+[a-z]')
+# Same, but every line of a newline-joined batch also counts as a string start.
+# The whitespace excludes the joining newline, so no match spans two strings.
+RE_SENTENCE_START_BATCH = re.compile(r'(?:[.?!][^\S\n]+|\n)[a-z]')
+
+# Standalone "i", which also covers "i'm", "i'll", "i've", "i'd".
+# Written literal-first (lookbehind after the "i") so the engine can scan for "i" quickly.
+RE_PRONOUN_I = re.compile(r'i(?!\w)(?<!\wi)')
+
+# End of a sentence (punctuation plus whitespace) in normalized text
+RE_SENTENCE_END = re.compile(r'[.?!]\s+')
+
+
+def _upper_match(match):
+    return match.group().upper()
+
+
+class ReplacementStep:
+    """
+    Whole-word, case-insensitive replacements compiled into a single alternation.
+    Used for custom vocabulary casing and simple inverse text normalization.
+    """
+
+    def __init__(self, mapping: dict):
+        self.mapping = {k.lower(): v for k, v in mapping.items()}
+        # Longest first so multi-word phrases win over their prefixes
+        keys = sorted(self.mapping, key=len, reverse=True)
+        if keys:
+            self.pattern = re.compile(r'(?<!\w)(' + "|".join(re.escape(k) for k in keys) + r')(?!\w)', re.IGNORECASE)
+        else:
+            self.pattern = None
+
+    def _replace(self, match):
+        return self.mapping[match.group().lower()]
+
+    def __call__(self, text: str) -> str:
+        if self.pattern is None:
+            return text
+        return self.pattern.sub(self._replace, text)
+
+
+class VocabularyCasingStep(ReplacementStep):
+    """Restore the canonical casing of known terms (e.g., 'pytorch' -> 'PyTorch')."""
+
+    def __init__(self, terms):
+        super().__init__({term: term for term in terms})
+
+
+class InverseTextNormalizationStep(ReplacementStep):
+    """Map spoken forms to written forms (e.g., 'percent' -> '%'). Rules are supplied by the caller."""
+
+
+class TextPipeline:
+    """
+    Real-time text beautification for streaming transcripts.
+
+    Normalizes Chinese punctuation, fixes spacing after periods, converts to
+    sentence case and capitalizes "I", then runs any extra steps (inverse text
+    normalization, vocabulary casing). Every step is a callable str -> str.
+
+    Build once (see DEFAULT_PIPELINE) and reuse: process() for one string,
+    process_batch() for many, and IncrementalBeautifier to skip the unchanged
+    prefix of a growing partial.
+    """
+
+    def __init__(self, extra_steps=None):
+        self.extra_steps = list(extra_steps or [])
+
+    def add_step(self, step):
+        self.extra_steps.append(step)
+        return self
+
+    def normalize(self, text: str) -> str:
+        if text.isascii():
+            return text
+        for src, dst in PUNCT_MAP:
+            text = text.replace(src, dst)
+        return text
+
+    def apply(self, text: str, sentence_start=RE_SENTENCE_START) -> str:
+        """Run every step after punctuation normalization."""
+        text = RE_PERIOD_SPACING.sub('. ', text)
+        if text[:1].islower() and text[:1].isascii():
+            text = text[0].upper() + text[1:]
+        text = sentence_start.sub(_upper_match, text)
+        text = RE_PRONOUN_I.sub("I", text)
+        for step in self.extra_steps:
+            text = step(text)
+        return text
+
+    def process(self, text: str) -> str:
+        if not text:
+            return ""
+        return self.apply(self.normalize(text))
+
+    def process_batch(self, texts: list) -> list:
+        """
+        Beautify many strings in one pass: they are joined with newlines so each
+        regex runs once over the batch (sentence-start matching is per line).
+        """
+        if not texts:
+            return []
+        if any("\n" in t for t in texts):
+            return [self.process(t) for t in texts]
+        joined = self.apply(self.normalize("\n".join(texts)), RE_SENTENCE_START_BATCH)
+        return joined.split("\n")
+
+
+class IncrementalBeautifier:
+    """
+    Per-stream wrapper that skips re-processing the unchanged prefix of a growing partial.
+
+    Every step is local to a sentence, so the output for text up to the last
+    complete sentence can be cached. The cached prefix stops before that
+    sentence's final punctuation: the whitespace after it may still grow, and
+    capitalizing the next sentence needs the punctuation and whitespace
+    together. If the next partial still starts with that prefix, only the
+    remainder is processed.
+    """
+
+    def __init__(self, pipeline: TextPipeline = None):
+        self.pipeline = pipeline or DEFAULT_PIPELINE
+        self.prefix_in = ""
+        self.prefix_out = ""
+        self.hits = 0
+        self.misses = 0
+
+    def reset(self):
+        self.prefix_in = ""
+        self.prefix_out = ""
+
+    def process(self, text: str) -> str:
+        if not text:
+            return ""
+        text = self.pipeline.normalize(text)
+
+        if self.prefix_in and text.startswith(self.prefix_in):
+            self.hits += 1
+            start = len(self.prefix_in)
+            head_out = self.prefix_out
+        else:
+            self.misses += 1
+            start = 0
+            head_out = ""
+
+        # Extend the cached prefix up to the punctuation ending the last complete sentence
+        boundary = start
+        for match in RE_SENTENCE_END.finditer(text, start):
+            boundary = match.start()
+        if boundary > start:
+            head_out += self.pipeline.apply(text[start:boundary])
+            self.prefix_in = text[:boundary]
+            self.prefix_out = head_out
+        elif start == 0:
+            self.reset()
+
+        return head_out + self.pipeline.apply(text[boundary:])
+
+
+DEFAULT_PIPELINE = TextPipeline()
+
+
 def beautify_text(text: str) -> str:
     """
     Real-time text beautification for streaming transcripts.
     Converts uppercase output to sentence case and fixes 'I' capitalization.
     Includes Chinese-to-English punctuation normalization.
     """
-    if not text:
-        return ""
-    
-    # 1. Lowercase first (essential for Punctuation models trained on lower/mixed case)
-    # Note: If text comes in as ALL CAPS, we lower it.
-    # But this function might be called AFTER punctuation, so we assume input 
-    # might already be punctuated but still potentially messy casing.
-    
-    # Actually, the plan says we lowercase BEFORE punctuation in HybridService.
-    # So this function receives "punctuated text" which might be "hello world." or "Hello World."
-    # If the punctuation model restored casing, great. If not, we fix it.
-    
-    # However, to be safe and consistent with the user's request:
-    # "beautify_text" should handle the final polish.
-    
-    # Normalize punctuation first (Chinese -> English)
-    text = text.replace("。", ".").replace("，", ",").replace("？", "?").replace("！", "!")
-    text = text.replace("：", ":").replace("；", ";").replace("“", '"').replace("”", '"')
-
-    # Fix spacing after periods (e.g., "word.word" -> "word. word")
-    # Using regex to target periods followed immediately by a letter
-    text = re.sub(r'\.(?=[a-zA-Z])', '. ', text)
-
-    # 2. Capitalize sentences
-    # Regex to find sentence boundaries and capitalize the next letter
-    def capitalize_match(match):
-        return match.group().upper()
-    
-    # Match Start of string or Punctuation+Space followed by a letter
-    p = re.compile(r'(^|[.?!]\s+)([a-z])')
-    text = p.sub(capitalize_match, text)
-    
-    # 3. Capitalize "I"
-    # Standalone "i"
-    p_i = re.compile(r'(?<!\w)i(?!\w)')
-    text = p_i.sub("I", text)
-    
-    # "i'm", "i'll", "i've", "i'd"
-    p_im = re.compile(r'(?<!\w)i(?=\'[a-z])')
-    text = p_im.sub("I", text)
-
-    return text
+    return DEFAULT_PIPELINE.process(text)
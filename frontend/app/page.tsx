@@ -5,6 +5,8 @@ import { useAudioRecorder } from "@/hooks/useAudioRecorder";
 import { Controls } from "@/components/Controls";
 import { useEffect, useRef } from "react";
 import { LanguageSelector } from "@/components/LanguageSelector";
+import { ModelSelector } from "@/components/ModelSelector";
+import { TargetLanguageSelector } from "@/components/TargetLanguageSelector";
 
 export default function Home() {
   const {
@@ -14,7 +16,14 @@ export default function Home() {
     segments,
     partialText,
     language,
+    activeLanguage,
     setLanguage,
+    model,
+    setModel,
+    targetLanguage,
+    setTargetLanguage,
+    translations,
+    partialTranslation,
     startRecording,
     pauseRecording,
     endSession
@@ -33,7 +42,7 @@ export default function Home() {
     if (scrollAnchorRef.current) {
       scrollAnchorRef.current.scrollIntoView({ behavior: "smooth" });
     }
-  }, [segments, partialText]);
+  }, [segments, partialText, translations]);
 
 
 
@@ -52,11 +61,26 @@ export default function Home() {
 
             {/* Top Right Selectors */}
             <Stack direction="row" spacing={2} alignItems="center">
+              <Box sx={{ width: 220 }}>
+                <ModelSelector
+                  model={model}
+                  onChange={setModel}
+                  disabled={isSessionActive}
+                />
+              </Box>
               <Box sx={{ width: 150 }}>
                 <LanguageSelector
                   language={language}
                   onChange={setLanguage}
-                  disabled={true}
+                  detectedLanguage={activeLanguage}
+                  disabled={isSessionActive}
+                />
+              </Box>
+              <Box sx={{ width: 150 }}>
+                <TargetLanguageSelector
+                  targetLanguage={targetLanguage}
+                  onChange={setTargetLanguage}
+                  disabled={isSessionActive}
                 />
               </Box>
             </Stack>
@@ -94,6 +118,11 @@ export default function Home() {
                     <Typography variant="body1" sx={{ lineHeight: 1.6, color: 'text.primary' }}>
                       {segment.trim()}
                     </Typography>
+                    {translations[index] && (
+                      <Typography variant="body2" sx={{ lineHeight: 1.6, color: 'text.secondary' }}>
+                        {translations[index]}
+                      </Typography>
+                    )}
                   </Box>
                 ))}
                 <div ref={scrollAnchorRef} />
@@ -135,6 +164,11 @@ export default function Home() {
                 <span style={{ fontStyle: 'italic', color: '#999' }}>(Listening...)</span>
               )}
             </Typography>
+            {partialTranslation && (
+              <Typography variant="body1" sx={{ color: 'text.secondary', mt: 1 }}>
+                {partialTranslation}
+              </Typography>
+            )}
           </Paper>
 
         </Container>
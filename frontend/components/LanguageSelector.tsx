@@ -3,10 +3,11 @@ import { FormControl, InputLabel, Select, MenuItem, SelectChangeEvent } from "@m
 interface LanguageSelectorProps {
     language: string;
     onChange: (lang: string) => void;
+    detectedLanguage?: string | null; // Shown next to "Auto Detect" once the server has decided
     disabled?: boolean;
 }
 
-export function LanguageSelector({ language, onChange, disabled }: LanguageSelectorProps) {
+export function LanguageSelector({ language, onChange, detectedLanguage, disabled }: LanguageSelectorProps) {
     const handleChange = (event: SelectChangeEvent) => {
         onChange(event.target.value as string);
     };
@@ -27,7 +28,9 @@ export function LanguageSelector({ language, onChange, disabled }: LanguageSelec
                 <MenuItem value="ko">Korean</MenuItem>
                 <MenuItem value="zh">Chinese</MenuItem>
                 <MenuItem value="yue">Cantonese</MenuItem>
-                <MenuItem value="auto">Auto Detect</MenuItem>
+                <MenuItem value="auto">
+                    {language === "auto" && detectedLanguage ? `Auto Detect (${detectedLanguage})` : "Auto Detect"}
+                </MenuItem>
             </Select>
         </FormControl>
     );
@@ -26,7 +26,10 @@ export const ModelSelector: React.FC<ModelSelectorProps> = ({
                 onChange={handleChange}
                 disabled={disabled}
             >
-                <MenuItem value="hybrid-moonshine-zipformer">Hybrid (Zipformer + Moonshine)</MenuItem>
+                <MenuItem value="auto">Auto</MenuItem>
+                <MenuItem value="hybrid">Hybrid (Zipformer + Whisper)</MenuItem>
+                <MenuItem value="moonshine">Moonshine</MenuItem>
+                <MenuItem value="parakeet">Parakeet</MenuItem>
             </Select>
         </FormControl>
     );
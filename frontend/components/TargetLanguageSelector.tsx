@@ -0,0 +1,35 @@
+import { FormControl, InputLabel, Select, MenuItem, SelectChangeEvent } from "@mui/material";
+
+interface TargetLanguageSelectorProps {
+    targetLanguage: string;
+    onChange: (lang: string) => void;
+    disabled?: boolean;
+}
+
+// Translation target; needs a matching opus-mt model on the server
+export function TargetLanguageSelector({ targetLanguage, onChange, disabled }: TargetLanguageSelectorProps) {
+    const handleChange = (event: SelectChangeEvent) => {
+        onChange(event.target.value as string);
+    };
+
+    return (
+        <FormControl fullWidth size="small" sx={{ minWidth: 120, mt: 1 }}>
+            <InputLabel id="target-language-select-label">Translate to</InputLabel>
+            <Select
+                labelId="target-language-select-label"
+                id="target-language-select"
+                value={targetLanguage}
+                label="Translate to"
+                onChange={handleChange}
+                disabled={disabled}
+            >
+                <MenuItem value="">Off</MenuItem>
+                <MenuItem value="ja">Japanese</MenuItem>
+                <MenuItem value="de">German</MenuItem>
+                <MenuItem value="fr">French</MenuItem>
+                <MenuItem value="es">Spanish</MenuItem>
+                <MenuItem value="zh">Chinese</MenuItem>
+            </Select>
+        </FormControl>
+    );
+}
@@ -1,6 +1,9 @@
 import { useState, useRef, useEffect, useCallback } from 'react';
 
-
+// Audio kept while reconnecting (~30 s of 4096-sample frames at 48 kHz); older frames are dropped
+const MAX_BUFFERED_FRAMES = 360;
+// Reconnect attempts after the socket drops; the server keeps the session parked for 30 s
+const MAX_RECONNECT_ATTEMPTS = 7;
 
 export const useAudioRecorder = () => {
     const [isRecording, setIsRecording] = useState(false);
@@ -12,13 +15,38 @@ export const useAudioRecorder = () => {
     const sourceRef = useRef<MediaStreamAudioSourceNode | null>(null);
     const isConnectedRef = useRef<boolean>(false);
     const [language, setLanguage] = useState<string>('en');
+    const [model, setModel] = useState<string>('auto');
+    const [activeModel, setActiveModel] = useState<string | null>(null); // Model the server actually assigned
+    const [activeLanguage, setActiveLanguage] = useState<string | null>(null); // Detected when language is 'auto'
     const [partialText, setPartialText] = useState<string>("");
     const [isSessionActive, setIsSessionActive] = useState(false);
 
     const [segments, setSegments] = useState<string[]>([]);
 
+    // Translation into targetLanguage ('' = off). translations[i] belongs to segments[i].
+    const [targetLanguage, setTargetLanguage] = useState<string>('');
+    const [translations, setTranslations] = useState<string[]>([]);
+    const [partialTranslation, setPartialTranslation] = useState<string>("");
+    const segmentCountRef = useRef<number>(0);
+    // Server segment index (restarts per connection) -> index into segments
+    const segmentIndexRef = useRef<Map<number, number>>(new Map());
+
+    // Protocol 2: partials arrive as deltas (offset + suffix) against the last partial
+    const partialRef = useRef<string>("");
+    const seqRef = useRef<number>(0);
+    const partialStaleRef = useRef<boolean>(false); // Missed a message; wait for a snapshot or final
+
     const sessionIdRef = useRef<string | null>(null); // Added sessionIdRef
 
+    // A dropped socket reconnects with the resume token and continues the server-side session
+    const resumeTokenRef = useRef<string | null>(null);
+    const lastSegmentRef = useRef<number>(-1); // Last final received; the server replays anything after it
+    const sampleRateRef = useRef<number>(0);
+    const reconnectingRef = useRef<boolean>(false);
+    const reconnectAttemptsRef = useRef<number>(0);
+    const reconnectTimerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+    const pendingAudioRef = useRef<Float32Array[]>([]);
+
     const pauseRecording = useCallback(() => {
         if (processorRef.current) {
             processorRef.current.disconnect();
@@ -36,21 +64,62 @@ export const useAudioRecorder = () => {
             streamRef.current.getTracks().forEach(track => track.stop());
             streamRef.current = null;
         }
+        // Finalize what was just said instead of waiting for the server's silence trigger
+        if (socketRef.current?.readyState === WebSocket.OPEN) {
+            socketRef.current.send(JSON.stringify({ type: 'flush' }));
+        }
         setIsRecording(false);
     }, []);
 
-    const connectWebSocket = useCallback(() => {
+    // Ask the server to finalize buffered audio and close; false if it didn't within the timeout
+    const endStream = useCallback((): Promise<boolean> => {
+        const ws = socketRef.current;
+        if (!ws || ws.readyState !== WebSocket.OPEN) return Promise.resolve(false);
+        return new Promise(resolve => {
+            const timer = setTimeout(() => resolve(false), 3000);
+            ws.addEventListener('close', () => {
+                clearTimeout(timer);
+                resolve(true);
+            }, { once: true });
+            ws.send(JSON.stringify({ type: 'end' }));
+        });
+    }, []);
+
+    const stopReconnecting = useCallback(() => {
+        if (reconnectTimerRef.current) {
+            clearTimeout(reconnectTimerRef.current);
+            reconnectTimerRef.current = null;
+        }
+        reconnectingRef.current = false;
+        reconnectAttemptsRef.current = 0;
+        pendingAudioRef.current = [];
+    }, []);
+
+    const connectWebSocket = useCallback((sampleRate: number, resuming: boolean = false) => {
         if (socketRef.current?.readyState === WebSocket.OPEN) return;
 
         // Close existing if any
         if (socketRef.current) {
-            socketRef.current.close();
+            socketRef.current.close(1000);
         }
 
         const sid = sessionIdRef.current; // Get session ID
         const sessionIdParam = sid ? `&session_id=${sid}` : ""; // Add session ID parameter
-        // Removed model_type parameter
-        const wsUrl = `ws://localhost:8000/ws/transcribe?language=${language}${sessionIdParam}`;
+        // The server resamples/downmixes to 16 kHz mono, so we send the device's native format
+        const formatParam = `&sample_rate=${sampleRate}&channels=1`;
+        const translateParam = targetLanguage ? `&target_language=${targetLanguage}` : "";
+        const resumeParam = resuming && resumeTokenRef.current
+            ? `&resume=${encodeURIComponent(resumeTokenRef.current)}&last_segment=${lastSegmentRef.current}` : "";
+        const wsUrl = `ws://localhost:8000/ws/transcribe?language=${language}&model=${model}${sessionIdParam}${formatParam}${translateParam}${resumeParam}&protocol=2`;
+        if (!resuming) {
+            segmentIndexRef.current = new Map();
+            lastSegmentRef.current = -1;
+            resumeTokenRef.current = null;
+        }
+        sampleRateRef.current = sampleRate;
+        partialRef.current = "";
+        seqRef.current = 0;
+        partialStaleRef.current = false;
 
         console.log(`Connecting to WebSocket: ${wsUrl}`);
         const ws = new WebSocket(wsUrl);
@@ -58,22 +127,101 @@ export const useAudioRecorder = () => {
         ws.onopen = () => {
             console.log('WebSocket Connected');
             isConnectedRef.current = true;
+            reconnectingRef.current = false;
+            reconnectAttemptsRef.current = 0;
+            // Audio captured while the socket was down, in order, before anything new
+            for (const frame of pendingAudioRef.current) {
+                ws.send(frame);
+            }
+            pendingAudioRef.current = [];
         };
 
         ws.onmessage = (event) => {
             try {
                 const data = JSON.parse(event.data);
+                if (data.control !== undefined) {
+                    // Acknowledgement of a control frame (flush / end / configure)
+                    if (!data.ok) console.warn('Control frame rejected:', data.error);
+                    return;
+                }
+                if (data.resume_token !== undefined) {
+                    resumeTokenRef.current = data.resume_token;
+                    if (!data.resumed) {
+                        // A new server-side session (nothing to resume): its segment indices start over
+                        segmentIndexRef.current = new Map();
+                        lastSegmentRef.current = -1;
+                    }
+                }
+                if (data.model) {
+                    // Server may downgrade to a cheaper model under load
+                    setActiveModel(data.model);
+                }
+                if (data.language !== undefined && data.text === undefined) {
+                    // Session hello, or a language switch detected mid-session
+                    setActiveLanguage(data.language);
+                }
+                if (data.error) {
+                    console.warn('Server rejected session:', data.error);
+                    // Not worth retrying (e.g. the resume token was refused): don't reconnect with it
+                    if (data.retry === false) resumeTokenRef.current = null;
+                }
+                if (data.translation_error) {
+                    console.warn('Translation unavailable:', data.translation_error);
+                }
+                if (data.translation !== undefined) {
+                    if (data.is_final) {
+                        const index = segmentIndexRef.current.get(data.segment);
+                        if (index !== undefined) {
+                            setTranslations(prev => {
+                                const next = [...prev];
+                                next[index] = data.translation;
+                                return next;
+                            });
+                        }
+                        setPartialTranslation("");
+                    } else {
+                        setPartialTranslation(data.translation);
+                    }
+                    return;
+                }
+                if (data.seq !== undefined) {
+                    const gap = data.seq !== seqRef.current + 1;
+                    seqRef.current = data.seq;
+                    if (data.suffix !== undefined) {
+                        // Keep the first `offset` characters of the partial, replace the rest
+                        if (gap) partialStaleRef.current = true;
+                        if (!partialStaleRef.current) {
+                            partialRef.current = partialRef.current.slice(0, data.offset) + data.suffix;
+                            setPartialText(partialRef.current);
+                        }
+                        return;
+                    }
+                    // Snapshots and finals carry the full text
+                    partialStaleRef.current = false;
+                }
                 if (data.text) {
                     if (data.is_final === false) {
+                        partialRef.current = data.text;
                         setPartialText(data.text);
                     } else {
                         // Final result
+                        if (data.segment !== undefined) {
+                            // Replayed after a reconnect and already shown
+                            if (data.segment <= lastSegmentRef.current) return;
+                            lastSegmentRef.current = data.segment;
+                        }
                         const newText = data.text.trim();
                         if (newText) {
                             setText(prev => prev + (prev ? " " : "") + newText);
                             setSegments(prev => [...prev, newText]);
+                            if (data.segment !== undefined) {
+                                segmentIndexRef.current.set(data.segment, segmentCountRef.current);
+                            }
+                            segmentCountRef.current += 1;
                         }
+                        partialRef.current = "";
                         setPartialText(""); // Clear partial since it's now finalized (or new segment started)
+                        setPartialTranslation("");
                     }
                 }
             } catch (err) {
@@ -91,14 +239,29 @@ export const useAudioRecorder = () => {
             }).catch(() => { });
         };
 
-        ws.onclose = () => {
-            console.log('WebSocket Disconnected');
+        ws.onclose = (event) => {
+            console.log('WebSocket Disconnected', event.code);
+            if (socketRef.current !== ws) return; // Replaced by a newer connection
             isConnectedRef.current = false;
+            // Dropped (not closed by us or the server): keep recording and resume the session
+            if (event.code !== 1000 && sessionIdRef.current && resumeTokenRef.current
+                && reconnectAttemptsRef.current < MAX_RECONNECT_ATTEMPTS) {
+                const delay = Math.min(500 * 2 ** reconnectAttemptsRef.current, 5000);
+                reconnectAttemptsRef.current += 1;
+                reconnectingRef.current = true;
+                console.log(`Reconnecting in ${delay}ms (attempt ${reconnectAttemptsRef.current})`);
+                reconnectTimerRef.current = setTimeout(() => {
+                    reconnectTimerRef.current = null;
+                    connectWebSocket(sampleRateRef.current, true);
+                }, delay);
+                return;
+            }
+            stopReconnecting();
             pauseRecording();
         };
 
         socketRef.current = ws;
-    }, [language, pauseRecording]);
+    }, [language, model, targetLanguage, pauseRecording, stopReconnecting]);
 
     const startRecording = useCallback(async () => {
         try {
@@ -110,12 +273,25 @@ export const useAudioRecorder = () => {
                 setText("");
                 setSegments([]);
                 setPartialText("");
+                setTranslations([]);
+                setPartialTranslation("");
+                segmentCountRef.current = 0;
             }
 
             setIsSessionActive(true);
 
-            if (!socketRef.current || socketRef.current.readyState !== WebSocket.OPEN) {
-                connectWebSocket();
+            const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
+            streamRef.current = stream;
+
+            // Run at the device's native rate; resampling happens on the server
+            const audioContext = new AudioContext();
+            audioContextRef.current = audioContext;
+            console.log(`AudioContext Sample Rate: ${audioContext.sampleRate}`);
+
+            // While a dropped socket is reconnecting, audio is buffered until it is back
+            if (!reconnectingRef.current && (!socketRef.current || socketRef.current.readyState !== WebSocket.OPEN)) {
+                // A socket lost mid-session continues the server-side session if it is still parked
+                connectWebSocket(audioContext.sampleRate, resumeTokenRef.current !== null);
                 // Wait a bit for connection
                 await new Promise(resolve => setTimeout(resolve, 500));
             }
@@ -123,51 +299,26 @@ export const useAudioRecorder = () => {
             setIsRecording(true);
             // setPartialText(""); // Don't clear partials on un-pause, only on Clear
 
-            const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-            streamRef.current = stream;
-
-            // Attempt to use native 16kHz context for better quality resampling
-            let audioContext: AudioContext;
-            try {
-                audioContext = new AudioContext({ sampleRate: 16000 });
-            } catch (e) {
-                console.warn("Browser does not support sampleRate configuration, falling back to default");
-                audioContext = new AudioContext();
-            }
-            audioContextRef.current = audioContext;
-            console.log(`AudioContext Sample Rate: ${audioContext.sampleRate}`);
-
             const source = audioContext.createMediaStreamSource(stream);
             sourceRef.current = source; // Store source to disconnect later!
 
             // Use ScriptProcessor for raw audio access (simpler for this demo than AudioWorklet)
-            // Buffer size 4096 = ~0.25s at 16kHz
+            // A single input channel lets WebAudio do the downmix natively
             const processor = audioContext.createScriptProcessor(4096, 1, 1);
             processorRef.current = processor;
 
             processor.onaudioprocess = (e) => {
+                if (reconnectingRef.current) {
+                    // The browser reuses the input buffer, so keep a copy
+                    pendingAudioRef.current.push(e.inputBuffer.getChannelData(0).slice());
+                    if (pendingAudioRef.current.length > MAX_BUFFERED_FRAMES) pendingAudioRef.current.shift();
+                    return;
+                }
                 if (!isConnectedRef.current || !socketRef.current) return;
 
-                const inputData = e.inputBuffer.getChannelData(0);
-                const targetRate = 16000;
-                const currentRate = audioContext.sampleRate;
-
                 if (socketRef.current.readyState === WebSocket.OPEN) {
-                    if (currentRate === targetRate) {
-                        // usage of .buffer on a TypedArray sends the underlying buffer which might be larger or shared.
-                        // We should send the TypedArray itself (view) or a slice.
-                        // sending the TypedArray view is supported by WebSocket and safer.
-                        socketRef.current.send(inputData);
-                    } else {
-                        // Simple downsampling
-                        const ratio = currentRate / targetRate;
-                        const newLength = Math.floor(inputData.length / ratio);
-                        const result = new Float32Array(newLength);
-                        for (let i = 0; i < newLength; i++) {
-                            result[i] = inputData[Math.floor(i * ratio)];
-                        }
-                        socketRef.current.send(result);
-                    }
+                    // Send the TypedArray view itself; its .buffer may be larger or shared
+                    socketRef.current.send(e.inputBuffer.getChannelData(0));
                 }
             };
 
@@ -194,11 +345,14 @@ export const useAudioRecorder = () => {
     }, [connectWebSocket]);
 
     const endSession = useCallback(async () => { // Made async to await fetch
+        stopReconnecting();
         pauseRecording();
+        // The server finalizes the last utterance and delivers it before closing
+        const ended = await endStream();
 
-        // Finalize text: Flush partials and ensure punctuation
+        // Finalize text: Flush partials (if the server couldn't) and ensure punctuation
         setText(prev => {
-            const currentPartial = partialText;
+            const currentPartial = ended ? "" : partialText;
             let combined = prev;
             if (currentPartial) {
                 combined = (combined + " " + currentPartial).trim();
@@ -211,13 +365,24 @@ export const useAudioRecorder = () => {
 
         // Also finalize segment for partial
         setSegments(prev => {
-            if (partialText) {
+            if (partialText && !ended) {
                 return [...prev, partialText];
             }
             return prev;
         });
+        if (partialText && !ended) {
+            segmentCountRef.current += 1;
+            // Keep the last partial translation with the segment it belongs to
+            const index = segmentCountRef.current - 1;
+            setTranslations(prev => {
+                const next = [...prev];
+                next[index] = partialTranslation;
+                return next;
+            });
+        }
 
         setPartialText("");
+        setPartialTranslation("");
 
         const sid = sessionIdRef.current;
         if (sid) {
@@ -229,7 +394,7 @@ export const useAudioRecorder = () => {
                     body: JSON.stringify({ session_id: sid })
                 });
                 const result = await response.json();
-                console.log("Recording saved:", result);
+                console.log("Recording queued for compression:", result);
             } catch (e) {
                 console.error("Failed to save recording:", e);
             }
@@ -239,10 +404,11 @@ export const useAudioRecorder = () => {
 
         if (socketRef.current) {
             console.log('Ending session (Closing WebSocket)');
-            socketRef.current.close();
+            socketRef.current.close(1000);
             socketRef.current = null;
         }
-    }, [pauseRecording, partialText]);
+        resumeTokenRef.current = null;
+    }, [pauseRecording, stopReconnecting, endStream, partialText, partialTranslation]);
 
     // clearText removed
 
@@ -251,7 +417,8 @@ export const useAudioRecorder = () => {
     useEffect(() => {
         // connectWebSocket(); // Don't auto-connect on mount, wait for start
         return () => {
-            socketRef.current?.close();
+            if (reconnectTimerRef.current) clearTimeout(reconnectTimerRef.current);
+            socketRef.current?.close(1000);
         };
     }, []); // Remove connectWebSocket from dependency to avoid loop
 
@@ -263,6 +430,14 @@ export const useAudioRecorder = () => {
         partialText,
         language,
         setLanguage,
+        model,
+        setModel,
+        activeModel,
+        activeLanguage,
+        targetLanguage,
+        setTargetLanguage,
+        translations,
+        partialTranslation,
         startRecording,
         pauseRecording,
         endSession